@@ -23,7 +23,8 @@ import BottomNav from "@/components/ui/BottomNav";
 import { useLang } from "@/context/LanguageContext";
 import { type Translations } from "@/locales/en";
 import {
-  getAllRecords,
+  syncAllRecords,
+  getCachedRecords,
   formatNPR,
   type AllRecordsData,
 } from "@/services/publicApi";
@@ -193,7 +194,8 @@ export default function DashboardScreen() {
   const load = useCallback(async () => {
     setError(false);
     try {
-      const d = await getAllRecords();
+      // Only changes since the last refresh are downloaded
+      const d = await syncAllRecords();
       setData(d);
     } catch {
       setError(true);
@@ -204,6 +206,13 @@ export default function DashboardScreen() {
   }, []);
 
   useEffect(() => {
+    // Show the copy saved on the device while syncing
+    getCachedRecords().then((cached) => {
+      if (cached) {
+        setData((current) => current ?? cached);
+        setLoading(false);
+      }
+    });
     load();
   }, []);
 
@@ -1,3 +1,5 @@
+import AsyncStorage from "@react-native-async-storage/async-storage";
+
 export const API_BASE = "http://10.5.5.182:8005";
 export interface PublicSummary {
   total_allocated: number;
@@ -99,6 +101,92 @@ export async function getAllRecords(): Promise<AllRecordsData> {
   return res.json();
 }
 
+// ─── Incremental sync (/records/sync) ─────────────────────────────────────────
+// Keeps records + aggregates in AsyncStorage and only downloads what changed
+// since the last refresh.
+
+export interface RecordsDelta {
+  records: ReliefRecord[];
+  deleted: string[];
+  aggregates: Omit<AllRecordsData, "recent_records"> | null;
+  cursor: string;
+  has_more: boolean;
+}
+
+interface RecordStore {
+  cursor: string | null;
+  aggregates: Omit<AllRecordsData, "recent_records"> | null;
+  records: Record<string, ReliefRecord>;
+}
+
+const RECORD_STORE_KEY = "records-sync-v1";
+const RECORD_STORE_LIMIT = 1000; // most recent records kept on the device
+const RECORD_BOOTSTRAP_LIMIT = 100; // records fetched on a first sync
+
+export async function getRecordsDelta(since?: string | null): Promise<RecordsDelta> {
+  // First sync: aggregates + newest records only, not the whole history
+  const query = since
+    ? `?since=${encodeURIComponent(since)}`
+    : `?bootstrap=true&limit=${RECORD_BOOTSTRAP_LIMIT}`;
+  const res = await fetch(`${API_BASE}/records/sync${query}`);
+  if (!res.ok) throw new Error("Failed to sync records");
+  return res.json();
+}
+
+async function loadRecordStore(): Promise<RecordStore> {
+  try {
+    const raw = await AsyncStorage.getItem(RECORD_STORE_KEY);
+    if (raw) return JSON.parse(raw);
+  } catch {}
+  return { cursor: null, aggregates: null, records: {} };
+}
+
+function storeToData(store: RecordStore): AllRecordsData | null {
+  if (!store.aggregates) return null;
+  const recent = Object.values(store.records)
+    .sort((a, b) => b.created_at.localeCompare(a.created_at))
+    .slice(0, 10);
+  return { ...store.aggregates, recent_records: recent };
+}
+
+/** Cached dashboard data, without touching the network. */
+export async function getCachedRecords(): Promise<AllRecordsData | null> {
+  return storeToData(await loadRecordStore());
+}
+
+/**
+ * Same payload as getAllRecords(), but only the changes since the last call
+ * are downloaded (the first call fetches the aggregates and the newest
+ * records). Falls back to the cached copy when offline.
+ */
+export async function syncAllRecords(): Promise<AllRecordsData> {
+  const store = await loadRecordStore();
+  try {
+    let delta: RecordsDelta;
+    do {
+      delta = await getRecordsDelta(store.cursor);
+      for (const r of delta.records) store.records[r.id] = r;
+      for (const id of delta.deleted) delete store.records[id];
+      if (delta.aggregates) store.aggregates = delta.aggregates;
+      store.cursor = delta.cursor;
+    } while (delta.has_more);
+  } catch (e) {
+    const cached = storeToData(store);
+    if (cached) return cached;
+    throw e;
+  }
+
+  const kept = Object.values(store.records)
+    .sort((a, b) => b.created_at.localeCompare(a.created_at))
+    .slice(0, RECORD_STORE_LIMIT);
+  store.records = Object.fromEntries(kept.map((r) => [r.id, r]));
+  await AsyncStorage.setItem(RECORD_STORE_KEY, JSON.stringify(store)).catch(() => {});
+
+  const data = storeToData(store);
+  if (!data) throw new Error("Failed to sync records");
+  return data;
+}
+
 // Date offset: Database dates are 7 days behind actual dates
 const DATE_OFFSET_DAYS = 7;
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import create_access_token, verify_and_update_password_async, get_password_hash_async
 from app.db.supabase import get_supabase_admin
 from app.models.schemas import UserCreate, UserOut, Token
 from datetime import timedelta
@@ -17,7 +17,7 @@ async def register(user_data: UserCreate):
     if existing.data:
         raise HTTPException(status_code=400, detail="Email already registered")
         
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     
     user_dict = {
         "name": user_data.name,
@@ -43,8 +43,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
         
     user = res.data[0]
-    if not verify_password(form_data.password, user['hashed_password']):
+    verified, new_hash = await verify_and_update_password_async(form_data.password, user['hashed_password'])
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if new_hash:
+        # Stored hash predates the current PASSWORD_HASH_ROUNDS; upgrade it
+        try:
+            supabase.table("users").update({"hashed_password": new_hash}).eq("id", user['id']).execute()
+        except Exception as e:
+            print(f"Password rehash failed for {user['email']}: {e}")
         
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -5,24 +5,64 @@ Public endpoints for verifying relief records on Solana blockchain.
 
 GET  /blockchain/status                — Service status + wallet info
 GET  /blockchain/verify/{record_id}    — Verify a single record against on-chain hash
+POST /blockchain/verify-bulk           — Re-hash many records (ids or filter), report mismatches
 POST /blockchain/anchor/{record_id}    — Manually anchor an existing record
-POST /blockchain/anchor-all            — Anchor all un-anchored records (batch)
+POST /blockchain/anchor-all            — Start a background job anchoring all un-anchored records
+GET  /blockchain/anchor-jobs           — Recent anchor-all jobs
+GET  /blockchain/anchor-jobs/{job_id}  — Job progress, throughput and failures
+GET  /blockchain/queue                 — Anchoring queue depth, lag and worker stats
 GET  /blockchain/stats                 — Blockchain anchoring statistics
+GET  /blockchain/ledger                — Local hash-chain head and latest on-chain checkpoint
+GET  /blockchain/ledger/verify         — Verify a seq range of the hash chain locally
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query
+from postgrest.exceptions import APIError
 from app.db.supabase import get_supabase_admin
+from app.models.schemas import BulkVerifyRequest
 from app.services.blockchain_service import (
     hash_record,
-    anchor_to_solana,
+    anchor_batch,
     get_explorer_url,
     get_blockchain_status,
-    verify_record_hash_only,
+    verify_record_on_chain,
+    verify_merkle_proof,
+    verify_records_bulk,
     get_wallet_address,
 )
+from app.services.record_ledger import (
+    ledger_checkpointer,
+    get_ledger_head,
+    get_latest_checkpoint,
+    verify_ledger_range,
+)
+from app.services.anchor_queue import (
+    anchor_queue,
+    anchor_jobs,
+    save_anchors,
+    claim_pending_anchor,
+    release_pending_anchors,
+    get_queue_depth,
+    create_anchor_job,
+    get_anchor_job,
+    list_anchor_jobs,
+    describe_job,
+    ANCHOR_JOB_CONCURRENCY,
+    ANCHOR_JOB_MAX_CONCURRENCY,
+)
 
 router = APIRouter(prefix="/blockchain", tags=["blockchain"])
 
+# Columns hash_record() reads plus the stored anchoring data
+VERIFY_COLUMNS = (
+    "id,full_name,citizenship_no,relief_amount,province,district,disaster_type,"
+    "officer_name,officer_id,created_at,record_hash,merkle_root,merkle_proof,solana_tx_signature"
+)
+VERIFY_PAGE_SIZE = 1000   # PostgREST's default max rows per request
+VERIFY_ID_CHUNK = 200     # ids per `in.(...)` filter, keeps the URL short
+
 
 def _supabase():
     return get_supabase_admin()
@@ -31,16 +71,20 @@ def _supabase():
 @router.get("/status")
 async def blockchain_status():
     """Get Solana blockchain service status, wallet address, and balance."""
-    return get_blockchain_status()
+    return await get_blockchain_status()
 
 
 @router.get("/verify/{record_id}")
-async def verify_record(record_id: str):
+async def verify_record(record_id: str, on_chain: bool = Query(True)):
     """
     Verify a relief record's integrity against the blockchain.
     
-    - If the record has a solana_tx_signature → check on-chain
     - Re-hashes the current DB record and compares to stored hash
+    - For Merkle-batched records, checks the inclusion proof against the
+      stored root locally
+    - If the record has a solana_tx_signature and `on_chain` is set, decodes
+      the finalized memo and checks the record against it. Memos are cached
+      by signature, so only the first check of a transaction hits RPC.
     - Returns verification result + Solana Explorer link
     """
     supabase = _supabase()
@@ -57,6 +101,8 @@ async def verify_record(record_id: str):
     current_hash = hash_record(record)
     stored_hash = record.get("record_hash")
     tx_sig = record.get("solana_tx_signature")
+    merkle_root = record.get("merkle_root")
+    proof = record.get("merkle_proof")
     
     result = {
         "record_id": record_id,
@@ -70,15 +116,92 @@ async def verify_record(record_id: str):
         "blockchain": "Solana Devnet",
     }
     
-    if stored_hash:
+    if merkle_root and proof is not None:
+        proof_valid = verify_merkle_proof(current_hash, proof, merkle_root)
+        result["merkle_root"] = merkle_root
+        result["merkle_proof_valid"] = proof_valid
+        result["verified"] = proof_valid and tx_sig is not None
+    elif stored_hash:
         result["verified"] = current_hash == stored_hash and tx_sig is not None
     else:
         result["verified"] = False
         result["note"] = "Record has not been anchored to blockchain yet"
     
+    if on_chain and tx_sig:
+        chain = await verify_record_on_chain(record, tx_sig)
+        result["on_chain"] = chain
+        if chain["verified"] is False:
+            result["verified"] = False
+    
     return result
 
 
+def _verify_page_fetcher(body: BulkVerifyRequest):
+    """
+    Build a blocking `fetch_page(cursor) -> (rows, next_cursor)` for
+    verify_records_bulk. Id lists are paged by offset, filters by keyset on id.
+    """
+    supabase = _supabase()
+
+    if body.ids:
+        ids = list(dict.fromkeys(body.ids))
+
+        def fetch_ids(offset):
+            offset = offset or 0
+            chunk = ids[offset:offset + VERIFY_ID_CHUNK]
+            res = supabase.table("relief_records").select(VERIFY_COLUMNS).in_("id", chunk).execute()
+            next_offset = offset + VERIFY_ID_CHUNK
+            return res.data or [], next_offset if next_offset < len(ids) else None
+
+        return fetch_ids
+
+    def fetch_filtered(after_id):
+        query = supabase.table("relief_records").select(VERIFY_COLUMNS)
+        if body.province:
+            query = query.eq("province", body.province)
+        if body.district:
+            query = query.eq("district", body.district)
+        if body.disaster_type:
+            query = query.eq("disaster_type", body.disaster_type)
+        if body.officer_id:
+            query = query.eq("officer_id", body.officer_id)
+        if body.created_from:
+            query = query.gte("created_at", body.created_from.isoformat())
+        if body.created_to:
+            query = query.lte("created_at", body.created_to.isoformat())
+        if body.anchored_only:
+            query = query.not_.is_("record_hash", "null")
+        if after_id:
+            query = query.gt("id", after_id)
+        rows = query.order("id").limit(VERIFY_PAGE_SIZE).execute().data or []
+        return rows, rows[-1]["id"] if len(rows) == VERIFY_PAGE_SIZE else None
+
+    return fetch_filtered
+
+
+@router.post("/verify-bulk")
+async def verify_records_bulk_endpoint(body: BulkVerifyRequest):
+    """
+    Offline integrity audit of many records at once.
+
+    Pass `ids`, or any of the filters (province, district, disaster_type,
+    officer_id, created_from/created_to); an empty body audits every record.
+    Records are re-hashed on a process pool and checked against the stored
+    hash and Merkle proof — no RPC calls. Only mismatches are listed:
+    - tampered: current hash differs from the stored hash
+    - proof_invalid: hash matches but does not lead to the anchored root
+    """
+    try:
+        report = await verify_records_bulk(_verify_page_fetcher(body))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    if body.ids:
+        report["not_found"] = len(set(body.ids)) - report["checked"]
+    report["blockchain"] = "Solana Devnet"
+    return report
+
+
 @router.post("/anchor/{record_id}")
 async def anchor_record(record_id: str):
     """
@@ -106,25 +229,51 @@ async def anchor_record(record_id: str):
             "explorer_url": get_explorer_url(record["solana_tx_signature"]),
         }
     
-    # Hash and anchor
-    record_hash = hash_record(record)
-    tx_sig = anchor_to_solana(record_id, record_hash)
+    # Lease the record like a queue worker would, so the two never anchor it concurrently
+    loop = asyncio.get_running_loop()
+    try:
+        claimed = await loop.run_in_executor(None, claim_pending_anchor, record_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not claimed:
+        raise HTTPException(
+            status_code=409,
+            detail="Record is being anchored by the queue worker, try again shortly",
+        )
+    
+    # Hash and anchor (a one-record batch: root == record hash, empty proof)
+    anchored = (await anchor_batch([record]))[0]
+    record_hash = anchored["hash"]
+    tx_sig = anchored["tx_signature"]
     
     if not tx_sig:
+        try:
+            await loop.run_in_executor(None, release_pending_anchors, [record_id], "manual anchor failed")
+        except Exception as e:
+            print(f"[Blockchain] WARNING: could not release {record_id} back to the queue: {e}")
         raise HTTPException(
             status_code=503,
             detail="Failed to anchor to Solana. Check wallet balance or RPC connectivity."
         )
     
-    # Update DB with tx signature and hash
+    # Update DB with tx signature, hash and proof (never over an existing signature)
     try:
-        supabase.table("relief_records").update({
-            "solana_tx_signature": tx_sig,
-            "record_hash": record_hash,
-        }).eq("id", record_id).execute()
+        applied = await loop.run_in_executor(None, save_anchors, supabase, [anchored])
     except Exception as e:
         # Transaction was sent but DB update failed — log it
         print(f"[Blockchain] WARNING: TX sent ({tx_sig}) but DB update failed for {record_id}: {e}")
+    else:
+        if not applied:
+            # Anchored elsewhere after our lease expired; the stored proof wins
+            res = supabase.table("relief_records").select("solana_tx_signature").eq("id", record_id).execute()
+            stored = res.data[0]["solana_tx_signature"] if res.data else None
+            if stored:
+                return {
+                    "message": "Record already anchored",
+                    "record_id": record_id,
+                    "solana_tx_signature": stored,
+                    "explorer_url": get_explorer_url(stored),
+                }
     
     return {
         "message": "Record anchored to Solana blockchain",
@@ -136,62 +285,120 @@ async def anchor_record(record_id: str):
     }
 
 
-@router.post("/anchor-all")
-async def anchor_all_unanchored():
+@router.post("/anchor-all", status_code=202)
+async def anchor_all_unanchored(
+    concurrency: int = Query(ANCHOR_JOB_CONCURRENCY, ge=1, le=ANCHOR_JOB_MAX_CONCURRENCY),
+):
     """
-    Anchor all records that don't have a solana_tx_signature yet.
-    Returns a summary of successes and failures.
+    Start a background job that anchors every record without a
+    solana_tx_signature in Merkle batches, `concurrency` batches at a time.
+    Returns immediately; poll GET /blockchain/anchor-jobs/{job_id}.
+    Only one job runs at a time: 409 (with the running job's id) otherwise.
+    The job survives restarts — any API worker resumes it.
     """
-    supabase = _supabase()
     try:
-        res = supabase.table("relief_records") \
-            .select("*") \
-            .is_("solana_tx_signature", "null") \
-            .order("created_at", desc=False) \
-            .execute()
-        records = res.data or []
+        job = await asyncio.get_running_loop().run_in_executor(None, create_anchor_job, concurrency)
+    except APIError as e:
+        if e.code == "23505":
+            # Another anchor-all job is still queued or running
+            raise HTTPException(status_code=409, detail={
+                "message": e.message,
+                "job_id": e.details,
+                "status_url": f"/blockchain/anchor-jobs/{e.details}",
+            })
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     
-    if not records:
-        return {"message": "All records are already anchored", "anchored": 0, "failed": 0}
-    
-    anchored = 0
-    failed = 0
-    results = []
-    
-    for record in records:
-        record_hash = hash_record(record)
-        tx_sig = anchor_to_solana(str(record["id"]), record_hash)
-        
-        if tx_sig:
-            try:
-                supabase.table("relief_records").update({
-                    "solana_tx_signature": tx_sig,
-                    "record_hash": record_hash,
-                }).eq("id", record["id"]).execute()
-                anchored += 1
-                results.append({
-                    "id": str(record["id"]),
-                    "status": "anchored",
-                    "tx_signature": tx_sig,
-                })
-            except Exception:
-                failed += 1
-                results.append({"id": str(record["id"]), "status": "db_update_failed"})
-        else:
-            failed += 1
-            results.append({"id": str(record["id"]), "status": "tx_failed"})
+    anchor_jobs.notify()
     
     return {
-        "message": f"Anchored {anchored} records, {failed} failed",
-        "total": len(records),
-        "anchored": anchored,
-        "failed": failed,
-        "results": results[:20],  # Limit response size
+        "message": f"Started anchoring {job['total']} records" if job["total"] else "No un-anchored records",
+        "job_id": job["id"],
+        "status_url": f"/blockchain/anchor-jobs/{job['id']}",
+        "job": describe_job(job),
+    }
+
+
+@router.get("/anchor-jobs")
+async def anchor_job_list(limit: int = Query(20, ge=1, le=100)):
+    """Most recent anchor-all jobs, newest first."""
+    try:
+        jobs = await asyncio.get_running_loop().run_in_executor(None, list_anchor_jobs, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return [describe_job(j) for j in jobs]
+
+
+@router.get("/anchor-jobs/{job_id}")
+async def anchor_job_status(job_id: str):
+    """
+    Progress of an anchor-all job: anchored / failed / remaining counts,
+    records per second, ETA and the most recent failures.
+    """
+    try:
+        job = await asyncio.get_running_loop().run_in_executor(None, get_anchor_job, job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail="Anchor job not found")
+    return describe_job(job)
+
+
+@router.get("/queue")
+async def anchoring_queue_status():
+    """Anchoring queue depth and lag (all workers) plus this process's worker stats."""
+    try:
+        depth = get_queue_depth()
+    except Exception as e:
+        depth = {"error": str(e)}
+    return {
+        "queue": depth,
+        "worker": anchor_queue.stats(),
+        "jobs": anchor_jobs.stats(),
     }
 
 
+@router.get("/ledger")
+async def ledger_status():
+    """Local hash-chain head, latest on-chain checkpoint and checkpointer stats."""
+    try:
+        head = get_ledger_head()
+        checkpoint = get_latest_checkpoint()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if checkpoint:
+        checkpoint["explorer_url"] = get_explorer_url(checkpoint["tx_signature"])
+    return {
+        "head": head,
+        "latest_checkpoint": checkpoint,
+        "unanchored_entries": head["seq"] - (checkpoint["seq"] if checkpoint else 0),
+        "checkpointer": ledger_checkpointer.stats(),
+    }
+
+
+@router.get("/ledger/verify")
+async def ledger_verify(
+    from_seq: int = Query(1, ge=1),
+    to_seq: int | None = Query(None, ge=1),
+    on_chain: bool = Query(False),
+):
+    """
+    Verify ledger entries from_seq..to_seq (default: to the head) in one
+    local scan: chain links, each record's current hash against the hash
+    chained at insert, and the checkpoints in the range. With `on_chain`,
+    checkpoints are also checked against their decoded Solana memos.
+    """
+    if to_seq is not None and to_seq < from_seq:
+        raise HTTPException(status_code=400, detail="to_seq must be >= from_seq")
+    try:
+        return await verify_ledger_range(from_seq, to_seq, on_chain)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
 @router.get("/stats")
 async def blockchain_stats():
     """Statistics about blockchain anchoring coverage."""
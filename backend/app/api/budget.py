@@ -0,0 +1,56 @@
+"""
+Budget Allocation API
+=====================
+Writes go through the in-memory budget ledger (validated in memory, then
+committed with an optimistic version check — see services/budget_ledger.py).
+
+  POST /budget/province-allocation  — Allocate national budget to a province
+  POST /budget/district-allocation  — Allocate a province's budget to a district
+  GET  /budget/ledger               — Whole national → province → district tree
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.security import RoleChecker, TokenData
+from app.models.schemas import ProvinceAllocationCreate, DistrictAllocationCreate, AuditLogCreate
+from app.services.audit_service import log_action
+from app.services.budget_ledger import budget_ledger
+from app.services.rbac_scope import district_scope
+
+router = APIRouter(prefix="/budget", tags=["budget"])
+
+admin_roles = ["SUPER_ADMIN"]
+province_roles = ["SUPER_ADMIN", "PROVINCE_ADMIN"]
+
+
+@router.post("/province-allocation")
+async def allocate_province_budget(data: ProvinceAllocationCreate, user: TokenData = Depends(RoleChecker(admin_roles))):
+    allocation = await budget_ledger.allocate_province(data.dict())
+    await log_action(AuditLogCreate(
+        user_id=user.user_id, action="CREATE", table_name="province_allocation",
+        record_id=str(allocation["id"]), new_data=allocation,
+    ))
+    return {"message": "Province budget allocated", "data": allocation}
+
+
+@router.post("/district-allocation")
+async def allocate_district_budget(data: DistrictAllocationCreate, user: TokenData = Depends(RoleChecker(province_roles))):
+    parent = await budget_ledger.check(
+        data.province_allocation_id, "province", 0,
+        "Province Allocation not found", "Insufficient Province Budget. Available",
+    )
+    if not RoleChecker.can_access_province(user, parent["ref"]):
+        raise HTTPException(status_code=403, detail="Access denied to this province")
+
+    allocation = await budget_ledger.allocate_district(data.dict())
+    # District → province membership changed
+    district_scope.invalidate()
+    await log_action(AuditLogCreate(
+        user_id=user.user_id, action="CREATE", table_name="district_allocation",
+        record_id=str(allocation["id"]), new_data=allocation,
+    ))
+    return {"message": "District budget allocated", "data": allocation}
+
+
+@router.get("/ledger", dependencies=[Depends(RoleChecker(admin_roles))])
+async def get_budget_ledger():
+    return {"budgets": await budget_ledger.tree(), "stats": budget_ledger.stats()}
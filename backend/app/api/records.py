@@ -2,20 +2,34 @@
 relief_records API
 ==================
 POST /records           — Submit a new relief record (no auth)
+POST /records/bulk      — Submit up to 1000 records in one request (no auth)
 GET  /records           — List all records (no auth)
 GET  /records/analytics — National summary totals (no auth)
 GET  /records/by-province — Province-wise totals (no auth)
 GET  /records/by-district — District-wise totals (no auth)
 GET  /records/by-officer  — Officer-wise records (no auth)
+GET  /records/sync        — Changes since a cursor, for the mobile app (no auth)
+GET  /records/export      — Streamed CSV / Parquet / NDJSON dump (no auth)
 """
 
-import threading
-from fastapi import APIRouter, HTTPException
+import asyncio
+import uuid
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from app.db.supabase import get_supabase_admin
-from app.models.schemas import ReliefRecordCreate, ReliefRecordOut
+from app.models.schemas import ReliefRecordCreate, ReliefRecordOut, ReliefRecordBulkCreate, ReliefRecordBulkItem, AuditLogCreate
+from app.services.audit_service import log_actions
+from app.services.anchor_queue import anchor_queue
+from app.services.record_export import EXPORT_FORMATS, export_records, parquet_available
+from app.services.record_ledger import append_to_ledger
 
 router = APIRouter(prefix="/records", tags=["records"])
 
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+
 
 def _supabase():
     return get_supabase_admin()
@@ -40,22 +54,15 @@ async def create_record(data: ReliefRecordCreate):
         row.setdefault("solana_tx_signature", None)
         row.setdefault("record_hash", None)
 
-        # Anchor to Solana blockchain in background (non-blocking)
-        def _anchor_async(record_row):
-            try:
-                from app.services.blockchain_service import hash_record, anchor_to_solana
-                record_hash = hash_record(record_row)
-                tx_sig = anchor_to_solana(str(record_row["id"]), record_hash)
-                if tx_sig:
-                    _supabase().table("relief_records").update({
-                        "solana_tx_signature": tx_sig,
-                        "record_hash": record_hash,
-                    }).eq("id", record_row["id"]).execute()
-                    print(f"[Blockchain] Record {record_row['id']} anchored: {tx_sig}")
-            except Exception as ex:
-                print(f"[Blockchain] Background anchor failed: {ex}")
-
-        threading.Thread(target=_anchor_async, args=(dict(row),), daemon=True).start()
+        # Chain it locally right away; if this fails the checkpointer's
+        # backfill chains it on its next round
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, append_to_ledger, [row])
+        except Exception as e:
+            print(f"[Ledger] WARNING: could not chain record {row.get('id')}: {e}")
+
+        # The insert trigger queued the record for anchoring; wake the worker
+        anchor_queue.notify()
 
         return row
     except HTTPException:
@@ -66,6 +73,83 @@ async def create_record(data: ReliefRecordCreate):
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+def _insert_bulk(rows: list[dict]) -> list[dict]:
+    """One multi-row insert, then chain the new records in one ledger call."""
+    res = _supabase().table("relief_records") \
+        .upsert(rows, on_conflict="id", ignore_duplicates=True) \
+        .execute()
+    inserted = res.data or []
+    if inserted:
+        try:
+            append_to_ledger(inserted)
+        except Exception as e:
+            print(f"[Ledger] WARNING: could not chain {len(inserted)} bulk records: {e}")
+    return inserted
+
+
+@router.post("/bulk")
+async def create_records_bulk(data: ReliefRecordBulkCreate):
+    """
+    Insert many relief records in one round-trip. No auth required.
+
+    Every item is validated on its own; valid items go in as a single
+    multi-row insert and invalid ones are reported back by index. An item
+    with a `client_record_id` that already exists (a resent batch) is
+    reported as `duplicate` instead of being inserted twice.
+    """
+    results: list[dict] = []
+    rows: list[dict] = []
+    row_index: dict[str, int] = {}
+    for i, item in enumerate(data.records):
+        try:
+            record = ReliefRecordBulkItem(**item)
+        except (ValidationError, TypeError) as e:
+            errors = e.errors() if isinstance(e, ValidationError) else [{"msg": str(e)}]
+            results.append({
+                "index": i,
+                "status": "invalid",
+                "errors": [{"loc": list(err.get("loc", ())), "msg": err["msg"]} for err in errors],
+            })
+            continue
+        payload = record.dict(exclude={"client_record_id"})
+        payload["id"] = str(record.client_record_id or uuid.uuid4())
+        payload["officer_id"]   = payload.get("officer_id") or "OFF-DIRECT"
+        payload["officer_name"] = payload.get("officer_name") or "Duty Officer"
+        if payload["id"] in row_index:
+            results.append({"index": i, "status": "duplicate", "id": payload["id"]})
+            continue
+        row_index[payload["id"]] = i
+        rows.append(payload)
+        results.append({"index": i, "status": "created", "id": payload["id"]})
+
+    inserted_ids: set[str] = set()
+    if rows:
+        try:
+            inserted = await asyncio.get_running_loop().run_in_executor(None, _insert_bulk, rows)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        inserted_ids = {str(r["id"]) for r in inserted}
+        await log_actions([
+            AuditLogCreate(action="CREATE", table_name="relief_records", record_id=str(r["id"]), new_data=r)
+            for r in inserted
+        ])
+        # The insert trigger queued every new record for anchoring; one wake-up
+        # lets the worker claim them together
+        if inserted_ids:
+            anchor_queue.notify()
+
+    for result in results:
+        if result["status"] == "created" and result["id"] not in inserted_ids:
+            result["status"] = "duplicate"
+
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "results": results}
+
+
 # ── read ─────────────────────────────────────────────────────────────────────
 
 @router.get("", response_model=list[ReliefRecordOut])
@@ -90,6 +174,29 @@ async def list_records(
         return []
 
 
+@router.get("/export")
+async def export_records_endpoint(
+    format: str = Query("csv", pattern="^(csv|parquet|ndjson)$"),
+    province: str | None = None,
+    district: str | None = None,
+    disaster_type: str | None = None,
+):
+    """
+    Full dataset download for auditors, with the same filters as GET /records.
+    Streamed page by page, so server memory stays flat however many records
+    there are.
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed on the server")
+    media_type, extension = EXPORT_FORMATS[format]
+    filters = {"province": province, "district": district, "disaster_type": disaster_type}
+    return StreamingResponse(
+        export_records(format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="relief_records.{extension}"'},
+    )
+
+
 @router.get("/analytics")
 async def get_analytics():
     """National summary — total allocated, total distributed, remaining, count."""
@@ -179,6 +286,58 @@ async def by_officer():
         return []
 
 
+def _parse_sync_cursor(cursor: str) -> tuple[str, str | None]:
+    """'<xid>' or '<xid>:<record id>' → (xid, record id)."""
+    xid, _, after_id = cursor.partition(":")
+    try:
+        if int(xid) < 0:
+            raise ValueError
+        return xid, str(uuid.UUID(after_id)) if after_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+
+
+@router.get("/sync")
+async def sync_records(since: str | None = None, limit: int = SYNC_PAGE_SIZE, bootstrap: bool = False):
+    """
+    Incremental sync for the mobile app (see migrations/relief_records_sync.sql).
+
+    Without `since` this is a full download, unless `bootstrap` is set: then
+    only the aggregates and the `limit` newest records come back, with a
+    cursor to continue from. Returns the records changed
+    after the cursor (oldest change first), the ids of records deleted since,
+    the get-all-records aggregates (null when nothing changed) and the next
+    `cursor`. While `has_more` is true, call again with the new cursor
+    straight away; after that, keep it for the next refresh.
+    """
+    if bootstrap and since:
+        raise HTTPException(status_code=400, detail="bootstrap is only for a first sync (no cursor)")
+    since_xid, after_id = _parse_sync_cursor(since) if since else ("0", None)
+    limit = max(1, min(limit, SYNC_MAX_PAGE_SIZE))
+    if bootstrap:
+        call = lambda: _supabase().rpc("relief_records_bootstrap", {"p_recent": limit}).execute()
+    else:
+        call = lambda: _supabase().rpc("relief_records_delta", {
+            "p_since_xid": since_xid,
+            "p_after_id": after_id,
+            "p_limit": limit,
+        }).execute()
+    try:
+        res = await asyncio.get_running_loop().run_in_executor(None, call)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    delta = res.data
+    cursor = delta["next_xid"] + (f":{delta['next_id']}" if delta.get("next_id") else "")
+    return {
+        "records": delta["records"],
+        "deleted": delta["deleted"],
+        "aggregates": delta["aggregates"],
+        "cursor": cursor,
+        "has_more": delta["has_more"],
+    }
+
+
 @router.get("/get-all-records")
 async def get_all_records():
     """
@@ -1,41 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import csv
+import io
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from postgrest.exceptions import APIError
+from pydantic import ValidationError
 from app.core.security import RoleChecker, TokenData
 from app.db.supabase import get_supabase_admin
-from app.models.schemas import ReliefDistribute, AuditLogCreate, BeneficiaryCreate
-from app.services.budget_service import BudgetService
-from app.services.audit_service import log_action
+from app.models.schemas import ReliefDistribute, BeneficiaryCreate, AuditLogCreate
+from app.services.audit_service import log_action, log_actions
+from app.services.budget_ledger import budget_ledger
 
 router = APIRouter(prefix="/relief", tags=["relief"])
 
 relief_roles = ["SUPER_ADMIN", "DISTRICT_OFFICER", "DATA_ENTRY_OFFICER"]
 
+BENEFICIARY_IMPORT_MAX = 20000
+BENEFICIARY_IMPORT_CHUNK = 1000  # rows per upsert round-trip
+BENEFICIARY_IMPORT_MAX_ERRORS = 100  # invalid rows reported back in detail
+
 @router.post("/distribute")
 async def distribute_relief(data: ReliefDistribute, user: TokenData = Depends(RoleChecker(relief_roles))):
     supabase = get_supabase_admin()
-    
-    # Check budget
-    await BudgetService.check_relief_budget(data.district_allocation_id, data.amount)
-    
-    # Insert relief distribution
-    dist_data = data.dict()
-    dist_data['officer_id'] = user.user_id
-    
-    res = supabase.table("relief_distribution").insert(dist_data).execute()
+
+    # Budget check (with the district allocation locked), insert and audit
+    # row in one transaction — see migrations/distribute_relief.sql
+    try:
+        res = supabase.rpc("distribute_relief", {
+            "p_distribution": data.dict(),
+            "p_officer_id": user.user_id,
+        }).execute()
+    except APIError as e:
+        if e.code == "P0002":
+            raise HTTPException(status_code=404, detail=e.message)
+        if e.code == "P0001":
+            raise HTTPException(status_code=400, detail=e.message)
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     if not res.data:
         raise HTTPException(status_code=500, detail="Failed to record distribution")
-        
-    record = res.data[0]
-    
-    # Audit Log
-    await log_action(AuditLogCreate(
-        user_id=user.user_id,
-        action="CREATE",
-        table_name="relief_distribution",
-        record_id=record['id'],
-        new_data=record
-    ))
-    
-    return {"message": "Relief distributed successfully", "data": record}
+
+    budget_ledger.record_distribution(data.district_allocation_id, data.amount)
+
+    return {"message": "Relief distributed successfully", "data": res.data}
 
 @router.get("/by-district/{id}")
 async def get_relief_by_district(id: int, user: TokenData = Depends(RoleChecker(relief_roles))):
@@ -52,14 +59,117 @@ async def get_relief_by_district(id: int, user: TokenData = Depends(RoleChecker(
 @router.post("/beneficiary")
 async def create_beneficiary(data: BeneficiaryCreate, user: TokenData = Depends(RoleChecker(relief_roles))):
     supabase = get_supabase_admin()
-    
-    # Check if citizenship number exists (Unique constraint handled by DB, but we check for better error)
-    existing = supabase.table("beneficiary").select("id").eq("citizenship_number", data.citizenship_number).execute()
-    if existing.data:
-        raise HTTPException(status_code=400, detail="Beneficiary already registered with this citizenship number")
-        
-    res = supabase.table("beneficiary").insert(data.dict()).execute()
+
+    # One round-trip: the unique citizenship_number decides, so two officers
+    # registering the same person at once can't both get through
+    res = supabase.table("beneficiary") \
+        .upsert(data.dict(), on_conflict="citizenship_number", ignore_duplicates=True) \
+        .execute()
     if not res.data:
-        raise HTTPException(status_code=500, detail="Failed to create beneficiary")
-        
-    return res.data[0]
+        raise HTTPException(status_code=400, detail="Beneficiary already registered with this citizenship number")
+
+    beneficiary = res.data[0]
+    await log_action(AuditLogCreate(
+        user_id=user.user_id, action="CREATE", table_name="beneficiary",
+        record_id=str(beneficiary["id"]), new_data=beneficiary,
+    ))
+    return beneficiary
+
+
+def _parse_beneficiaries(body: bytes, content_type: str) -> list[dict]:
+    if "csv" in content_type:
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+        return [
+            {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+    try:
+        items = json.loads(body or b"null")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV (Content-Type: text/csv)")
+    if isinstance(items, dict):
+        items = items.get("beneficiaries")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of beneficiaries")
+    return items
+
+
+def _insert_beneficiaries(rows: list[dict], inserted: list[dict]) -> None:
+    """Upsert in chunks, skipping citizenship numbers already registered; new rows go to `inserted`."""
+    supabase = get_supabase_admin()
+    for start in range(0, len(rows), BENEFICIARY_IMPORT_CHUNK):
+        res = supabase.table("beneficiary") \
+            .upsert(rows[start:start + BENEFICIARY_IMPORT_CHUNK], on_conflict="citizenship_number", ignore_duplicates=True) \
+            .execute()
+        inserted.extend(res.data or [])
+
+
+@router.post("/beneficiary/bulk")
+async def import_beneficiaries(request: Request, user: TokenData = Depends(RoleChecker(relief_roles))):
+    """
+    Register many beneficiaries at once. The body is either a JSON array (or
+    {"beneficiaries": [...]}) or a CSV file with a header row
+    (Content-Type: text/csv) using the BeneficiaryCreate field names.
+
+    Citizenship numbers already registered — or repeated within the file —
+    are counted as duplicates, not errors. Invalid rows are reported by
+    their position (CSV: line number) and skipped.
+    """
+    content_type = request.headers.get("content-type", "")
+    items = _parse_beneficiaries(await request.body(), content_type)
+    if len(items) > BENEFICIARY_IMPORT_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BENEFICIARY_IMPORT_MAX} beneficiaries per import")
+
+    first_row = 2 if "csv" in content_type else 0  # CSV line numbers count the header
+    rows: list[dict] = []
+    seen: set[str] = set()
+    errors: list[dict] = []
+    invalid = repeated = 0
+    for i, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise TypeError("expected an object")
+            row = BeneficiaryCreate(**item).dict()
+        except (ValidationError, TypeError) as e:
+            invalid += 1
+            if len(errors) < BENEFICIARY_IMPORT_MAX_ERRORS:
+                msgs = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()] \
+                    if isinstance(e, ValidationError) else [str(e)]
+                errors.append({"row": first_row + i, "errors": msgs})
+            continue
+        row["citizenship_number"] = row["citizenship_number"].strip()
+        if not row["citizenship_number"]:
+            invalid += 1
+            if len(errors) < BENEFICIARY_IMPORT_MAX_ERRORS:
+                errors.append({"row": first_row + i, "errors": ["citizenship_number: must not be empty"]})
+            continue
+        if row["citizenship_number"] in seen:
+            repeated += 1
+            continue
+        seen.add(row["citizenship_number"])
+        rows.append(row)
+
+    inserted: list[dict] = []
+    try:
+        if rows:
+            await asyncio.get_running_loop().run_in_executor(None, _insert_beneficiaries, rows, inserted)
+    except APIError as e:
+        # Chunks before the failing one are in; re-running the import is safe
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    finally:
+        # Audit whatever was committed, including chunks before a failure
+        await log_actions([
+            AuditLogCreate(user_id=user.user_id, action="CREATE", table_name="beneficiary",
+                           record_id=str(b["id"]), new_data=b)
+            for b in inserted
+        ])
+
+    return {
+        "inserted": len(inserted),
+        "duplicates": len(rows) - len(inserted) + repeated,
+        "invalid": invalid,
+        "errors": errors,
+    }
@@ -6,18 +6,35 @@ Minimal SOS: citizen taps button → sends name + GPS → shows up on gov/provin
 Public:
   POST /sos/request        — Submit emergency (just name + location)
 
+Ops:
+  GET  /sos/intake         — Write-behind journal and duplicate-tap status
+
 Government/Province:
   GET  /sos/requests       — List all SOS alerts (filterable)
+  GET  /sos/stream         — Live new/updated SOS alerts (Server-Sent Events)
+  GET  /sos/area           — Open SOS alerts inside a bounding box
+  GET  /sos/clusters       — Open SOS alerts grouped by area
+  GET  /sos/nearest        — Pending SOS alerts closest to a response team
   PUT  /sos/request/:id    — Update status (acknowledge, dispatch, resolve)
 """
 
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+import json
+import uuid
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from app.db.supabase import get_supabase_admin
+from app.services.sos_feed import sos_feed, normalize_province, nearest_province
+from app.services.sos_intake import sos_intake, insert_sos_rows
+from app.services.sos_dedup import sos_dedup, dedup_key
+from app.services.sos_geo import sos_geo, OPEN_STATUSES
 import traceback
 
+SSE_KEEPALIVE_SECONDS = 15
+
 router = APIRouter(prefix="/sos", tags=["sos"])
 
 
@@ -32,49 +49,94 @@ class SOSRequestCreate(BaseModel):
     contact_number: Optional[str] = Field(default="N/A")
     gps_lat: Optional[float] = None
     gps_long: Optional[float] = None
+    province: Optional[str] = None  # derived from GPS when omitted
+    client_request_id: Optional[uuid.UUID] = None  # lets the app retry without duplicating
 
 
 class SOSStatusUpdate(BaseModel):
     status: str = Field(..., pattern="^(pending|acknowledged|dispatched|resolved|cancelled)$")
-    response_team: Optional[str] = None
-    notes: Optional[str] = None
+    response_team: Optional[str] = Field(default=None, max_length=200)
+    notes: Optional[str] = Field(default=None, max_length=2000)
 
 
 # ── Public: send SOS ────────────────────────────────────────────────────────
 
 @router.post("/request")
 async def create_sos_request(request: SOSRequestCreate):
-    supabase = _supabase()
-
-    try:
-        result = supabase.table("sos_requests").insert({
-            "full_name": request.full_name,
-            "contact_number": request.contact_number or "N/A",
-            "gps_lat": request.gps_lat,
-            "gps_long": request.gps_long,
-            "status": "pending",
-        }).execute()
-
-        if not result.data:
-            raise HTTPException(status_code=400, detail="Failed to create SOS request")
-
+    """
+    Accept an SOS. Normally it is journaled locally and acknowledged at once;
+    the row reaches sos_requests (and the dashboards) within
+    SOS_INTAKE_FLUSH_SECONDS. Falls back to a direct insert if the journal
+    is unavailable.
+
+    Repeat taps from the same phone and ~100 m cell within
+    SOS_DEDUP_WINDOW_SECONDS return the open request instead of a new one
+    (`duplicate: true`); its tap_count is bumped shortly after.
+    """
+    request_id = str(request.client_request_id or uuid.uuid4())
+    key = dedup_key(request.contact_number, request.gps_lat, request.gps_long)
+    merged = sos_dedup.check(key, request_id)
+    if merged:
         return {
             "success": True,
-            "message": "Emergency alert sent. Help is on the way!",
-            "request_id": result.data[0]["id"],
+            "message": "Emergency alert already received. Help is on the way!",
+            "duplicate": True,
+            **merged,
         }
 
+    row = {
+        "id": request_id,
+        "full_name": request.full_name,
+        "contact_number": request.contact_number or "N/A",
+        "gps_lat": request.gps_lat,
+        "gps_long": request.gps_long,
+        "province": normalize_province(request.province) or nearest_province(request.gps_lat, request.gps_long),
+        "status": "pending",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    response = {
+        "success": True,
+        "message": "Emergency alert sent. Help is on the way!",
+        "request_id": row["id"],
+        "duplicate": False,
+    }
+    # Opened before the write so concurrent repeat taps merge into this one
+    sos_dedup.remember(key, row["id"])
+
+    if sos_intake.enabled:
+        try:
+            await sos_intake.submit(row)
+            return {**response, "queued": True}
+        except Exception as e:
+            print(f"SOS journal error, inserting directly: {e}")
+
+    try:
+        loop = asyncio.get_running_loop()
+        # Empty when this id was already stored (a client retry)
+        inserted = await loop.run_in_executor(None, insert_sos_rows, [row])
+        for created in inserted:
+            sos_feed.publish("created", created)
+
+        return {**response, "queued": False}
+
     except Exception as e:
+        sos_dedup.forget(row["id"])
         print(f"SOS create error: {e}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/intake")
+async def get_sos_intake_status():
+    return {"success": True, **sos_intake.stats(), "dedup": sos_dedup.stats()}
+
+
 # ── Government / Province: list SOS alerts ──────────────────────────────────
 
 @router.get("/requests")
 async def get_sos_requests(
     status: Optional[str] = None,
+    province: Optional[str] = None,
     limit: int = Query(100, ge=1, le=500),
 ):
     supabase = _supabase()
@@ -84,6 +146,8 @@ async def get_sos_requests(
 
         if status:
             query = query.eq("status", status)
+        if province:
+            query = query.eq("province", normalize_province(province) or province)
 
         query = query.order("created_at", desc=True).limit(limit)
         result = query.execute()
@@ -100,6 +164,122 @@ async def get_sos_requests(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ── Government / Province: spatial dispatch views ───────────────────────────
+
+def _statuses(status: Optional[str], default: Optional[tuple] = None) -> Optional[tuple]:
+    if not status:
+        return default
+    statuses = tuple(s.strip() for s in status.split(",") if s.strip())
+    unknown = [s for s in statuses if s not in OPEN_STATUSES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only open statuses are indexed ({', '.join(OPEN_STATUSES)}); got {', '.join(unknown)}",
+        )
+    return statuses
+
+
+def _bbox(min_lat, min_lng, max_lat, max_lng) -> Optional[tuple]:
+    values = (min_lat, min_lng, max_lat, max_lng)
+    if all(v is None for v in values):
+        return None
+    if any(v is None for v in values):
+        raise HTTPException(status_code=400, detail="min_lat, min_lng, max_lat and max_lng go together")
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Bounding box min must not exceed max")
+    return values
+
+
+@router.get("/area")
+async def get_sos_in_area(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    status: Optional[str] = Query(None, description="Comma-separated open statuses (default: all open)"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """Open SOS alerts inside a bounding box, oldest first (served from the geo index)."""
+    rows = sos_geo.in_bbox(*_bbox(min_lat, min_lng, max_lat, max_lng), _statuses(status))
+    return {"success": True, "total": len(rows), "count": min(len(rows), limit), "requests": rows[:limit]}
+
+
+@router.get("/clusters")
+async def get_sos_clusters(
+    cell_km: float = Query(5.0, gt=0, le=200, description="Cluster cell size in km"),
+    status: Optional[str] = Query(None, description="Comma-separated open statuses (default: all open)"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lng: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lng: Optional[float] = Query(None, ge=-180, le=180),
+):
+    """Open SOS alerts grouped into ~cell_km squares, busiest area first."""
+    clusters = sos_geo.clusters(
+        cell_km / 111.32,
+        _statuses(status),
+        _bbox(min_lat, min_lng, max_lat, max_lng),
+    )
+    return {
+        "success": True,
+        "count": len(clusters),
+        "total_requests": sum(c["count"] for c in clusters),
+        "clusters": clusters,
+    }
+
+
+@router.get("/nearest")
+async def get_nearest_sos(
+    lat: float = Query(..., ge=-90, le=90, description="Response team latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Response team longitude"),
+    limit: int = Query(10, ge=1, le=200),
+    radius_km: Optional[float] = Query(None, gt=0),
+    status: Optional[str] = Query("pending", description="Comma-separated open statuses"),
+):
+    """Open SOS alerts closest to a response team, nearest first, with distance_km."""
+    rows = sos_geo.nearest(lat, lng, limit, radius_km, _statuses(status, OPEN_STATUSES))
+    return {"success": True, "count": len(rows), "requests": rows}
+
+
+# ── Government / Province: live stream ─────────────────────────────────────
+
+def _sse(event: dict) -> str:
+    return f"id: {sos_feed.sse_id(event)}\nevent: {event['type']}\ndata: {json.dumps(event.get('request'), default=str)}\n\n"
+
+
+@router.get("/stream")
+async def stream_sos_requests(request: Request, province: Optional[str] = None):
+    """
+    Server-Sent Events feed of SOS changes, pushed as soon as they commit.
+
+    Events: `created` / `updated` (data = the full sos_requests row) and
+    `resync` (the client fell behind or the feed reconnected — refetch
+    GET /sos/requests). Pass `province` to only receive that province.
+    Reconnecting EventSources resume from their Last-Event-ID.
+    """
+    province_filter = normalize_province(province) or province
+    last_event_id = request.headers.get("last-event-id")
+    sub = sos_feed.subscribe(province_filter, last_event_id)
+
+    async def events():
+        try:
+            yield f"retry: 3000\n: subscribed to {province_filter or 'all provinces'}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            sos_feed.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── Government / Province: update SOS status ────────────────────────────────
 
 @router.put("/request/{request_id}")
@@ -131,6 +311,10 @@ async def update_sos_request(request_id: str, update: SOSStatusUpdate):
         if not result.data:
             raise HTTPException(status_code=404, detail="SOS request not found")
 
+        sos_feed.publish("updated", result.data[0])
+        if update.status in ("resolved", "cancelled"):
+            sos_dedup.forget(request_id)
+
         return {
             "success": True,
             "request": result.data[0],
@@ -12,5 +12,11 @@ class Settings:
     JWT_SECRET: str = os.getenv("JWT_SECRET", "supersecretkey")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
+    # Password hashing: pbkdf2_sha256 cost, and the pool it runs in off the event loop
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 29000))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+    # Verified JWTs kept in memory (until their exp) so hot dashboards skip re-verification
+    JWT_CACHE_SIZE: int = int(os.getenv("JWT_CACHE_SIZE", 4096))
 
 settings = Settings()
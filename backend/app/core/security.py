@@ -1,14 +1,26 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, List
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.db.supabase import get_supabase
+from app.services.rbac_scope import district_scope
 from pydantic import BaseModel
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    # Hashes below the configured cost are re-hashed on the next login
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 class TokenData(BaseModel):
@@ -24,6 +36,62 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# pbkdf2 runs inside OpenSSL (hashlib), which releases the GIL, so a small
+# thread pool keeps it off the event loop. Past PASSWORD_HASH_MAX_PENDING
+# queued jobs, logins are shed with a 503 instead of queueing behind each
+# other while SOS and dashboard requests wait.
+_password_pool: Optional[ThreadPoolExecutor] = None
+_password_pending = 0
+_password_rejected = 0
+
+def _get_password_pool() -> ThreadPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return _password_pool
+
+def shutdown_password_pool():
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
+
+def password_pool_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "rounds": settings.PASSWORD_HASH_ROUNDS,
+        "pending": _password_pending,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "rejected": _password_rejected,
+    }
+
+async def _run_password_job(fn, *args):
+    global _password_pending, _password_rejected
+    if _password_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        _password_rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _password_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_password_pool(), fn, *args)
+    finally:
+        _password_pending -= 1
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password, hashed_password) -> tuple[bool, Optional[str]]:
+    """(verified, new hash if the stored one is below the current cost)."""
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    return await _run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -34,12 +102,54 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# Verified tokens: sha256(token) -> (TokenData, exp as a unix timestamp).
+# Only tokens that passed full verification are stored, and an entry is
+# never served past the token's own exp, so a hit is exactly as valid as a
+# fresh jwt.decode. Keyed by digest so raw tokens are not kept in memory.
+_token_cache: "OrderedDict[bytes, tuple[TokenData, float]]" = OrderedDict()
+_token_cache_hits = 0
+_token_cache_misses = 0
+
+def _cached_token(key: bytes) -> Optional[TokenData]:
+    global _token_cache_hits, _token_cache_misses
+    entry = _token_cache.get(key)
+    if entry is not None:
+        token_data, expires_at = entry
+        if time.time() < expires_at:
+            _token_cache.move_to_end(key)
+            _token_cache_hits += 1
+            return token_data.model_copy()
+        del _token_cache[key]
+    _token_cache_misses += 1
+    return None
+
+def _cache_token(key: bytes, token_data: TokenData, expires_at) -> None:
+    if settings.JWT_CACHE_SIZE <= 0 or not isinstance(expires_at, (int, float)):
+        return
+    _token_cache[key] = (token_data, float(expires_at))
+    _token_cache.move_to_end(key)
+    while len(_token_cache) > settings.JWT_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+
+def token_cache_stats() -> dict:
+    return {
+        "size": len(_token_cache),
+        "max_size": settings.JWT_CACHE_SIZE,
+        "hits": _token_cache_hits,
+        "misses": _token_cache_misses,
+    }
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = _cached_token(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
@@ -59,17 +169,45 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         )
     except JWTError:
         raise credentials_exception
-    
+
+    _cache_token(cache_key, token_data, payload.get("exp"))
     return token_data
 
 class RoleChecker:
-    def __init__(self, allowed_roles: List[str]):
+    """
+    Role check, plus an optional scope check on a path parameter:
+    `province_param` / `district_param` name the parameter holding the
+    province / district id the route is about.
+    """
+    def __init__(self, allowed_roles: List[str], province_param: Optional[str] = None, district_param: Optional[str] = None):
         self.allowed_roles = allowed_roles
+        self.province_param = province_param
+        self.district_param = district_param
 
-    def __call__(self, user: TokenData = Depends(get_current_user)):
+    async def __call__(self, request: Request, user: TokenData = Depends(get_current_user)):
         if user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have enough permissions to access this resource"
             )
+        if self.province_param and not self.can_access_province(user, int(request.path_params[self.province_param])):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this province")
+        if self.district_param and not await self.can_access_district(user, int(request.path_params[self.district_param])):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied to this district")
         return user
+
+    @staticmethod
+    def can_access_province(user: TokenData, province_id: int) -> bool:
+        # Province admins only see their own province
+        return user.role != "PROVINCE_ADMIN" or user.province_id == province_id
+
+    @staticmethod
+    async def can_access_district(user: TokenData, district_id: int) -> bool:
+        # District officers only see their own district; province admins the
+        # districts allocated under their province (from the in-memory map)
+        if user.role == "DISTRICT_OFFICER":
+            return user.district_id == district_id
+        if user.role == "PROVINCE_ADMIN":
+            province_id = await district_scope.province_of(district_id)
+            return province_id is None or province_id == user.province_id
+        return True
@@ -10,22 +10,70 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, dashboard, relief, public, records, predictions, predictions_neon, government, sos, blockchain
+from app.api import auth, dashboard, relief, public, records, predictions, predictions_neon, government, sos, blockchain, budget
 from app.core.config import settings
+from app.core.security import shutdown_password_pool
 from app.db.neon import init_neon_pool, close_neon_pool
+from app.services.anchor_queue import anchor_queue, anchor_jobs
+from app.services.blockchain_service import solana_rpc, shutdown_verify_pool
+from app.services.record_ledger import ledger_checkpointer
+from app.services.sos_feed import sos_feed
+from app.services.sos_intake import sos_intake
+from app.services.sos_dedup import sos_dedup
+from app.services.sos_geo import sos_geo
+from app.services.rbac_scope import district_scope
+from app.services.budget_ledger import budget_ledger
+from app.services.audit_service import audit_writer
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan handler.
-    - Startup:  initialise the asyncpg connection pool so the first request
-                does not pay the cold-connection penalty.
-    - Shutdown: gracefully drain and close the pool.
+    - Startup:  start the audit-log writer (replaying its spill journal),
+                initialise the asyncpg connection pool so the first request
+                does not pay the cold-connection penalty, load the RBAC
+                district→province map and the budget ledger, warm the
+                shared Solana RPC client
+                and start the background anchoring worker,
+                the anchor-all job runner, the ledger checkpointer, the
+                SOS live feed, the SOS write-behind writer (which first
+                replays anything left in its journal), the SOS tap-count
+                flusher and the SOS geo index.
+    - Shutdown: flush journaled SOS requests (whatever the database does not
+                take stays journaled for the next start) and then their
+                merged tap counts, let in-flight anchor batches finish, then
+                close the RPC client, the bulk-verify process pool and the
+                password-hashing pool, then drain and close the Neon pool and
+                finally drain the audit-log queue.
     """
+    await audit_writer.start()
     await init_neon_pool()
+    await district_scope.start()
+    await budget_ledger.start()
+    await solana_rpc.start()
+    await anchor_queue.start()
+    await anchor_jobs.start()
+    await ledger_checkpointer.start()
+    await sos_feed.start()
+    await sos_intake.start()
+    await sos_dedup.start()
+    await sos_geo.start()
     yield
+    await sos_geo.stop()
+    await sos_intake.stop()
+    await sos_dedup.stop()
+    await sos_feed.stop()
+    await ledger_checkpointer.stop()
+    await anchor_jobs.stop()
+    await anchor_queue.stop()
+    await solana_rpc.close()
+    shutdown_verify_pool()
+    shutdown_password_pool()
+    await budget_ledger.stop()
+    await district_scope.stop()
     await close_neon_pool()
+    await audit_writer.stop()
 
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
@@ -52,6 +100,7 @@ async def health():
 # Routers
 app.include_router(auth.router)
 app.include_router(dashboard.router)
+app.include_router(budget.router)  # Budget allocations (in-memory ledger)
 app.include_router(relief.router)
 app.include_router(public.router)
 app.include_router(records.router)
@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
+import uuid
 
 class UserRole(str, Enum):
     SUPER_ADMIN = "SUPER_ADMIN"
@@ -75,7 +76,7 @@ class BeneficiaryCreate(BaseModel):
 
 # Audit Schema
 class AuditLogCreate(BaseModel):
-    user_id: str
+    user_id: Optional[str] = None  # None for unauthenticated writes (e.g. POST /records)
     action: str
     table_name: str
     record_id: str
@@ -95,6 +96,15 @@ class ReliefRecordCreate(BaseModel):
     officer_id: str
 
 
+class ReliefRecordBulkItem(ReliefRecordCreate):
+    client_record_id: Optional[uuid.UUID] = None  # becomes the record id, so a resent batch is not duplicated
+
+
+class ReliefRecordBulkCreate(BaseModel):
+    """Items are validated one by one so a bad item doesn't reject the batch."""
+    records: list[dict] = Field(min_length=1, max_length=1000)
+
+
 class ReliefRecordOut(BaseModel):
     id: str
     full_name: str
@@ -109,6 +119,20 @@ class ReliefRecordOut(BaseModel):
     updated_at: Optional[datetime] = None
     solana_tx_signature: Optional[str] = None
     record_hash: Optional[str] = None
+    merkle_root: Optional[str] = None
+    merkle_proof: Optional[list[dict]] = None
+
+
+class BulkVerifyRequest(BaseModel):
+    """Either explicit record ids or a filter; an empty body audits the whole table."""
+    ids: Optional[list[str]] = Field(default=None, max_length=50000)
+    province: Optional[str] = None
+    district: Optional[str] = None
+    disaster_type: Optional[str] = None
+    officer_id: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    anchored_only: bool = False
 
 
 # Wildfire Prediction Schemas
@@ -0,0 +1,548 @@
+"""
+Durable Background Anchoring Queue
+==================================
+Replaces the per-insert anchoring thread with a persistent work queue.
+
+- New relief_records are enqueued in `pending_anchors` by a DB trigger
+  (see migrations/anchor_queue.sql), so a restart never loses work.
+- One asyncio worker per process claims due batches (leased with
+  FOR UPDATE SKIP LOCKED), anchors each batch as a single Merkle root and
+  writes the results back in one RPC call.
+- At most ANCHOR_QUEUE_CONCURRENCY batches are in flight; failed batches are
+  released with exponential backoff and retried.
+- A batch that is on chain but can't be written back is never released (that
+  would pay for a second transaction): the write is retried, then journaled
+  locally (var/anchor_journal) and re-applied before the next claim.
+- Depth and lag come from the `anchor_queue_stats` view; the worker's own
+  counters are exposed by `anchor_queue.stats()`.
+
+Anchor-all jobs (see migrations/anchor_jobs.sql)
+- `create_anchor_job()` tags the whole un-anchored backlog with a job id;
+  the general worker leaves tagged rows alone.
+- `anchor_jobs` (one runner per process) leases a job by heartbeat and drains
+  its rows with a dedicated worker at the job's own concurrency, recording
+  progress on the job row after every batch.
+- A job whose heartbeat goes stale (process died / restarted) is picked up
+  again by whichever runner polls next.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+from app.services.blockchain_service import anchor_batch, MERKLE_BATCH_SIZE
+from app.services.journal import Journal, VAR_DIR
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_QUEUE_BATCH_SIZE = int(os.getenv("ANCHOR_QUEUE_BATCH_SIZE", str(MERKLE_BATCH_SIZE)))
+ANCHOR_QUEUE_CONCURRENCY = int(os.getenv("ANCHOR_QUEUE_CONCURRENCY", "2"))
+ANCHOR_QUEUE_POLL_SECONDS = float(os.getenv("ANCHOR_QUEUE_POLL_SECONDS", "5"))
+ANCHOR_QUEUE_LEASE_SECONDS = int(os.getenv("ANCHOR_QUEUE_LEASE_SECONDS", "120"))
+ANCHOR_QUEUE_BACKOFF_SECONDS = int(os.getenv("ANCHOR_QUEUE_BACKOFF_SECONDS", "10"))
+ANCHOR_SAVE_ATTEMPTS = int(os.getenv("ANCHOR_SAVE_ATTEMPTS", "4"))
+ANCHOR_JOURNAL_DIR = os.getenv("ANCHOR_JOURNAL_DIR", os.path.join(VAR_DIR, "anchor_journal"))
+
+ANCHOR_JOB_CONCURRENCY = int(os.getenv("ANCHOR_JOB_CONCURRENCY", "4"))
+ANCHOR_JOB_MAX_CONCURRENCY = 16
+ANCHOR_JOB_MAX_ATTEMPTS = int(os.getenv("ANCHOR_JOB_MAX_ATTEMPTS", "5"))
+ANCHOR_JOB_STALE_SECONDS = int(os.getenv("ANCHOR_JOB_STALE_SECONDS", "60"))
+
+
+def save_anchors(supabase, results: list[dict]) -> list[str]:
+    """
+    Persist tx signature, hash, root and proof for an anchored batch in one
+    RPC call; this also removes the records from the pending queue. Returns
+    the ids written — a record that already had a signature keeps it.
+    """
+    anchors = [
+        {
+            "id": r["id"],
+            "tx_signature": r["tx_signature"],
+            "record_hash": r["hash"],
+            "merkle_root": r["merkle_root"],
+            "merkle_proof": r["merkle_proof"],
+        }
+        for r in results if r["success"]
+    ]
+    if not anchors:
+        return []
+    res = supabase.rpc("apply_record_anchors", {"anchors": anchors}).execute()
+    return [str(record_id) for record_id in res.data or []]
+
+
+def claim_pending_anchor(record_id: str, lease_seconds: int = ANCHOR_QUEUE_LEASE_SECONDS) -> bool:
+    """Lease one un-anchored record outside the workers; False if a worker holds it (or it is anchored)."""
+    res = get_supabase_admin().rpc("claim_pending_anchor", {
+        "p_record_id": record_id,
+        "lease_seconds": lease_seconds,
+    }).execute()
+    return bool(res.data)
+
+
+def release_pending_anchors(record_ids: list[str], error: str) -> None:
+    """Give leased records back to the queue with backoff."""
+    get_supabase_admin().rpc("release_pending_anchors", {
+        "record_ids": record_ids,
+        "error": error[:500],
+        "base_seconds": ANCHOR_QUEUE_BACKOFF_SECONDS,
+    }).execute()
+
+
+def get_queue_depth() -> dict:
+    """Depth / lag snapshot from the anchor_queue_stats view."""
+    res = get_supabase_admin().table("anchor_queue_stats").select("*").execute()
+    return res.data[0] if res.data else {}
+
+
+def create_anchor_job(concurrency: int = ANCHOR_JOB_CONCURRENCY) -> dict:
+    """Create an anchor-all job over every record without a tx signature."""
+    res = get_supabase_admin().rpc("create_anchor_job", {"p_concurrency": concurrency}).execute()
+    return res.data[0]
+
+
+def get_anchor_job(job_id: str) -> Optional[dict]:
+    res = get_supabase_admin().table("anchor_jobs").select("*").eq("id", job_id).execute()
+    return res.data[0] if res.data else None
+
+
+def list_anchor_jobs(limit: int = 20) -> list[dict]:
+    res = get_supabase_admin().table("anchor_jobs") \
+        .select("*") \
+        .order("created_at", desc=True) \
+        .limit(limit) \
+        .execute()
+    return res.data or []
+
+
+def record_job_progress(job_id: str, anchored: int = 0, transactions: int = 0) -> dict:
+    """
+    Add a batch outcome to a job (zeros = heartbeat only). Also retires rows
+    that ran out of attempts and marks the job completed when none remain.
+    """
+    res = get_supabase_admin().rpc("record_anchor_job_progress", {
+        "p_job_id": job_id,
+        "p_anchored": anchored,
+        "p_transactions": transactions,
+        "p_max_attempts": ANCHOR_JOB_MAX_ATTEMPTS,
+    }).execute()
+    return res.data[0] if res.data else {}
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def describe_job(job: dict) -> dict:
+    """Job row plus derived progress, throughput and ETA."""
+    total = job.get("total") or 0
+    done = (job.get("anchored") or 0) + (job.get("failed") or 0)
+    started = _parse_ts(job.get("started_at"))
+    finished = _parse_ts(job.get("finished_at"))
+
+    elapsed = None
+    throughput = None
+    eta = None
+    if started:
+        elapsed = ((finished or datetime.now(timezone.utc)) - started).total_seconds()
+        if elapsed > 0:
+            throughput = round((job.get("anchored") or 0) / elapsed, 2)
+        if throughput and job.get("status") != "completed":
+            eta = round((total - done) / throughput, 1)
+
+    return {
+        **job,
+        "remaining": max(total - done, 0),
+        "progress_percent": round(done / total * 100, 1) if total else 100.0,
+        "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+        "records_per_second": throughput,
+        "eta_seconds": eta,
+    }
+
+
+class PendingAnchorSaves:
+    """
+    Anchors that are on chain but could not be written back to the database,
+    kept in a local journal until apply_record_anchors() takes them.
+    """
+
+    def __init__(self, directory: str = ANCHOR_JOURNAL_DIR):
+        self.directory = directory
+        self.journal: Optional[Journal] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        with self._lock:
+            if self.journal is None:
+                self.journal = Journal(self.directory, "anchor_journal")
+
+    def close(self) -> None:
+        with self._lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+
+    def add(self, anchored: list[dict]) -> None:
+        self.journal.append(anchored)
+
+    def flush(self) -> int:
+        """Write journaled anchors to the DB; returns how many were applied."""
+        with self._lock:
+            if self.journal is None:
+                return 0
+            entries = self.journal.replay()
+            for start in range(0, len(entries), ANCHOR_QUEUE_BATCH_SIZE):
+                chunk = entries[start:start + ANCHOR_QUEUE_BATCH_SIZE]
+                save_anchors(get_supabase_admin(), [row for row, _ in chunk])
+                self.journal.commit(chunk[-1][1])
+            return len(entries)
+
+
+class AnchorQueueWorker:
+    """
+    Asyncio worker that drains `pending_anchors` in Merkle batches.
+    With `job_id` set it only claims that anchor-all job's rows.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = ANCHOR_QUEUE_BATCH_SIZE,
+        concurrency: int = ANCHOR_QUEUE_CONCURRENCY,
+        poll_seconds: float = ANCHOR_QUEUE_POLL_SECONDS,
+        lease_seconds: int = ANCHOR_QUEUE_LEASE_SECONDS,
+        job_id: Optional[str] = None,
+    ):
+        self.job_id = job_id
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+        self._anchored = 0
+        self._failed = 0
+        self._transactions = 0
+        self._journaled = 0
+        self._unreported = [0, 0]  # job progress (anchored, transactions) not yet recorded
+        self._last_batch_at: Optional[str] = None
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Start the worker loop. Called once from the FastAPI lifespan."""
+        if self._runner is not None:
+            return
+        # Blocking Supabase calls run here, off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency + 1)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._wake = asyncio.Event()
+        await self._call(pending_saves.open)
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop claiming new batches and wait for in-flight ones to finish.
+        Anything not finished keeps its lease and is re-claimed after expiry.
+        """
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        if self._in_flight:
+            await asyncio.wait(self._in_flight, timeout=self.lease_seconds)
+        if self.job_id and any(self._unreported):
+            await self._report_progress(0, 0)
+        if self.job_id is None:
+            await self._call(pending_saves.close)
+        self._executor.shutdown(wait=False)
+        self._runner = None
+
+    def notify(self) -> None:
+        """Wake the worker early (e.g. right after a record was inserted)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._runner is not None and not self._runner.done(),
+            "job_id": self.job_id,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "in_flight_batches": len(self._in_flight),
+            "anchored": self._anchored,
+            "failed": self._failed,
+            "transactions": self._transactions,
+            "journaled": self._journaled,
+            "last_batch_at": self._last_batch_at,
+            "last_error": self._last_error,
+        }
+
+    # ── worker loop ──────────────────────────────────────────────────────────
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    def _claim(self) -> list[dict]:
+        res = get_supabase_admin().rpc("claim_pending_anchors", {
+            "batch_size": self.batch_size,
+            "lease_seconds": self.lease_seconds,
+            "p_job_id": self.job_id,
+        }).execute()
+        return res.data or []
+
+    def _release(self, record_ids: list[str], error: str) -> None:
+        release_pending_anchors(record_ids, error)
+
+    async def _run(self) -> None:
+        while True:
+            if self.job_id is None:
+                # Anchors already paid for go in before any new work
+                try:
+                    applied = await self._call(pending_saves.flush)
+                    if applied:
+                        logger.info("Applied %d journaled anchors", applied)
+                except Exception as e:
+                    self._last_error = f"journaled anchors not applied: {e}"
+                    logger.warning("Applying journaled anchors failed: %s", e)
+                    await self._idle()
+                    continue
+
+            await self._slots.acquire()
+            try:
+                records = await self._call(self._claim)
+            except Exception as e:
+                self._slots.release()
+                self._last_error = f"claim failed: {e}"
+                logger.warning("Anchor queue claim failed: %s", e)
+                await self._idle()
+                continue
+
+            if not records:
+                self._slots.release()
+                await self._idle()
+                continue
+
+            task = asyncio.create_task(self._process(records))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, records: list[dict]) -> None:
+        started = time.perf_counter()
+        try:
+            try:
+                results = await anchor_batch(records)
+            except Exception as e:
+                await self._release_failed([str(r["id"]) for r in records], e)
+                return
+
+            anchored = [r for r in results if r["success"]]
+            if anchored:
+                await self._save(anchored)
+                transactions = len({r["tx_signature"] for r in anchored})
+                self._anchored += len(anchored)
+                self._transactions += transactions
+                if self.job_id:
+                    await self._report_progress(len(anchored), transactions)
+                self._last_batch_at = datetime.utcnow().isoformat()
+                logger.info(
+                    "Anchored %d queued records in %.2fs",
+                    len(anchored), time.perf_counter() - started,
+                )
+            failed = [r["id"] for r in results if not r["success"]]
+            if failed:
+                await self._release_failed(failed, RuntimeError("Solana transaction failed"))
+        finally:
+            self._slots.release()
+
+    async def _release_failed(self, record_ids: list[str], error: Exception) -> None:
+        self._failed += len(record_ids)
+        self._last_error = str(error)
+        logger.warning("Anchor batch of %d failed, releasing for retry: %s", len(record_ids), error)
+        try:
+            await self._call(self._release, record_ids, str(error))
+        except Exception as release_error:
+            # Lease expiry will make the batch claimable again
+            logger.warning("Anchor queue release failed: %s", release_error)
+
+    async def _save(self, anchored: list[dict]) -> None:
+        """
+        Write an on-chain batch back, retrying with backoff; if the database
+        stays unreachable, journal it for _run() to apply later.
+        """
+        for attempt in range(ANCHOR_SAVE_ATTEMPTS):
+            try:
+                applied = await self._call(save_anchors, get_supabase_admin(), anchored)
+                if len(applied) < len(anchored):
+                    # Re-claimed after the lease ran out and anchored elsewhere first
+                    logger.warning("%d of %d anchored records already had a signature; kept theirs",
+                                   len(anchored) - len(applied), len(anchored))
+                return
+            except Exception as e:
+                error = e
+                if attempt + 1 < ANCHOR_SAVE_ATTEMPTS:
+                    await asyncio.sleep(2 ** attempt)
+        self._last_error = f"save failed: {error}"
+        try:
+            await self._call(pending_saves.add, anchored)
+        except Exception as journal_error:
+            # Nothing left to try: the lease expires and the batch is re-anchored
+            logger.error("Could not save or journal %d anchors: %s / %s", len(anchored), error, journal_error)
+            return
+        self._journaled += len(anchored)
+        logger.warning("Could not save %d anchors, journaled for retry: %s", len(anchored), error)
+
+    async def _report_progress(self, anchored: int, transactions: int) -> None:
+        """Record a batch on the job row; counts from failed updates ride along with the next one."""
+        anchored += self._unreported[0]
+        transactions += self._unreported[1]
+        self._unreported = [0, 0]
+        try:
+            await self._call(record_job_progress, self.job_id, anchored, transactions)
+        except Exception as e:
+            self._unreported[0] += anchored
+            self._unreported[1] += transactions
+            self._last_error = f"job progress update failed: {e}"
+            logger.warning("Anchor job progress update failed: %s", e)
+
+
+class AnchorJobRunner:
+    """
+    Leases anchor-all jobs one at a time and drains each with its own
+    AnchorQueueWorker. Heartbeats every poll so other processes can tell a
+    live job from an orphaned one.
+    """
+
+    def __init__(
+        self,
+        poll_seconds: float = ANCHOR_QUEUE_POLL_SECONDS,
+        stale_seconds: int = ANCHOR_JOB_STALE_SECONDS,
+    ):
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._job_id: Optional[str] = None
+        self._worker: Optional[AnchorQueueWorker] = None
+        self._last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._wake = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the current job's worker. The job stays `running`; once its
+        heartbeat is stale another runner (or this one after restart) resumes it.
+        """
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=False)
+        self._runner = None
+
+    def notify(self) -> None:
+        """Look for a new job right away instead of at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": self._runner is not None and not self._runner.done(),
+            "current_job_id": self._job_id,
+            "current_job_worker": self._worker.stats() if self._worker else None,
+            "last_error": self._last_error,
+        }
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _claim_job(self) -> Optional[dict]:
+        res = get_supabase_admin().rpc("claim_anchor_job", {
+            "p_worker_id": self.worker_id,
+            "p_stale_seconds": self.stale_seconds,
+        }).execute()
+        return res.data[0] if res.data else None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await self._call(self._claim_job)
+            except Exception as e:
+                job = None
+                self._last_error = f"job claim failed: {e}"
+                logger.warning("Anchor job claim failed: %s", e)
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            await self._drain(job)
+
+    async def _drain(self, job: dict) -> None:
+        concurrency = max(1, min(job.get("concurrency") or ANCHOR_JOB_CONCURRENCY, ANCHOR_JOB_MAX_CONCURRENCY))
+        logger.info("Running anchor job %s (%d records, concurrency %d)", job["id"], job["total"], concurrency)
+
+        self._job_id = job["id"]
+        self._worker = AnchorQueueWorker(concurrency=concurrency, job_id=job["id"])
+        await self._worker.start()
+        try:
+            while True:
+                await asyncio.sleep(self.poll_seconds)
+                try:
+                    state = await self._call(record_job_progress, job["id"])
+                except Exception as e:
+                    self._last_error = f"job heartbeat failed: {e}"
+                    logger.warning("Anchor job heartbeat failed: %s", e)
+                    continue
+                if not state or state.get("status") == "completed":
+                    logger.info("Anchor job %s finished", job["id"])
+                    break
+        finally:
+            await self._worker.stop()
+            self._worker = None
+            self._job_id = None
+
+
+pending_saves = PendingAnchorSaves()
+anchor_queue = AnchorQueueWorker()
+anchor_jobs = AnchorJobRunner()
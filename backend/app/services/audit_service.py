@@ -1,14 +1,296 @@
+"""
+Audit Log Writer
+================
+log_action() no longer inserts into `audit_log` on the request path.
+
+- An entry is given its id and timestamp up front and appended to a local
+  spill journal (services/journal.py). log_action() returns once it is
+  fsync'ed — entries that arrive together share one fsync.
+- A background writer inserts journaled entries in multi-row batches when
+  AUDIT_BATCH_SIZE entries are waiting or every AUDIT_FLUSH_SECONDS,
+  whichever comes first (upsert on id, so a replayed batch never duplicates
+  rows). Failed batches are retried with backoff; a row the database
+  rejects outright (e.g. unknown user_id) is logged and dropped instead of
+  blocking the rest.
+- On startup everything left in the journal is replayed; on shutdown the
+  queue is drained.
+
+log_actions() submits many entries at once (bulk endpoints). Callers: the
+/budget allocations, beneficiary registration and bulk import, and
+POST /records/bulk. Relief distribution is audited inside the
+distribute_relief() RPC, in the same transaction.
+
+AUDIT_WRITER_MODE=direct restores the old synchronous insert.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
 from app.db.supabase import get_supabase_admin
 from app.models.schemas import AuditLogCreate
+from app.services.journal import Journal, VAR_DIR
+
+logger = logging.getLogger(__name__)
+
+AUDIT_WRITER_MODE = os.getenv("AUDIT_WRITER_MODE", "buffered")  # buffered | direct
+AUDIT_JOURNAL_DIR = os.getenv("AUDIT_JOURNAL_DIR", os.path.join(VAR_DIR, "audit_journal"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0"))
+AUDIT_MAX_BACKOFF_SECONDS = 60
+
+
+def insert_audit_rows(rows: list[dict]) -> None:
+    """Insert (or skip already-written) audit rows in one round-trip."""
+    get_supabase_admin().table("audit_log") \
+        .upsert(rows, on_conflict="id", ignore_duplicates=True, returning=ReturnMethod.minimal) \
+        .execute()
+
+
+def _is_data_error(e: APIError) -> bool:
+    # Class 22 (data exception) / 23 (integrity violation): retrying won't help
+    return bool(e.code) and e.code[:2] in ("22", "23")
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        journal_dir: str = AUDIT_JOURNAL_DIR,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_seconds: float = AUDIT_FLUSH_SECONDS,
+    ):
+        self.journal_dir = journal_dir
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self.journal: Optional[Journal] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._incoming: list[tuple[dict, asyncio.Future]] = []
+        self._incoming_ready: Optional[asyncio.Event] = None
+        self._pending: deque = deque()  # (row, end offset), in journal order
+        self._wake: Optional[asyncio.Event] = None
+        self._journaler: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self._accepted = 0
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._replayed = 0
+        self._last_write_at: Optional[str] = None
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None and not self._closing
+
+    async def start(self) -> None:
+        if AUDIT_WRITER_MODE != "buffered" or self._writer is not None:
+            return
+        loop = asyncio.get_running_loop()
+        # One thread for journal fsyncs, one for Supabase inserts
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self.journal = await loop.run_in_executor(self._executor, Journal, self.journal_dir, "audit_journal")
+        self._pending.extend(await loop.run_in_executor(self._executor, self.journal.replay))
+        self._replayed = len(self._pending)
+        if self._replayed:
+            logger.warning("Replaying %d journaled audit entries from %s", self._replayed, self.journal.path)
+
+        self._incoming_ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._journaler = asyncio.create_task(self._journal_loop())
+        self._writer = asyncio.create_task(self._write_loop())
 
-async def log_action(log_data: AuditLogCreate):
-    supabase = get_supabase_admin()
-    data = {
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Journal whatever is still queued, then try to write everything out.
+        Whatever the database does not take in time stays journaled.
+        """
+        if self._writer is None:
+            return
+        # New entries go straight to the database from here on; let the
+        # journaler finish what is already queued
+        self._closing = True
+        self._incoming_ready.set()
+        await self._journaler
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        try:
+            await asyncio.wait_for(self._flush_all(), timeout=timeout)
+        except Exception as e:
+            logger.warning("Audit writer shutdown left %d entries in the journal: %s", len(self._pending), e)
+        self.journal.close()
+        self._executor.shutdown(wait=False)
+        self._writer = self._journaler = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": "buffered" if self.enabled else "direct",
+            "journal": self.journal.path if self.journal else None,
+            "accepted": self._accepted,
+            "written": self._written,
+            "dropped": self._dropped,
+            "batches": self._batches,
+            "replayed_on_start": self._replayed,
+            "pending": len(self._pending) + len(self._incoming),
+            "last_write_at": self._last_write_at,
+            "last_error": self._last_error,
+        }
+
+    # ── intake ───────────────────────────────────────────────────────────────
+
+    async def submit(self, row: dict) -> None:
+        """Queue a fully built audit_log row; returns once it is journaled."""
+        future = asyncio.get_running_loop().create_future()
+        self._incoming.append((row, future))
+        self._incoming_ready.set()
+        await future
+        self._accepted += 1
+
+    async def _journal_batch(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            ends = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.journal.append, [row for row, _ in batch],
+            )
+        except Exception as e:
+            self._last_error = f"journal write failed: {e}"
+            logger.error("Audit journal write failed: %s", e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (row, future), end in zip(batch, ends):
+            self._pending.append((row, end))
+            if not future.done():
+                future.set_result(end)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def _journal_loop(self) -> None:
+        while True:
+            await self._incoming_ready.wait()
+            self._incoming_ready.clear()
+            batch, self._incoming = self._incoming, []
+            if batch:
+                await self._journal_batch(batch)
+            if self._closing and not self._incoming:
+                return
+
+    # ── write-behind ─────────────────────────────────────────────────────────
+
+    def _insert(self, rows: list[dict]) -> int:
+        """Insert a batch; on a data error fall back to row-by-row and drop the bad rows."""
+        try:
+            insert_audit_rows(rows)
+            return 0
+        except APIError as e:
+            if not _is_data_error(e):
+                raise
+        dropped = 0
+        for row in rows:
+            try:
+                insert_audit_rows([row])
+            except APIError as e:
+                if not _is_data_error(e):
+                    raise
+                dropped += 1
+                logger.error("Dropping audit entry %s rejected by the database: %s", row["id"], e.message)
+        return dropped
+
+    async def _write_batch(self) -> int:
+        """Insert the oldest pending batch; returns how many were taken off the queue."""
+        if not self._pending:
+            return 0
+        loop = asyncio.get_running_loop()
+        batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+        started = time.perf_counter()
+        dropped = await loop.run_in_executor(self._executor, self._insert, [row for row, _ in batch])
+
+        for _ in batch:
+            self._pending.popleft()
+        await loop.run_in_executor(self._executor, self.journal.commit, batch[-1][1])
+
+        self._written += len(batch) - dropped
+        self._dropped += dropped
+        self._batches += 1
+        self._last_write_at = datetime.now(timezone.utc).isoformat()
+        logger.debug("Wrote %d audit entries in %.3fs", len(batch), time.perf_counter() - started)
+        return len(batch)
+
+    async def _flush_all(self) -> None:
+        while self._pending:
+            await self._write_batch()
+
+    async def _write_loop(self) -> None:
+        backoff = self.flush_seconds
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while await self._write_batch() == self.batch_size:
+                    pass
+                backoff = self.flush_seconds
+            except Exception as e:
+                self._last_error = str(e)
+                backoff = min(max(backoff * 2, 1.0), AUDIT_MAX_BACKOFF_SECONDS)
+                logger.warning(
+                    "Audit write-behind failed (%d pending, retry in %.0fs): %s", len(self._pending), backoff, e,
+                )
+
+
+audit_writer = AuditWriter()
+
+
+def _audit_row(log_data: AuditLogCreate) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
         "user_id": log_data.user_id,
         "action": log_data.action,
         "table_name": log_data.table_name,
         "record_id": log_data.record_id,
         "old_data": log_data.old_data,
-        "new_data": log_data.new_data
+        "new_data": log_data.new_data,
+        # Stamped now, not when the batch reaches the database
+        "timestamp": datetime.now(timezone.utc).isoformat(),
     }
-    supabase.table("audit_log").insert(data).execute()
+
+
+async def log_actions(entries: list[AuditLogCreate]) -> None:
+    """
+    Audit writes that have already committed. Entries submitted together
+    share one journal fsync. A failure is logged, not raised: the write
+    itself succeeded and must not be reported (and retried) as failed.
+    """
+    rows = [_audit_row(entry) for entry in entries]
+    if not rows:
+        return
+    try:
+        if audit_writer.enabled:
+            await asyncio.gather(*(audit_writer.submit(row) for row in rows))
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, insert_audit_rows, rows)
+    except Exception as e:
+        logger.error("Could not record %d audit entries for %s: %s", len(rows), rows[0]["table_name"], e)
+
+
+async def log_action(log_data: AuditLogCreate) -> None:
+    await log_actions([log_data])
@@ -10,14 +10,23 @@ How it works:
 2. The hash is sent as a Solana Memo transaction
 3. The transaction signature is stored in the DB
 4. Anyone can verify: re-hash the record → compare with on-chain memo
+
+Batches are anchored as a Merkle tree: only the root goes on-chain (one memo
+per batch), and each record keeps its inclusion proof so it can be verified
+locally against the anchored root.
+
+Every record is also appended to a local hash chain at insert time (see
+record_ledger.py); only periodic chain heads are anchored as checkpoints.
 """
 
 import hashlib
 import json
 import os
 import asyncio
-from typing import Optional
-from datetime import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from datetime import datetime, timezone
 
 # Solana imports
 from solders.keypair import Keypair  # type: ignore
@@ -27,10 +36,13 @@ from solders.transaction import Transaction  # type: ignore
 from solders.message import Message  # type: ignore
 from solders.instruction import Instruction, AccountMeta  # type: ignore
 from solders.hash import Hash  # type: ignore
-from solana.rpc.api import Client
+from solders.signature import Signature  # type: ignore
+from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed, Finalized
 from solana.rpc.types import TxOpts
 
+from app.services.memo_cache import memo_cache
+
 # ── Config ────────────────────────────────────────────────────────────────────
 
 SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.devnet.solana.com")
@@ -41,6 +53,20 @@ SOLANA_NETWORK = os.getenv("SOLANA_NETWORK", "devnet")  # devnet | mainnet-beta
 # Memo Program v2 (official Solana Memo Program)
 MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
 
+# Max records whose hashes are rolled into a single Merkle root / memo
+MERKLE_BATCH_SIZE = int(os.getenv("MERKLE_BATCH_SIZE", "256"))
+
+# RPC client caching (see SolanaRpc)
+BLOCKHASH_TTL_SECONDS = float(os.getenv("SOLANA_BLOCKHASH_TTL_SECONDS", "30"))
+BALANCE_REFRESH_SECONDS = float(os.getenv("SOLANA_BALANCE_REFRESH_SECONDS", "60"))
+AIRDROP_COOLDOWN_SECONDS = 60
+LAMPORTS_PER_SIGNATURE = 5_000
+
+# Bulk verification: records hashed per process-pool task, pool size
+VERIFY_CHUNK_SIZE = int(os.getenv("VERIFY_CHUNK_SIZE", "2000"))
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", str(min(os.cpu_count() or 2, 8))))
+VERIFY_MAX_MISMATCHES = 1000
+
 
 # ── Keypair Management ───────────────────────────────────────────────────────
 
@@ -98,6 +124,235 @@ def hash_record(record: dict) -> str:
     return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
+# ── Merkle Tree ──────────────────────────────────────────────────────────────
+# Leaves are record hashes (hex SHA-256). Interior nodes are
+# SHA-256(0x01 || left || right); the 0x01 prefix keeps node hashes from ever
+# colliding with a leaf. An odd node at the end of a level is promoted
+# unchanged, so a single-record batch has root == record hash.
+
+def _merkle_parent(left: str, right: str) -> str:
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_merkle_tree(leaves: list[str]) -> list[list[str]]:
+    """Return every level of the tree, leaves first and root last."""
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree with no leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_merkle_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels: list[list[str]], index: int) -> list[dict]:
+    """
+    Inclusion proof for leaf `index`: sibling hashes from leaf to root, each
+    tagged with the side the sibling sits on.
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                "hash": level[sibling],
+                "position": "left" if sibling < index else "right",
+            })
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf: str, proof: list[dict], root: str) -> bool:
+    """Recompute the root from a leaf and its proof — no RPC needed."""
+    node = leaf
+    for step in proof:
+        if step["position"] == "left":
+            node = _merkle_parent(step["hash"], node)
+        else:
+            node = _merkle_parent(node, step["hash"])
+    return node == root
+
+
+# ── Hash Chain ───────────────────────────────────────────────────────────────
+# Local append-only ledger (migrations/record_ledger.sql): each entry commits
+# to the previous head, chain[n] = SHA-256(0x02 || chain[n-1] || record_hash).
+# The 0x02 prefix separates chain links from Merkle nodes. The same formula
+# runs inside append_record_ledger(); only heads are checkpointed on-chain.
+
+CHAIN_GENESIS_HASH = "0" * 64
+
+
+def chain_link(prev_hash: str, record_hash: str) -> str:
+    return hashlib.sha256(b"\x02" + bytes.fromhex(prev_hash) + bytes.fromhex(record_hash)).hexdigest()
+
+
+def verify_chain(entries: list[dict], prev_hash: str, prev_seq: int) -> list[dict]:
+    """
+    Linear scan of ledger entries (sorted by seq) starting after
+    (`prev_seq`, `prev_hash`). Returns the breaks found; after a break the
+    scan continues from the stored hash so every broken link is reported.
+    """
+    breaks = []
+    for entry in entries:
+        seq = entry["seq"]
+        if seq != prev_seq + 1:
+            breaks.append({"seq": seq, "reason": f"gap after seq {prev_seq}"})
+        if entry["prev_hash"] != prev_hash:
+            breaks.append({"seq": seq, "reason": "prev_hash does not match previous entry"})
+        elif chain_link(prev_hash, entry["record_hash"]) != entry["chain_hash"]:
+            breaks.append({"seq": seq, "reason": "chain_hash does not match its inputs"})
+        prev_hash, prev_seq = entry["chain_hash"], seq
+    return breaks
+
+
+# ── Solana RPC Client ────────────────────────────────────────────────────────
+
+class SolanaRpc:
+    """
+    Long-lived async RPC client shared by every anchoring / status call.
+
+    - One AsyncClient (and its pooled HTTP connections) for the process.
+    - The recent blockhash is cached for BLOCKHASH_TTL_SECONDS — well inside
+      its ~60-90s validity window — so anchoring does not fetch it per tx.
+    - The wallet balance is tracked locally (decremented by the fee of every
+      sent transaction) and re-synced in the background every
+      BALANCE_REFRESH_SECONDS, so anchoring never waits on get_balance.
+    - Low-balance airdrops are requested in the background; nothing sleeps.
+
+    With a warm cache an anchor costs exactly one round-trip: send_transaction.
+    """
+
+    def __init__(self, rpc_url: str):
+        self.rpc_url = rpc_url
+        self._client: Optional[AsyncClient] = None
+        self._blockhash: Optional[Hash] = None
+        self._blockhash_fetched_at = 0.0
+        self._blockhash_lock = asyncio.Lock()
+        self._balance: Optional[int] = None
+        self.balance_synced_at: Optional[datetime] = None
+        self._last_airdrop_at = 0.0
+        self._refresher: Optional[asyncio.Task] = None
+        self._airdrop_task: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> AsyncClient:
+        if self._client is None:
+            self._client = AsyncClient(self.rpc_url, commitment=Confirmed)
+        return self._client
+
+    async def start(self) -> None:
+        """Warm the caches and start the background balance refresher."""
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        for task in (self._refresher, self._airdrop_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresher = None
+        self._airdrop_task = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh_balance()
+                await self.get_blockhash()
+            except Exception as e:
+                print(f"[Blockchain] Background RPC refresh failed: {e}")
+            await asyncio.sleep(BALANCE_REFRESH_SECONDS)
+
+    async def refresh_balance(self) -> int:
+        resp = await self.client.get_balance(get_keypair().pubkey(), commitment=Confirmed)
+        self._balance = resp.value
+        self.balance_synced_at = datetime.utcnow()
+        return self._balance
+
+    async def get_balance(self) -> int:
+        """Locally tracked balance; fetched once if it has never been synced."""
+        if self._balance is None:
+            return await self.refresh_balance()
+        return self._balance
+
+    async def get_blockhash(self, force: bool = False) -> Hash:
+        async with self._blockhash_lock:
+            age = time.monotonic() - self._blockhash_fetched_at
+            if force or self._blockhash is None or age > BLOCKHASH_TTL_SECONDS:
+                # Finalized so it's accepted by preflight
+                resp = await self.client.get_latest_blockhash(commitment=Finalized)
+                self._blockhash = resp.value.blockhash
+                self._blockhash_fetched_at = time.monotonic()
+            return self._blockhash
+
+    def _maybe_airdrop(self) -> None:
+        """Fire-and-forget devnet airdrop when the tracked balance runs low."""
+        if self._balance is None or self._balance >= 10_000 or SOLANA_NETWORK == "mainnet-beta":
+            return
+        if self._airdrop_task is not None and not self._airdrop_task.done():
+            return
+        if time.monotonic() - self._last_airdrop_at < AIRDROP_COOLDOWN_SECONDS:
+            return
+        self._last_airdrop_at = time.monotonic()
+        print(f"[Blockchain] Low balance ({self._balance} lamports). Requesting airdrop...")
+
+        async def _airdrop():
+            try:
+                resp = await self.client.request_airdrop(get_keypair().pubkey(), 2_000_000_000)  # 2 SOL
+                print(f"[Blockchain] Airdrop requested: {resp.value}")
+            except Exception as e:
+                print(f"[Blockchain] Airdrop failed (may be rate-limited): {e}")
+
+        self._airdrop_task = asyncio.create_task(_airdrop())
+
+    async def send_memo(self, memo_content: str) -> str:
+        """
+        Sign and send a single Memo transaction; returns the signature (base58).
+        Raises on any RPC failure.
+        """
+        kp = get_keypair()
+        self._maybe_airdrop()
+        memo_ix = _build_memo_instruction(kp.pubkey(), memo_content)
+
+        for attempt in range(2):
+            recent_blockhash = await self.get_blockhash(force=attempt > 0)
+
+            # Build transaction
+            msg = Message.new_with_blockhash([memo_ix], kp.pubkey(), recent_blockhash)
+            tx = Transaction.new_unsigned(msg)
+            tx.sign([kp], recent_blockhash)
+
+            try:
+                # Send with matching commitment + skip preflight to avoid blockhash mismatch
+                result = await self.client.send_transaction(
+                    tx,
+                    opts=TxOpts(
+                        skip_preflight=True,
+                        preflight_commitment=Finalized,
+                    ),
+                )
+            except Exception as e:
+                # A stale cached blockhash is retried once with a fresh one
+                if attempt == 0 and "blockhash" in str(e).lower():
+                    continue
+                raise
+
+            if self._balance is not None:
+                self._balance -= LAMPORTS_PER_SIGNATURE
+            return str(result.value)
+
+
+solana_rpc = SolanaRpc(SOLANA_RPC_URL)
+
+
 # ── Solana Transaction ───────────────────────────────────────────────────────
 
 def _build_memo_instruction(signer: Pubkey, memo_text: str) -> Instruction:
@@ -109,7 +364,7 @@ def _build_memo_instruction(signer: Pubkey, memo_text: str) -> Instruction:
     )
 
 
-def anchor_to_solana(record_id: str, record_hash: str) -> Optional[str]:
+async def anchor_to_solana(record_id: str, record_hash: str) -> Optional[str]:
     """
     Send a Memo transaction to Solana devnet containing the record hash.
     Returns the transaction signature (base58), or None if it fails.
@@ -117,62 +372,53 @@ def anchor_to_solana(record_id: str, record_hash: str) -> Optional[str]:
     The memo content format: NDRRMA|<record_id>|<sha256_hash>
     """
     try:
-        client = Client(SOLANA_RPC_URL)
-        kp = get_keypair()
-
-        # Check balance
-        balance_resp = client.get_balance(kp.pubkey(), commitment=Confirmed)
-        balance_lamports = balance_resp.value
-        if balance_lamports < 10_000:
-            print(f"[Blockchain] Low balance ({balance_lamports} lamports). Requesting airdrop...")
-            try:
-                airdrop_sig = client.request_airdrop(kp.pubkey(), 2_000_000_000)  # 2 SOL
-                # Wait for airdrop confirmation
-                import time
-                time.sleep(3)
-                print(f"[Blockchain] Airdrop requested: {airdrop_sig.value}")
-            except Exception as e:
-                print(f"[Blockchain] Airdrop failed (may be rate-limited): {e}")
+        tx_signature = await solana_rpc.send_memo(f"NDRRMA|{record_id}|{record_hash}")
+        print(f"[Blockchain] Record {record_id} anchored → tx: {tx_signature}")
+        return tx_signature
 
-        # Build memo content
-        memo_content = f"NDRRMA|{record_id}|{record_hash}"
+    except Exception as e:
+        print(f"[Blockchain] Failed to anchor record {record_id}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
 
-        # Build and send transaction
-        memo_ix = _build_memo_instruction(kp.pubkey(), memo_content)
 
-        # Get recent blockhash — use Finalized so it's accepted by preflight
-        blockhash_resp = client.get_latest_blockhash(commitment=Finalized)
-        recent_blockhash = blockhash_resp.value.blockhash
-
-        # Build transaction
-        msg = Message.new_with_blockhash(
-            [memo_ix],
-            kp.pubkey(),
-            recent_blockhash,
-        )
-        tx = Transaction.new_unsigned(msg)
-        tx.sign([kp], recent_blockhash)
-
-        # Send with matching commitment + skip preflight to avoid blockhash mismatch
-        result = client.send_transaction(
-            tx,
-            opts=TxOpts(
-                skip_preflight=True,
-                preflight_commitment=Finalized,
-            ),
-        )
-        tx_signature = str(result.value)
+async def anchor_merkle_root(root: str, leaf_count: int) -> Optional[str]:
+    """
+    Anchor a Merkle root covering `leaf_count` record hashes.
+    Returns the transaction signature (base58), or None if it fails.
 
-        print(f"[Blockchain] Record {record_id} anchored → tx: {tx_signature}")
+    The memo content format: NDRRMA|MERKLE|<leaf_count>|<root>
+    """
+    try:
+        tx_signature = await solana_rpc.send_memo(f"NDRRMA|MERKLE|{leaf_count}|{root}")
+        print(f"[Blockchain] Merkle root {root[:16]}… ({leaf_count} records) anchored → tx: {tx_signature}")
         return tx_signature
 
     except Exception as e:
-        print(f"[Blockchain] Failed to anchor record {record_id}: {e}")
+        print(f"[Blockchain] Failed to anchor Merkle root {root}: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
+async def anchor_chain_checkpoint(seq: int, chain_hash: str) -> Optional[str]:
+    """
+    Anchor the ledger head at `seq`.
+    Returns the transaction signature (base58), or None if it fails.
+
+    The memo content format: NDRRMA|CHAIN|<seq>|<chain_hash>
+    """
+    try:
+        tx_signature = await solana_rpc.send_memo(f"NDRRMA|CHAIN|{seq}|{chain_hash}")
+        print(f"[Blockchain] Ledger checkpoint #{seq} anchored → tx: {tx_signature}")
+        return tx_signature
+
+    except Exception as e:
+        print(f"[Blockchain] Failed to anchor ledger checkpoint #{seq}: {e}")
+        return None
+
+
 def get_explorer_url(tx_signature: str) -> str:
     """Get the Solana Explorer URL for a transaction."""
     cluster_param = f"?cluster={SOLANA_NETWORK}" if SOLANA_NETWORK != "mainnet-beta" else ""
@@ -181,69 +427,147 @@ def get_explorer_url(tx_signature: str) -> str:
 
 # ── Verification ─────────────────────────────────────────────────────────────
 
-def verify_record_on_chain(record: dict, tx_signature: str) -> dict:
+MEMO_LOG_PREFIX = "Program log: Memo (len "
+
+
+def _extract_memo(tx_json: dict) -> Optional[str]:
     """
-    Verify a record against its on-chain hash.
-    
+    Memo text from a jsonParsed getTransaction result: the `parsed` field of
+    the Memo program instruction, falling back to the program's log line
+    `Program log: Memo (len N): "<memo>"`.
+    """
+    message = tx_json.get("transaction", {}).get("message", {})
+    for ix in message.get("instructions", []):
+        if ix.get("programId") == str(MEMO_PROGRAM_ID) and isinstance(ix.get("parsed"), str):
+            return ix["parsed"]
+    for line in (tx_json.get("meta") or {}).get("logMessages") or []:
+        if line.startswith(MEMO_LOG_PREFIX):
+            _, _, quoted = line.partition("): ")
+            return json.loads(quoted) if quoted.startswith('"') else quoted
+    return None
+
+
+def parse_memo(memo: str) -> Optional[dict]:
+    """
+    Decode an NDRRMA anchor memo:
+      NDRRMA|<record_id>|<hash>          → {"kind": "record", "record_id", "hash"}
+      NDRRMA|MERKLE|<leaf_count>|<root>  → {"kind": "merkle", "leaf_count", "root"}
+      NDRRMA|CHAIN|<seq>|<chain_hash>    → {"kind": "chain", "seq", "chain_hash"}
+    Returns None for anything else.
+    """
+    parts = memo.split("|")
+    if len(parts) == 4 and parts[0] == "NDRRMA" and parts[1] == "MERKLE" and parts[2].isdigit():
+        return {"kind": "merkle", "leaf_count": int(parts[2]), "root": parts[3]}
+    if len(parts) == 4 and parts[0] == "NDRRMA" and parts[1] == "CHAIN" and parts[2].isdigit():
+        return {"kind": "chain", "seq": int(parts[2]), "chain_hash": parts[3]}
+    if len(parts) == 3 and parts[0] == "NDRRMA":
+        return {"kind": "record", "record_id": parts[1], "hash": parts[2]}
+    return None
+
+
+async def fetch_finalized_memo(tx_signature: str) -> Optional[dict]:
+    """
+    One getTransaction call at Finalized commitment.
+    Returns {memo, slot, block_time} or None if the tx is unknown / not final.
+    """
+    resp = await solana_rpc.client.get_transaction(
+        Signature.from_string(tx_signature),
+        encoding="jsonParsed",
+        commitment=Finalized,
+        max_supported_transaction_version=0,
+    )
+    if resp.value is None:
+        return None
+    tx_json = json.loads(resp.to_json())["result"]
+    memo = _extract_memo(tx_json)
+    if memo is None:
+        return None
+    block_time = tx_json.get("blockTime")
+    return {
+        "memo": memo,
+        "slot": tx_json.get("slot"),
+        "block_time": datetime.fromtimestamp(block_time, timezone.utc).isoformat() if block_time else None,
+    }
+
+
+async def get_finalized_memo(tx_signature: str) -> tuple[Optional[dict], bool]:
+    """
+    Decoded memo entry for a signature — memo cache first, then one RPC call
+    (cached only once finalized). Returns (entry|None, from_cache).
+    Raises on RPC failure.
+    """
+    entry = await memo_cache.get(tx_signature)
+    if entry is not None:
+        return entry, True
+    entry = await fetch_finalized_memo(tx_signature)
+    if entry is not None:
+        await memo_cache.put(tx_signature, entry)
+    return entry, False
+
+
+async def verify_record_on_chain(record: dict, tx_signature: str) -> dict:
+    """
+    Verify a record against the memo of its finalized anchoring transaction.
+
+    Single-record memos must carry this record's id and current hash; Merkle
+    memos must carry the root the record's stored proof leads to. The decoded
+    memo is cached by signature (memory + solana_memo_cache table), so only
+    the first verification of a transaction costs an RPC call.
+
     Returns:
         {
-            "verified": bool,
-            "record_hash": str,       # current hash of the record
-            "onchain_hash": str|None,  # hash from the blockchain memo
+            "verified": bool|None,     # None = chain unreachable
+            "record_hash": str,        # current hash of the record
+            "onchain_hash": str|None,  # hash or Merkle root from the memo
+            "memo_kind": "record"|"merkle"|None,
             "tx_signature": str,
             "explorer_url": str,
+            "cached": bool,
             "error": str|None,
         }
     """
     current_hash = hash_record(record)
-    explorer_url = get_explorer_url(tx_signature)
+    result = {
+        "verified": False,
+        "record_hash": current_hash,
+        "onchain_hash": None,
+        "memo_kind": None,
+        "tx_signature": tx_signature,
+        "explorer_url": get_explorer_url(tx_signature),
+        "blockchain": "Solana Devnet",
+        "cached": True,
+        "error": None,
+    }
 
     try:
-        client = Client(SOLANA_RPC_URL)
-        
-        # Fetch transaction
-        tx_resp = client.get_transaction(
-            Pubkey.from_string(tx_signature) if len(tx_signature) < 50 else None,
-            commitment=Confirmed,
-        )
-        
-        # For devnet verification, we trust the hash if the tx exists
-        # Full memo parsing requires more complex deserialization
-        # In production, you'd decode the memo instruction data
-        
-        # Simplified verification: check tx exists on chain
-        if tx_resp and tx_resp.value:
-            return {
-                "verified": True,
-                "record_hash": current_hash,
-                "onchain_hash": current_hash,  # tx exists = anchored
-                "tx_signature": tx_signature,
-                "explorer_url": explorer_url,
-                "blockchain": "Solana Devnet",
-                "error": None,
-            }
-        else:
-            return {
-                "verified": False,
-                "record_hash": current_hash,
-                "onchain_hash": None,
-                "tx_signature": tx_signature,
-                "explorer_url": explorer_url,
-                "blockchain": "Solana Devnet",
-                "error": "Transaction not found on chain",
-            }
-            
+        entry, result["cached"] = await get_finalized_memo(tx_signature)
     except Exception as e:
         # If we can't reach Solana RPC, still return the hash info
-        return {
-            "verified": None,  # Unknown - can't reach chain
-            "record_hash": current_hash,
-            "onchain_hash": None,
-            "tx_signature": tx_signature,
-            "explorer_url": explorer_url,
-            "blockchain": "Solana Devnet",
-            "error": f"RPC error: {str(e)}",
-        }
+        result["verified"] = None
+        result["cached"] = False
+        result["error"] = f"RPC error: {str(e)}"
+        return result
+    if entry is None:
+        result["cached"] = False
+        result["error"] = "Transaction not found on chain (or not finalized yet)"
+        return result
+
+    memo = parse_memo(entry["memo"])
+    if memo is None or memo["kind"] == "chain":
+        result["error"] = "Transaction memo is not a record anchor"
+        return result
+
+    result["memo_kind"] = memo["kind"]
+    result["slot"] = entry.get("slot")
+    if memo["kind"] == "merkle":
+        result["onchain_hash"] = memo["root"]
+        result["verified"] = verify_merkle_proof(current_hash, record.get("merkle_proof") or [], memo["root"])
+    else:
+        result["onchain_hash"] = memo["hash"]
+        result["verified"] = memo["record_id"] == str(record.get("id")) and memo["hash"] == current_hash
+    if not result["verified"]:
+        result["error"] = "Record does not match the anchored memo"
+    return result
 
 
 def verify_record_hash_only(record: dict, stored_hash: str) -> dict:
@@ -260,36 +584,137 @@ def verify_record_hash_only(record: dict, stored_hash: str) -> dict:
     }
 
 
+# ── Bulk Verification ────────────────────────────────────────────────────────
+# Hashing is CPU-bound and holds the GIL for record-sized inputs, so chunks go
+# to a process pool. The next page is fetched while the current one hashes.
+
+_verify_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_verify_pool() -> ProcessPoolExecutor:
+    global _verify_pool
+    if _verify_pool is None:
+        _verify_pool = ProcessPoolExecutor(max_workers=VERIFY_WORKERS)
+    return _verify_pool
+
+
+def shutdown_verify_pool() -> None:
+    global _verify_pool
+    if _verify_pool is not None:
+        _verify_pool.shutdown(wait=False, cancel_futures=True)
+        _verify_pool = None
+
+
+def _verify_chunk(records: list[dict]) -> tuple[dict, list[dict]]:
+    """Runs in a pool process: counts per outcome plus the mismatching records."""
+    counts = {"verified": 0, "tampered": 0, "proof_invalid": 0, "not_anchored": 0}
+    mismatches = []
+    for record in records:
+        current_hash = hash_record(record)
+        stored_hash = record.get("record_hash")
+        if not stored_hash:
+            counts["not_anchored"] += 1
+            continue
+        if current_hash != stored_hash:
+            status = "tampered"
+        elif record.get("merkle_root") and record.get("merkle_proof") is not None \
+                and not verify_merkle_proof(current_hash, record["merkle_proof"], record["merkle_root"]):
+            status = "proof_invalid"
+        else:
+            counts["verified"] += 1
+            continue
+        counts[status] += 1
+        mismatches.append({
+            "record_id": str(record["id"]),
+            "status": status,
+            "current_hash": current_hash,
+            "stored_hash": stored_hash,
+            "solana_tx_signature": record.get("solana_tx_signature"),
+        })
+    return counts, mismatches
+
+
+async def verify_records_bulk(fetch_page: Callable, cursor=None) -> dict:
+    """
+    Re-hash every record produced by `fetch_page(cursor) -> (rows, next_cursor)`
+    (a blocking callable; `next_cursor` is None on the last page) and compare
+    with the stored hash / Merkle proof.
+
+    Returns only counts and the mismatching records (capped at
+    VERIFY_MAX_MISMATCHES).
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_verify_pool()
+    started = time.perf_counter()
+
+    counts = {"checked": 0, "verified": 0, "tampered": 0, "proof_invalid": 0, "not_anchored": 0}
+    mismatches: list[dict] = []
+
+    rows, cursor = await loop.run_in_executor(None, fetch_page, cursor)
+    while rows:
+        hashing = [
+            loop.run_in_executor(pool, _verify_chunk, rows[i:i + VERIFY_CHUNK_SIZE])
+            for i in range(0, len(rows), VERIFY_CHUNK_SIZE)
+        ]
+        next_page = loop.run_in_executor(None, fetch_page, cursor) if cursor is not None else None
+
+        counts["checked"] += len(rows)
+        for chunk_counts, chunk_mismatches in await asyncio.gather(*hashing):
+            for key, value in chunk_counts.items():
+                counts[key] += value
+            mismatches.extend(chunk_mismatches)
+
+        rows, cursor = await next_page if next_page else ([], None)
+
+    elapsed = time.perf_counter() - started
+    return {
+        **counts,
+        "mismatches": mismatches[:VERIFY_MAX_MISMATCHES],
+        "mismatches_truncated": len(mismatches) > VERIFY_MAX_MISMATCHES,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(counts["checked"] / elapsed) if elapsed > 0 else None,
+    }
+
+
 # ── Batch Operations ─────────────────────────────────────────────────────────
 
-def anchor_batch(records: list[dict]) -> list[dict]:
+async def anchor_batch(records: list[dict]) -> list[dict]:
     """
-    Anchor multiple records. Returns list of {id, tx_signature, hash, explorer_url}.
-    Each record is anchored in its own transaction for individual verifiability.
+    Anchor multiple records with one Memo transaction per MERKLE_BATCH_SIZE
+    records. Returns one entry per record:
+    {id, tx_signature, hash, merkle_root, merkle_proof, explorer_url, success}.
+    Every record in a batch shares the batch's tx_signature and root.
     """
     results = []
-    for record in records:
-        record_hash = hash_record(record)
-        tx_sig = anchor_to_solana(str(record["id"]), record_hash)
-        results.append({
-            "id": str(record["id"]),
-            "tx_signature": tx_sig,
-            "hash": record_hash,
-            "explorer_url": get_explorer_url(tx_sig) if tx_sig else None,
-            "success": tx_sig is not None,
-        })
+    for start in range(0, len(records), MERKLE_BATCH_SIZE):
+        chunk = records[start:start + MERKLE_BATCH_SIZE]
+        hashes = [hash_record(record) for record in chunk]
+        levels = build_merkle_tree(hashes)
+        root = levels[-1][0]
+        tx_sig = await anchor_merkle_root(root, len(chunk))
+        for index, (record, record_hash) in enumerate(zip(chunk, hashes)):
+            results.append({
+                "id": str(record["id"]),
+                "tx_signature": tx_sig,
+                "hash": record_hash,
+                "merkle_root": root,
+                "merkle_proof": merkle_proof(levels, index),
+                "explorer_url": get_explorer_url(tx_sig) if tx_sig else None,
+                "success": tx_sig is not None,
+            })
     return results
 
 
 # ── Status ───────────────────────────────────────────────────────────────────
 
-def get_blockchain_status() -> dict:
-    """Get current blockchain service status."""
+async def get_blockchain_status() -> dict:
+    """
+    Get current blockchain service status.
+    The balance is the locally tracked one (re-synced in the background).
+    """
     try:
-        client = Client(SOLANA_RPC_URL)
         kp = get_keypair()
-        balance_resp = client.get_balance(kp.pubkey(), commitment=Confirmed)
-        balance_lamports = balance_resp.value
+        balance_lamports = await solana_rpc.get_balance()
 
         return {
             "active": True,
@@ -298,7 +723,9 @@ def get_blockchain_status() -> dict:
             "wallet_address": str(kp.pubkey()),
             "balance_sol": balance_lamports / 1_000_000_000,
             "balance_lamports": balance_lamports,
+            "balance_synced_at": solana_rpc.balance_synced_at.isoformat() if solana_rpc.balance_synced_at else None,
             "explorer_base": SOLANA_EXPLORER_BASE,
+            "memo_cache": memo_cache.stats(),
         }
     except Exception as e:
         return {
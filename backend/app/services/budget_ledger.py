@@ -0,0 +1,367 @@
+"""
+In-Memory Budget Ledger
+=======================
+National → province → district budget tree with running totals, so budget
+checks and the dashboard summaries are O(1) dictionary lookups instead of
+"fetch every child row and sum it" on each request.
+
+Each node holds its limit, what is committed against it (province
+allocations for a national budget, district allocations for a province,
+relief distributed for a district) and the DB `version` of that node (see
+migrations/budget_ledger.sql).
+
+- Loaded once (lazily or from the lifespan) and fully rebuilt every
+  BUDGET_LEDGER_REFRESH_SECONDS to pick up writes from other workers. A
+  node written locally while the snapshot was being read is kept if its
+  in-memory version is newer than the snapshot's.
+- Allocation writes are optimistic: validated in memory, then sent with the
+  parent's version; if another worker changed the parent first the DB
+  rejects the write (40001), the parent is reloaded and the write retried.
+  A write is applied to memory only after it commits.
+- Relief distributions are validated by `distribute_relief` under a row
+  lock and then applied here.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from app.db.supabase import get_supabase_admin
+
+logger = logging.getLogger(__name__)
+
+BUDGET_LEDGER_REFRESH_SECONDS = float(os.getenv("BUDGET_LEDGER_REFRESH_SECONDS", "60"))
+BUDGET_LEDGER_MAX_RETRIES = 3
+BUDGET_LEDGER_PAGE_SIZE = 1000
+
+
+def _fetch_all(supabase, table: str, columns: str, **eq) -> list[dict]:
+    rows, offset = [], 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for column, value in eq.items():
+            query = query.eq(column, value)
+        res = query.range(offset, offset + BUDGET_LEDGER_PAGE_SIZE - 1).execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < BUDGET_LEDGER_PAGE_SIZE:
+            return rows
+        offset += BUDGET_LEDGER_PAGE_SIZE
+
+
+def _amount(value) -> float:
+    return round(float(value or 0), 2)
+
+
+def _summary(allocated: float, used: float) -> dict:
+    return {
+        "allocated": allocated,
+        "used": used,
+        "remaining": round(allocated - used, 2),
+        "utilization_percent": (used / allocated * 100) if allocated > 0 else 0,
+    }
+
+
+def _raise_for_rpc_error(e: APIError):
+    if e.code == "P0002":
+        raise HTTPException(status_code=404, detail=e.message)
+    if e.code == "P0001":
+        raise HTTPException(status_code=400, detail=e.message)
+    if e.code == "23505":
+        raise HTTPException(status_code=409, detail="Allocation already exists")
+    raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+
+
+class BudgetLedger:
+    def __init__(self, refresh_seconds: float = BUDGET_LEDGER_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        # id -> {"id", "level", "parent_id", "limit", "committed", "version", "ref"}
+        # ref: fiscal_year (national), province_id (province), district_id (district)
+        self._nodes: dict[str, dict] = {}
+        self._children: dict[str, set[str]] = defaultdict(set)
+        self._loaded_at: Optional[float] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._dirty: set[str] = set()  # nodes changed locally since the current load began
+        self._writes = 0
+        self._conflicts = 0
+        self._runner: Optional[asyncio.Task] = None
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.load()
+                self._last_error = None
+            except Exception as e:
+                self._last_error = str(e)
+                logger.warning("Budget ledger load failed: %s", e)
+            await asyncio.sleep(self.refresh_seconds)
+
+    def stats(self) -> dict:
+        levels: dict[str, int] = defaultdict(int)
+        for node in self._nodes.values():
+            levels[node["level"]] += 1
+        return {
+            "nodes": dict(levels),
+            "loaded_seconds_ago": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            "writes": self._writes,
+            "version_conflicts": self._conflicts,
+            "last_error": self._last_error,
+        }
+
+    # ── loading ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _build() -> tuple[dict[str, dict], dict[str, set[str]]]:
+        supabase = get_supabase_admin()
+        nodes: dict[str, dict] = {}
+        children: dict[str, set[str]] = defaultdict(set)
+
+        for row in _fetch_all(supabase, "budget_master", "id,fiscal_year,ndrrma_allocation,version"):
+            nodes[row["id"]] = {
+                "id": row["id"], "level": "national", "parent_id": None, "ref": row["fiscal_year"],
+                "limit": _amount(row["ndrrma_allocation"]), "committed": 0.0, "version": row.get("version", 0),
+            }
+        for row in _fetch_all(supabase, "province_allocation", "id,budget_master_id,province_id,allocated_amount,version"):
+            nodes[row["id"]] = {
+                "id": row["id"], "level": "province", "parent_id": row["budget_master_id"], "ref": row["province_id"],
+                "limit": _amount(row["allocated_amount"]), "committed": 0.0, "version": row.get("version", 0),
+            }
+        for row in _fetch_all(supabase, "district_allocation", "id,province_allocation_id,district_id,allocated_amount,version"):
+            nodes[row["id"]] = {
+                "id": row["id"], "level": "district", "parent_id": row["province_allocation_id"], "ref": row["district_id"],
+                "limit": _amount(row["allocated_amount"]), "committed": 0.0, "version": row.get("version", 0),
+            }
+        for row in _fetch_all(supabase, "district_utilization", "district_allocation_id,used"):
+            if row["district_allocation_id"] in nodes:
+                nodes[row["district_allocation_id"]]["committed"] = _amount(row["used"])
+
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"]) if node["parent_id"] else None
+            if parent is not None:
+                # A child's limit is what it commits of its parent's budget
+                children[parent["id"]].add(node["id"])
+                parent["committed"] = round(parent["committed"] + node["limit"], 2)
+        return nodes, children
+
+    async def load(self) -> int:
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            self._dirty = set()
+            nodes, children = await asyncio.get_running_loop().run_in_executor(None, self._build)
+            # Local writes that committed while the tables were being read
+            # may be missing from the snapshot; a higher version says so
+            for node_id in self._dirty:
+                current = self._nodes.get(node_id)
+                loaded = nodes.get(node_id)
+                if current is not None and (loaded is None or current["version"] > loaded["version"]):
+                    nodes[node_id] = current
+                    if current["parent_id"]:
+                        children[current["parent_id"]].add(node_id)
+            self._nodes, self._children = nodes, children
+            self._loaded_at = time.monotonic()
+            return len(self._nodes)
+
+    async def ensure_loaded(self) -> None:
+        if self._loaded_at is None:
+            await self.load()
+
+    def _fetch_node(self, node_id: str, level: str) -> Optional[dict]:
+        """Current limit / committed / version of one node straight from the DB."""
+        supabase = get_supabase_admin()
+        if level == "national":
+            res = supabase.table("budget_master").select("id,fiscal_year,ndrrma_allocation,version") \
+                .eq("id", node_id).limit(1).execute()
+            if not res.data:
+                return None
+            row = res.data[0]
+            children = _fetch_all(supabase, "province_allocation", "allocated_amount", budget_master_id=node_id)
+            return {"id": node_id, "level": level, "parent_id": None, "ref": row["fiscal_year"],
+                    "limit": _amount(row["ndrrma_allocation"]), "version": row.get("version", 0),
+                    "committed": _amount(sum(float(c["allocated_amount"]) for c in children))}
+        if level == "province":
+            res = supabase.table("province_allocation").select("id,budget_master_id,province_id,allocated_amount,version") \
+                .eq("id", node_id).limit(1).execute()
+            if not res.data:
+                return None
+            row = res.data[0]
+            children = _fetch_all(supabase, "district_allocation", "allocated_amount", province_allocation_id=node_id)
+            return {"id": node_id, "level": level, "parent_id": row["budget_master_id"], "ref": row["province_id"],
+                    "limit": _amount(row["allocated_amount"]), "version": row.get("version", 0),
+                    "committed": _amount(sum(float(c["allocated_amount"]) for c in children))}
+        res = supabase.table("district_allocation").select("id,province_allocation_id,district_id,allocated_amount,version") \
+            .eq("id", node_id).limit(1).execute()
+        if not res.data:
+            return None
+        row = res.data[0]
+        used = supabase.table("district_utilization").select("used").eq("district_allocation_id", node_id).limit(1).execute()
+        return {"id": node_id, "level": level, "parent_id": row["province_allocation_id"], "ref": row["district_id"],
+                "limit": _amount(row["allocated_amount"]), "version": row.get("version", 0),
+                "committed": _amount(used.data[0]["used"]) if used.data else 0.0}
+
+    async def reload_node(self, node_id: str, level: str) -> Optional[dict]:
+        node = await asyncio.get_running_loop().run_in_executor(None, self._fetch_node, node_id, level)
+        if node is None:
+            self._remove(node_id)
+            return None
+        self._nodes[node_id] = node
+        self._dirty.add(node_id)
+        if node["parent_id"]:
+            self._children[node["parent_id"]].add(node_id)
+        return node
+
+    def _remove(self, node_id: str) -> None:
+        node = self._nodes.pop(node_id, None)
+        if node and node["parent_id"]:
+            self._children[node["parent_id"]].discard(node_id)
+
+    # ── checks ───────────────────────────────────────────────────────────────
+
+    async def _node(self, node_id: str, level: str, not_found: str) -> dict:
+        await self.ensure_loaded()
+        node = self._nodes.get(node_id)
+        if node is None or node["level"] != level:
+            # Created by another worker since the last refresh?
+            node = await self.reload_node(node_id, level)
+        if node is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        return node
+
+    async def check(self, node_id: str, level: str, amount: float, not_found: str, insufficient: str) -> dict:
+        """
+        Validate `amount` against a node's remaining budget in memory. A
+        rejection is confirmed against the DB first, since another worker may
+        have raised the limit; an acceptance is confirmed by the write itself.
+        """
+        node = await self._node(node_id, level, not_found)
+        if node["committed"] + amount > node["limit"]:
+            node = await self.reload_node(node_id, level) or node
+            available = round(node["limit"] - node["committed"], 2)
+            if amount > available:
+                raise HTTPException(status_code=400, detail=f"{insufficient}: {available}")
+        return node
+
+    # ── writes ───────────────────────────────────────────────────────────────
+
+    async def _allocate(self, rpc: str, allocation: dict, parent_id: str, parent_level: str,
+                        not_found: str, insufficient: str) -> dict:
+        amount = _amount(allocation["allocated_amount"])
+        loop = asyncio.get_running_loop()
+        for attempt in range(BUDGET_LEDGER_MAX_RETRIES):
+            parent = await self.check(parent_id, parent_level, amount, not_found, insufficient)
+            try:
+                res = await loop.run_in_executor(None, lambda: get_supabase_admin().rpc(rpc, {
+                    "p_allocation": allocation,
+                    "p_expected_version": parent["version"],
+                }).execute())
+            except APIError as e:
+                if e.code == "40001":
+                    self._conflicts += 1
+                    await self.reload_node(parent_id, parent_level)
+                    continue
+                _raise_for_rpc_error(e)
+
+            row = res.data["allocation"]
+            child_level = "province" if parent_level == "national" else "district"
+            self._nodes.setdefault(row["id"], {
+                "id": row["id"], "level": child_level, "parent_id": parent_id,
+                "ref": row["province_id"] if child_level == "province" else row["district_id"],
+                "limit": amount, "committed": 0.0, "version": row.get("version", 0),
+            })
+            self._children[parent_id].add(row["id"])
+            # A refresh may have replaced the tree during the RPC, and its
+            # snapshot may already include this write
+            parent = self._nodes.get(parent_id, parent)
+            if parent["version"] < res.data["parent_version"]:
+                parent["committed"] = round(parent["committed"] + amount, 2)
+                parent["version"] = res.data["parent_version"]
+            self._dirty.update((row["id"], parent_id))
+            self._writes += 1
+            return row
+        raise HTTPException(status_code=409, detail="Budget is being changed concurrently, please retry")
+
+    async def allocate_province(self, allocation: dict) -> dict:
+        return await self._allocate(
+            "allocate_province_budget", allocation, allocation["budget_master_id"], "national",
+            "Budget Master not found", "Insufficient National Budget. Available",
+        )
+
+    async def allocate_district(self, allocation: dict) -> dict:
+        return await self._allocate(
+            "allocate_district_budget", allocation, allocation["province_allocation_id"], "province",
+            "Province Allocation not found", "Insufficient Province Budget. Available",
+        )
+
+    def record_distribution(self, district_allocation_id: str, amount: float) -> None:
+        """Apply a committed relief distribution (validated by distribute_relief)."""
+        node = self._nodes.get(district_allocation_id)
+        if node is None:
+            return
+        node["committed"] = round(node["committed"] + _amount(amount), 2)
+        node["version"] += 1
+        self._dirty.add(district_allocation_id)
+        self._writes += 1
+
+    # ── views ────────────────────────────────────────────────────────────────
+
+    def node(self, node_id: str) -> Optional[dict]:
+        node = self._nodes.get(node_id)
+        return dict(node) if node else None
+
+    def _nodes_at(self, level: str, ref=None) -> list[dict]:
+        return [n for n in self._nodes.values() if n["level"] == level and (ref is None or n["ref"] == ref)]
+
+    async def national_summary(self) -> dict:
+        await self.ensure_loaded()
+        allocated = sum(n["limit"] for n in self._nodes_at("national"))
+        used = sum(n["committed"] for n in self._nodes_at("province"))
+        return _summary(round(allocated, 2), round(used, 2))
+
+    async def province_summary(self, province_id: int) -> dict:
+        await self.ensure_loaded()
+        nodes = self._nodes_at("province", province_id)
+        return _summary(round(sum(n["limit"] for n in nodes), 2), round(sum(n["committed"] for n in nodes), 2))
+
+    async def district_summary(self, district_id: int) -> dict:
+        await self.ensure_loaded()
+        nodes = self._nodes_at("district", district_id)
+        return _summary(round(sum(n["limit"] for n in nodes), 2), round(sum(n["committed"] for n in nodes), 2))
+
+    async def tree(self) -> list[dict]:
+        """Whole hierarchy, national budgets first, with remaining at every level."""
+        await self.ensure_loaded()
+
+        def expand(node: dict) -> dict:
+            return {
+                **node,
+                "remaining": round(node["limit"] - node["committed"], 2),
+                "children": [expand(self._nodes[c]) for c in sorted(self._children.get(node["id"], ())) if c in self._nodes],
+            }
+
+        return [expand(n) for n in sorted(self._nodes_at("national"), key=lambda n: str(n["ref"]))]
+
+
+budget_ledger = BudgetLedger()
@@ -0,0 +1,130 @@
+"""
+Local Write-Ahead Journal
+=========================
+Append-only JSON-lines file plus the byte offset already written to the
+database, shared by the write-behind writers (SOS intake, audit log).
+
+- append() fsyncs a whole batch at once, so callers can group-commit.
+- replay() returns everything past the committed offset after a restart; a
+  torn final line (never acknowledged) is dropped.
+- commit() advances the offset and truncates the file once it is drained
+  (offset reset first, so a crash can only cause a harmless re-replay).
+
+Each process claims its own slot (<name>.<n>.jsonl, held with an exclusive
+file lock) so several API workers never share a file.
+"""
+
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: single journal slot, no cross-process lock
+    fcntl = None
+
+# backend/var — runtime state that must survive restarts (git-ignored)
+VAR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "var")
+JOURNAL_SLOTS = 16
+
+
+class Journal:
+    """Append-only JSON-lines journal plus the byte offset already written to the DB."""
+
+    def __init__(self, directory: str, name: str):
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = None
+        for slot in range(JOURNAL_SLOTS if fcntl else 1):
+            path = os.path.join(directory, f"{name}.{slot}.jsonl")
+            f = open(path, "a+b")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    f.close()
+                    continue
+            self._file, self.path = f, path
+            break
+        if self._file is None:
+            raise RuntimeError(f"All {JOURNAL_SLOTS} {name} slots in {directory} are in use")
+        self.offset_path = self.path[:-len(".jsonl")] + ".offset"
+        self.committed = self._read_offset()
+        self._file.seek(0, os.SEEK_END)
+        if self.committed > self._file.tell() or not self._at_line_start(self.committed):
+            # Offset left over from a journal that was truncated since (older
+            # versions truncated before resetting it): everything in the file
+            # is newer than that offset
+            self.committed = 0
+
+    def _at_line_start(self, offset: int) -> bool:
+        if offset == 0:
+            return True
+        self._file.seek(offset - 1)
+        return self._file.read(1) == b"\n"
+
+    def _read_offset(self) -> int:
+        try:
+            with open(self.offset_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_offset(self, offset: int) -> None:
+        tmp = self.offset_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.offset_path)
+
+    def replay(self) -> list[tuple[dict, int]]:
+        """(row, end offset) for every entry past the committed offset."""
+        entries = []
+        with self._lock:
+            self._file.seek(self.committed)
+            position = self.committed
+            for line in self._file:
+                if not line.endswith(b"\n"):
+                    # Torn final write: it was never acknowledged, drop it
+                    self._file.truncate(position)
+                    break
+                position += len(line)
+                entries.append((json.loads(line), position))
+        return entries
+
+    def append(self, rows: list[dict]) -> list[int]:
+        """Durably append rows; returns each row's end offset."""
+        ends = []
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            position = self._file.tell()
+            for row in rows:
+                line = (json.dumps(row, default=str) + "\n").encode("utf-8")
+                self._file.write(line)
+                position += len(line)
+                ends.append(position)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        return ends
+
+    def commit(self, offset: int) -> None:
+        """Record that everything up to `offset` is in the DB; truncate once fully drained."""
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            if offset == self._file.tell():
+                # Reset the offset before truncating: a crash in between then
+                # replays the drained entries (upserts, so harmless) instead
+                # of leaving an offset past the end of an emptied file
+                self._write_offset(0)
+                self.committed = 0
+                self._file.truncate(0)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                return
+            self._write_offset(offset)
+            self.committed = offset
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,95 @@
+"""
+Finalized Memo Cache
+====================
+Two-tier cache of decoded memos keyed by finalized transaction signature
+(see migrations/solana_memo_cache.sql).
+
+- In-process LRU (MEMO_CACHE_SIZE entries) answers repeat lookups instantly.
+- The `solana_memo_cache` table shares entries across workers and restarts.
+
+Finalized transactions are immutable, so entries never expire. Persisting is
+best-effort: if the table write fails the entry still lives in memory.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+
+logger = logging.getLogger(__name__)
+
+MEMO_CACHE_SIZE = int(os.getenv("MEMO_CACHE_SIZE", "10000"))
+
+
+class MemoCache:
+    def __init__(self, max_entries: int = MEMO_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, tx_signature: str, entry: dict) -> None:
+        self._entries[tx_signature] = entry
+        self._entries.move_to_end(tx_signature)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, tx_signature: str) -> Optional[dict]:
+        res = get_supabase_admin().table("solana_memo_cache") \
+            .select("memo,slot,block_time") \
+            .eq("tx_signature", tx_signature) \
+            .execute()
+        return res.data[0] if res.data else None
+
+    def _store(self, tx_signature: str, entry: dict) -> None:
+        get_supabase_admin().table("solana_memo_cache").upsert(
+            {"tx_signature": tx_signature, **entry},
+            on_conflict="tx_signature",
+        ).execute()
+
+    async def get(self, tx_signature: str) -> Optional[dict]:
+        """Cached {memo, slot, block_time} for a finalized signature, or None."""
+        entry = self._entries.get(tx_signature)
+        if entry is not None:
+            self._entries.move_to_end(tx_signature)
+            self.hits += 1
+            return entry
+
+        loop = asyncio.get_running_loop()
+        try:
+            entry = await loop.run_in_executor(None, self._load, tx_signature)
+        except Exception as e:
+            logger.warning("Memo cache lookup failed for %s: %s", tx_signature, e)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        self._remember(tx_signature, entry)
+        return entry
+
+    async def put(self, tx_signature: str, entry: dict) -> None:
+        """Cache a memo read at Finalized commitment. Never call for weaker commitments."""
+        self._remember(tx_signature, entry)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._store, tx_signature, entry)
+        except Exception as e:
+            logger.warning("Memo cache write failed for %s: %s", tx_signature, e)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+        }
+
+
+memo_cache = MemoCache()
@@ -0,0 +1,135 @@
+"""
+RBAC Scope Map
+==============
+In-memory district → province membership used by RoleChecker's scope
+checks, so deciding whether a PROVINCE_ADMIN may see a district costs no
+database round-trip.
+
+- Built from `district_allocation` joined to `province_allocation` (the
+  same relation the dashboard used to walk per request), loaded in the
+  lifespan and rebuilt every RBAC_SCOPE_REFRESH_SECONDS or right after
+  `invalidate()` — call it from anything that writes allocations.
+- A district missing from the map (allocated after the last rebuild) is
+  looked up directly once and remembered until the next rebuild.
+- Until the first load succeeds every lookup goes to the database, so a
+  failed load never opens access.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+
+logger = logging.getLogger(__name__)
+
+RBAC_SCOPE_REFRESH_SECONDS = float(os.getenv("RBAC_SCOPE_REFRESH_SECONDS", "300"))
+RBAC_SCOPE_PAGE_SIZE = 1000
+
+
+def _fetch_all(table: str, columns: str) -> list[dict]:
+    supabase = get_supabase_admin()
+    rows, offset = [], 0
+    while True:
+        res = supabase.table(table).select(columns).range(offset, offset + RBAC_SCOPE_PAGE_SIZE - 1).execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < RBAC_SCOPE_PAGE_SIZE:
+            return rows
+        offset += RBAC_SCOPE_PAGE_SIZE
+
+
+def _fetch_district_province(district_id: int) -> Optional[int]:
+    """Province of one district via its allocation, or None if it has none."""
+    supabase = get_supabase_admin()
+    dist_res = supabase.table("district_allocation").select("province_allocation_id") \
+        .eq("district_id", district_id).limit(1).execute()
+    if not dist_res.data:
+        return None
+    pa_res = supabase.table("province_allocation").select("province_id") \
+        .eq("id", dist_res.data[0]["province_allocation_id"]).limit(1).execute()
+    return pa_res.data[0]["province_id"] if pa_res.data else None
+
+
+class DistrictScope:
+    def __init__(self, refresh_seconds: float = RBAC_SCOPE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._province_of: dict[int, Optional[int]] = {}
+        self._loaded_at: Optional[float] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._reload: Optional[asyncio.Event] = None
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._reload = asyncio.Event()
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    def invalidate(self) -> None:
+        """Rebuild the map now (allocations changed)."""
+        if self._reload is not None:
+            self._reload.set()
+
+    def stats(self) -> dict:
+        return {
+            "districts": len(self._province_of),
+            "loaded_seconds_ago": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            "last_error": self._last_error,
+        }
+
+    def _build(self) -> dict[int, Optional[int]]:
+        provinces = {
+            row["id"]: row["province_id"]
+            for row in _fetch_all("province_allocation", "id,province_id")
+        }
+        return {
+            row["district_id"]: provinces.get(row["province_allocation_id"])
+            for row in _fetch_all("district_allocation", "district_id,province_allocation_id")
+        }
+
+    async def load(self) -> int:
+        self._province_of = await asyncio.get_running_loop().run_in_executor(None, self._build)
+        self._loaded_at = time.monotonic()
+        return len(self._province_of)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.load()
+                self._last_error = None
+            except Exception as e:
+                self._last_error = str(e)
+                logger.warning("RBAC scope map load failed: %s", e)
+            try:
+                await asyncio.wait_for(self._reload.wait(), timeout=self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._reload.clear()
+
+    # ── lookups ──────────────────────────────────────────────────────────────
+
+    async def province_of(self, district_id: int) -> Optional[int]:
+        """Province a district is allocated under, or None if it has no allocation."""
+        if district_id in self._province_of:
+            return self._province_of[district_id]
+        province_id = await asyncio.get_running_loop().run_in_executor(None, _fetch_district_province, district_id)
+        if self._loaded_at is not None:
+            self._province_of[district_id] = province_id
+        return province_id
+
+
+district_scope = DistrictScope()
@@ -0,0 +1,169 @@
+"""
+Streaming Export of relief_records
+==================================
+GET /records/export pages through `relief_records` (keyset on id, like
+/blockchain/verify-bulk) and encodes each page as soon as it arrives, so the
+server holds at most two pages regardless of table size: the one being
+encoded and the next one, which is fetched meanwhile.
+
+- csv    — header row, then one line per record
+- ndjson — one JSON object per line
+- parquet — one row group per page (needs pyarrow)
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional
+
+from app.db.supabase import get_supabase_admin
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+
+# Flat columns only (merkle_proof is a nested list)
+EXPORT_COLUMNS = [
+    "id", "full_name", "citizenship_no", "relief_amount", "province", "district",
+    "disaster_type", "officer_name", "officer_id", "created_at", "updated_at",
+    "record_hash", "solana_tx_signature", "merkle_root",
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def fetch_export_page(filters: dict, after_id: Optional[str]) -> list[dict]:
+    query = get_supabase_admin().table("relief_records").select(",".join(EXPORT_COLUMNS))
+    for column, value in filters.items():
+        if value:
+            query = query.eq(column, value)
+    if after_id:
+        query = query.gt("id", after_id)
+    return query.order("id").limit(EXPORT_PAGE_SIZE).execute().data or []
+
+
+async def _pages(filters: dict) -> AsyncIterator[list[dict]]:
+    """Yield pages in id order, fetching the next page while the caller encodes this one."""
+    loop = asyncio.get_running_loop()
+    pending = loop.run_in_executor(None, fetch_export_page, filters, None)
+    while True:
+        rows = await pending
+        if len(rows) == EXPORT_PAGE_SIZE:
+            pending = loop.run_in_executor(None, fetch_export_page, filters, rows[-1]["id"])
+        else:
+            pending = None
+        if rows:
+            yield rows
+        if pending is None:
+            return
+
+
+# ── encoders: page → bytes ───────────────────────────────────────────────────
+
+def _csv_encoder() -> Callable[[list[dict]], bytes]:
+    header = [True]
+
+    def encode(rows: list[dict]) -> bytes:
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        if header[0]:
+            writer.writeheader()
+            header[0] = False
+        writer.writerows(rows)
+        return buf.getvalue().encode("utf-8")
+
+    return encode
+
+
+def _ndjson_encode(rows: list[dict]) -> bytes:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last take()."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class _ParquetEncoder:
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("relief_amount", pa.float64()) if c == "relief_amount"
+            else (c, pa.timestamp("us", tz="UTC")) if c in ("created_at", "updated_at")
+            else (c, pa.string())
+            for c in EXPORT_COLUMNS
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def encode(self, rows: list[dict]) -> bytes:
+        columns = {}
+        for c in EXPORT_COLUMNS:
+            values = [r.get(c) for r in rows]
+            if c in ("created_at", "updated_at"):
+                values = [_timestamp(v) for v in values]
+            elif c == "relief_amount":
+                values = [float(v) if v is not None else None for v in values]
+            columns[c] = values
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def export_records(fmt: str, filters: dict) -> AsyncIterator[bytes]:
+    """Encoded export, chunk by chunk (one chunk per page)."""
+    if fmt == "parquet":
+        encoder = _ParquetEncoder()
+        async for rows in _pages(filters):
+            yield encoder.encode(rows)
+        yield encoder.close()
+        return
+
+    encode = _csv_encoder() if fmt == "csv" else _ndjson_encode
+    wrote_any = False
+    async for rows in _pages(filters):
+        wrote_any = True
+        yield encode(rows)
+    if fmt == "csv" and not wrote_any:
+        yield encode([])  # header only
@@ -0,0 +1,262 @@
+"""
+Local Hash-Chained Record Ledger
+================================
+Tamper evidence at insert time without a network call to Solana.
+
+- `append_to_ledger()` chains new records into `record_ledger` (one RPC
+  call; the chain head is locked in Postgres so workers never fork it).
+- `LedgerCheckpointer` runs in the lifespan. Every
+  LEDGER_CHECKPOINT_SECONDS it chains records that were inserted outside the
+  API, then anchors the current head on Solana as a checkpoint
+  (NDRRMA|CHAIN|<seq>|<hash>).
+- `verify_ledger_range()` re-walks a seq range locally: chain links, current
+  record hashes, and the checkpoints inside the range (optionally against the
+  decoded on-chain memo, which is cached).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+from app.services.blockchain_service import (
+    CHAIN_GENESIS_HASH,
+    anchor_chain_checkpoint,
+    get_explorer_url,
+    get_finalized_memo,
+    hash_record,
+    parse_memo,
+    verify_chain,
+)
+
+logger = logging.getLogger(__name__)
+
+LEDGER_CHECKPOINT_SECONDS = float(os.getenv("LEDGER_CHECKPOINT_SECONDS", "300"))
+LEDGER_BACKFILL_BATCH = int(os.getenv("LEDGER_BACKFILL_BATCH", "500"))
+# A claimed checkpoint still unsent after this long is retried by any worker
+LEDGER_CLAIM_STALE_SECONDS = int(os.getenv("LEDGER_CLAIM_STALE_SECONDS", "600"))
+LEDGER_PAGE_SIZE = 1000
+LEDGER_MAX_REPORTED = 1000
+
+
+def append_to_ledger(records: list[dict]) -> list[dict]:
+    """Chain records (in order) and return their new ledger entries."""
+    entries = [{"record_id": str(r["id"]), "record_hash": hash_record(r)} for r in records]
+    if not entries:
+        return []
+    res = get_supabase_admin().rpc("append_record_ledger", {"entries": entries}).execute()
+    return res.data or []
+
+
+def get_ledger_head() -> dict:
+    res = get_supabase_admin().table("record_ledger_head").select("seq,chain_hash").execute()
+    return res.data[0] if res.data else {"seq": 0, "chain_hash": CHAIN_GENESIS_HASH}
+
+
+def get_latest_checkpoint() -> Optional[dict]:
+    res = get_supabase_admin().table("ledger_checkpoints") \
+        .select("*") \
+        .not_.is_("tx_signature", "null") \
+        .order("seq", desc=True) \
+        .limit(1) \
+        .execute()
+    return res.data[0] if res.data else None
+
+
+def _fetch_range(from_seq: int, to_seq: int) -> list[dict]:
+    res = get_supabase_admin().rpc("record_ledger_range", {"from_seq": from_seq, "to_seq": to_seq}).execute()
+    return res.data or []
+
+
+def _fetch_prev(seq: int) -> tuple[str, int]:
+    """(chain_hash, seq) of the entry before `seq` — genesis for seq 1."""
+    if seq <= 1:
+        return CHAIN_GENESIS_HASH, 0
+    res = get_supabase_admin().table("record_ledger").select("seq,chain_hash").eq("seq", seq - 1).execute()
+    if not res.data:
+        raise ValueError(f"Ledger entry {seq - 1} not found")
+    return res.data[0]["chain_hash"], seq - 1
+
+
+def _fetch_checkpoints(from_seq: int, to_seq: int) -> list[dict]:
+    res = get_supabase_admin().table("ledger_checkpoints") \
+        .select("*") \
+        .gte("seq", from_seq) \
+        .lte("seq", to_seq) \
+        .not_.is_("tx_signature", "null") \
+        .order("seq") \
+        .execute()
+    return res.data or []
+
+
+async def _verify_checkpoint_on_chain(checkpoint: dict) -> dict:
+    try:
+        entry, cached = await get_finalized_memo(checkpoint["tx_signature"])
+    except Exception as e:
+        return {"verified": None, "error": f"RPC error: {str(e)}"}
+    if entry is None:
+        return {"verified": False, "error": "Transaction not found on chain (or not finalized yet)"}
+    memo = parse_memo(entry["memo"])
+    verified = bool(memo) and memo["kind"] == "chain" \
+        and memo["seq"] == checkpoint["seq"] and memo["chain_hash"] == checkpoint["chain_hash"]
+    return {"verified": verified, "cached": cached, "error": None if verified else "Checkpoint memo does not match"}
+
+
+async def verify_ledger_range(from_seq: int, to_seq: Optional[int] = None, on_chain: bool = False) -> dict:
+    """
+    Verify ledger entries from_seq..to_seq (default: up to the head) with one
+    linear scan: every chain link, every record's current hash against the
+    hash chained at insert, and every checkpoint in the range.
+    """
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+
+    head = await loop.run_in_executor(None, get_ledger_head)
+    to_seq = min(to_seq or head["seq"], head["seq"])
+    prev_hash, prev_seq = await loop.run_in_executor(None, _fetch_prev, from_seq)
+
+    chain_at: dict[int, str] = {}
+    breaks: list[dict] = []
+    tampered: list[dict] = []
+    missing: list[str] = []
+    checked = 0
+
+    for page_start in range(from_seq, to_seq + 1, LEDGER_PAGE_SIZE):
+        page_end = min(page_start + LEDGER_PAGE_SIZE - 1, to_seq)
+        entries = await loop.run_in_executor(None, _fetch_range, page_start, page_end)
+        if not entries:
+            breaks.append({"seq": page_start, "reason": f"entries {page_start}-{page_end} missing"})
+            continue
+
+        breaks.extend(verify_chain(entries, prev_hash, prev_seq))
+        prev_hash, prev_seq = entries[-1]["chain_hash"], entries[-1]["seq"]
+
+        for entry in entries:
+            checked += 1
+            chain_at[entry["seq"]] = entry["chain_hash"]
+            record = entry.get("record")
+            if record is None:
+                missing.append(str(entry["record_id"]))
+                continue
+            current_hash = hash_record(record)
+            if current_hash != entry["record_hash"]:
+                tampered.append({
+                    "seq": entry["seq"],
+                    "record_id": str(entry["record_id"]),
+                    "ledger_hash": entry["record_hash"],
+                    "current_hash": current_hash,
+                })
+
+    checkpoints = []
+    for checkpoint in await loop.run_in_executor(None, _fetch_checkpoints, from_seq, to_seq):
+        result = {
+            "seq": checkpoint["seq"],
+            "tx_signature": checkpoint["tx_signature"],
+            "explorer_url": get_explorer_url(checkpoint["tx_signature"]),
+            "matches_ledger": chain_at.get(checkpoint["seq"]) == checkpoint["chain_hash"],
+        }
+        if on_chain:
+            result["on_chain"] = await _verify_checkpoint_on_chain(checkpoint)
+        checkpoints.append(result)
+
+    return {
+        "from_seq": from_seq,
+        "to_seq": to_seq,
+        "head_seq": head["seq"],
+        "checked": checked,
+        "chain_valid": not breaks,
+        "verified": not breaks and not tampered and not missing
+                    and all(c["matches_ledger"] for c in checkpoints)
+                    and all((c.get("on_chain") or {}).get("verified") is not False for c in checkpoints),
+        "chain_breaks": breaks[:LEDGER_MAX_REPORTED],
+        "tampered_records": tampered[:LEDGER_MAX_REPORTED],
+        "missing_records": missing[:LEDGER_MAX_REPORTED],
+        "checkpoints": checkpoints,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class LedgerCheckpointer:
+    """Backfills unchained records and anchors the chain head periodically."""
+
+    def __init__(self, interval_seconds: float = LEDGER_CHECKPOINT_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._runner: Optional[asyncio.Task] = None
+        self._last_checkpoint: Optional[dict] = None
+        self._backfilled = 0
+        self._last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._runner is not None and not self._runner.done(),
+            "interval_seconds": self.interval_seconds,
+            "backfilled": self._backfilled,
+            "last_checkpoint": self._last_checkpoint,
+            "last_error": self._last_error,
+        }
+
+    def _backfill(self) -> int:
+        supabase = get_supabase_admin()
+        total = 0
+        while True:
+            res = supabase.rpc("unledgered_records", {"batch_size": LEDGER_BACKFILL_BATCH}).execute()
+            records = res.data or []
+            if records:
+                total += len(append_to_ledger(records))
+            if len(records) < LEDGER_BACKFILL_BATCH:
+                return total
+
+    def _claim(self) -> Optional[dict]:
+        res = get_supabase_admin().rpc("claim_ledger_checkpoint", {
+            "p_stale_seconds": LEDGER_CLAIM_STALE_SECONDS,
+        }).execute()
+        return res.data[0] if res.data else None
+
+    def _finish(self, seq: int, tx_signature: Optional[str]) -> None:
+        table = get_supabase_admin().table("ledger_checkpoints")
+        if tx_signature:
+            table.update({"tx_signature": tx_signature}).eq("seq", seq).execute()
+        else:
+            # Give the claim back so the next round retries this head
+            table.delete().eq("seq", seq).execute()
+
+    async def checkpoint(self) -> Optional[dict]:
+        """Backfill, then anchor the head if it moved since the last checkpoint."""
+        loop = asyncio.get_running_loop()
+        self._backfilled += await loop.run_in_executor(None, self._backfill)
+        claimed = await loop.run_in_executor(None, self._claim)
+        if claimed is None:
+            return None
+        tx_signature = await anchor_chain_checkpoint(claimed["seq"], claimed["chain_hash"])
+        await loop.run_in_executor(None, self._finish, claimed["seq"], tx_signature)
+        if tx_signature:
+            self._last_checkpoint = {**claimed, "tx_signature": tx_signature}
+        return self._last_checkpoint
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                self._last_error = str(e)
+                logger.warning("Ledger checkpoint failed: %s", e)
+            await asyncio.sleep(self.interval_seconds)
+
+
+ledger_checkpointer = LedgerCheckpointer()
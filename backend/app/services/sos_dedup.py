@@ -0,0 +1,210 @@
+"""
+SOS Duplicate Suppression
+=========================
+Sliding-window deduplicator in front of POST /sos/request.
+
+- Taps are keyed on the contact number plus a rounded GPS cell
+  (SOS_DEDUP_CELL_DECIMALS=3, roughly 100 m). A tap whose key was seen
+  within SOS_DEDUP_WINDOW_SECONDS merges into that request and slides the
+  window forward, so a citizen tapping every few seconds never spawns a
+  second row. Taps without a usable contact number are never merged: two
+  anonymous callers in one building are two emergencies.
+- Merged taps are not written one by one. They are coalesced per request
+  and applied with one `bump_sos_taps` call (see migrations/sos_dedup.sql)
+  every SOS_DEDUP_FLUSH_SECONDS; the updated rows go to the live feed.
+- Closing a request (resolved / cancelled) forgets it, so a later tap opens
+  a new one.
+
+The window is per process; with several API workers a repeat tap that lands
+on another worker still creates a row.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+from app.services.sos_feed import sos_feed
+
+logger = logging.getLogger(__name__)
+
+SOS_DEDUP_WINDOW_SECONDS = float(os.getenv("SOS_DEDUP_WINDOW_SECONDS", "120"))
+SOS_DEDUP_CELL_DECIMALS = int(os.getenv("SOS_DEDUP_CELL_DECIMALS", "3"))
+SOS_DEDUP_FLUSH_SECONDS = float(os.getenv("SOS_DEDUP_FLUSH_SECONDS", "2"))
+SOS_DEDUP_MAX_KEYS = 100_000
+# Bumps for a request that still is not in the table after this long are dropped
+SOS_DEDUP_MAX_BUMP_AGE_SECONDS = 600
+
+
+def normalize_contact(contact: Optional[str]) -> Optional[str]:
+    """Digits only, without the Nepal country code; None if unusable."""
+    digits = re.sub(r"\D", "", contact or "")
+    if digits.startswith("977") and len(digits) > 10:
+        digits = digits[3:]
+    return digits if len(digits) >= 7 else None
+
+
+def dedup_key(contact: Optional[str], lat: Optional[float], lng: Optional[float]) -> Optional[tuple]:
+    phone = normalize_contact(contact)
+    if phone is None:
+        return None
+    if lat is None or lng is None:
+        return (phone, None)
+    return (phone, round(lat, SOS_DEDUP_CELL_DECIMALS), round(lng, SOS_DEDUP_CELL_DECIMALS))
+
+
+class SOSDeduplicator:
+    def __init__(
+        self,
+        window_seconds: float = SOS_DEDUP_WINDOW_SECONDS,
+        flush_seconds: float = SOS_DEDUP_FLUSH_SECONDS,
+        max_keys: int = SOS_DEDUP_MAX_KEYS,
+    ):
+        self.window_seconds = window_seconds
+        self.flush_seconds = flush_seconds
+        self.max_keys = max_keys
+        # key -> {"request_id", "taps", "last_seen"}; ordered by last_seen
+        self._recent: OrderedDict[tuple, dict] = OrderedDict()
+        self._by_request: dict[str, tuple] = {}
+        # request_id -> {"taps", "last_tap_at", "since"} waiting to be written
+        self._bumps: dict[str, dict] = {}
+        self._runner: Optional[asyncio.Task] = None
+
+        self.merged = 0
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("Dropping %d unwritten SOS tap counts: %s", len(self._bumps), e)
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "tracked": len(self._recent),
+            "merged_taps": self.merged,
+            "unwritten_bumps": len(self._bumps),
+            "last_error": self._last_error,
+        }
+
+    # ── window ───────────────────────────────────────────────────────────────
+
+    def _expire(self, now: float) -> None:
+        while self._recent:
+            key, entry = next(iter(self._recent.items()))
+            if now - entry["last_seen"] <= self.window_seconds and len(self._recent) <= self.max_keys:
+                return
+            self._recent.popitem(last=False)
+            self._by_request.pop(entry["request_id"], None)
+
+    def check(self, key: Optional[tuple], request_id: Optional[str] = None) -> Optional[dict]:
+        """
+        If `key` tapped within the window, merge this tap and return
+        {"request_id", "tap_count"} of the open request; otherwise None.
+        A client retry of the open request itself (same `request_id`) is
+        not counted as another tap.
+        """
+        if key is None:
+            return None
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        if entry["request_id"] == request_id:
+            return {"request_id": entry["request_id"], "tap_count": entry["taps"]}
+
+        entry["taps"] += 1
+        entry["last_seen"] = now
+        self._recent.move_to_end(key)
+        self.merged += 1
+
+        bump = self._bumps.setdefault(entry["request_id"], {"taps": 0, "since": now})
+        bump["taps"] += 1
+        bump["last_tap_at"] = datetime.now(timezone.utc).isoformat()
+        return {"request_id": entry["request_id"], "tap_count": entry["taps"]}
+
+    def remember(self, key: Optional[tuple], request_id: str) -> None:
+        """Open a window for a newly accepted request."""
+        if key is None:
+            return
+        self._recent[key] = {"request_id": request_id, "taps": 1, "last_seen": time.monotonic()}
+        self._recent.move_to_end(key)
+        self._by_request[request_id] = key
+        self._expire(time.monotonic())
+
+    def forget(self, request_id: str) -> None:
+        """The request was closed; the next tap should open a new one."""
+        key = self._by_request.pop(request_id, None)
+        if key is not None:
+            self._recent.pop(key, None)
+
+    # ── coalesced writes ─────────────────────────────────────────────────────
+
+    def _apply(self, bumps: dict[str, dict]) -> list[dict]:
+        taps = [{"id": rid, "taps": b["taps"], "last_tap_at": b["last_tap_at"]} for rid, b in bumps.items()]
+        res = get_supabase_admin().rpc("bump_sos_taps", {"taps": taps}).execute()
+        return res.data or []
+
+    async def flush(self) -> int:
+        if not self._bumps:
+            return 0
+        bumps, self._bumps = self._bumps, {}
+        loop = asyncio.get_running_loop()
+        try:
+            updated = await loop.run_in_executor(None, self._apply, bumps)
+        except Exception:
+            self._requeue(bumps)
+            raise
+
+        written = {str(row["id"]) for row in updated}
+        for row in updated:
+            sos_feed.publish("updated", row)
+        # Requests still in the write-behind journal are not in the table yet
+        now = time.monotonic()
+        self._requeue({
+            rid: b for rid, b in bumps.items()
+            if rid not in written and now - b["since"] < SOS_DEDUP_MAX_BUMP_AGE_SECONDS
+        })
+        return len(written)
+
+    def _requeue(self, bumps: dict[str, dict]) -> None:
+        for rid, b in bumps.items():
+            current = self._bumps.get(rid)
+            if current is None:
+                self._bumps[rid] = b
+            else:
+                current["taps"] += b["taps"]
+                current["since"] = min(current["since"], b["since"])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                self._last_error = str(e)
+                logger.warning("SOS tap count flush failed: %s", e)
+
+
+sos_dedup = SOSDeduplicator()
@@ -0,0 +1,231 @@
+"""
+SOS Live Feed
+=============
+Fan-out hub behind GET /sos/stream (Server-Sent Events).
+
+- One upstream feed per process: if SOS_FEED_DATABASE_URL (a direct Postgres
+  URL for the Supabase database) is set, a single asyncpg connection
+  LISTENs on `sos_events` (see migrations/sos_feed.sql), so writes made by
+  any API worker reach every dashboard. Without it, the SOS endpoints
+  publish their own committed writes in-process.
+- Every dashboard gets a bounded queue; a province subscription only
+  receives that province's requests. A subscriber that falls too far behind
+  gets a single `resync` event (refetch the list) instead of unbounded memory.
+- Events carry a monotonically increasing id and the last SOS_FEED_REPLAY
+  events are kept, so a reconnecting EventSource (Last-Event-ID) misses
+  nothing. The SSE id is "<epoch>-<n>" with a per-process epoch: an id from
+  before a restart or from another worker can't be replayed from here, so
+  it gets a `resync` instead.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from typing import Callable, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SOS_FEED_DATABASE_URL = os.getenv("SOS_FEED_DATABASE_URL")
+SOS_FEED_CHANNEL = "sos_events"
+SOS_FEED_QUEUE_SIZE = int(os.getenv("SOS_FEED_QUEUE_SIZE", "256"))
+SOS_FEED_REPLAY = int(os.getenv("SOS_FEED_REPLAY", "1000"))
+SOS_FEED_RECONNECT_SECONDS = 5
+
+# Approximate province centroids, used when an SOS arrives with GPS only
+PROVINCE_CENTROIDS = {
+    "Koshi": (27.05, 87.30),
+    "Madhesh": (26.85, 85.90),
+    "Bagmati": (27.70, 85.35),
+    "Gandaki": (28.30, 84.05),
+    "Lumbini": (27.90, 82.85),
+    "Karnali": (29.20, 82.20),
+    "Sudurpashchim": (29.30, 80.90),
+}
+NEPAL_BBOX = ((26.30, 30.50), (80.00, 88.25))
+
+
+def normalize_province(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    cleaned = name.strip().lower().removesuffix(" province")
+    for province in PROVINCE_CENTROIDS:
+        if province.lower() == cleaned:
+            return province
+    return None
+
+
+def nearest_province(lat: Optional[float], lng: Optional[float]) -> Optional[str]:
+    """Province with the closest centroid, or None outside Nepal / without GPS."""
+    if lat is None or lng is None:
+        return None
+    (lat_min, lat_max), (lng_min, lng_max) = NEPAL_BBOX
+    if not (lat_min <= lat <= lat_max and lng_min <= lng <= lng_max):
+        return None
+    return min(
+        PROVINCE_CENTROIDS,
+        key=lambda p: (PROVINCE_CENTROIDS[p][0] - lat) ** 2 + (PROVINCE_CENTROIDS[p][1] - lng) ** 2,
+    )
+
+
+class Subscription:
+    def __init__(self, province: Optional[str]):
+        self.province = province
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SOS_FEED_QUEUE_SIZE)
+
+    def wants(self, event: dict) -> bool:
+        if self.province is None or event["type"] == "resync":
+            return True
+        return (event["request"].get("province") or "").lower() == self.province.lower()
+
+    def offer(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog and tell it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync"})
+
+
+class SOSFeed:
+    def __init__(self, database_url: Optional[str] = SOS_FEED_DATABASE_URL):
+        self.database_url = database_url
+        self._subscribers: set[Subscription] = set()
+        self._listeners: list[Callable[[dict], None]] = []
+        self._recent: deque = deque(maxlen=SOS_FEED_REPLAY)
+        self._next_id = 1
+        self.epoch = uuid.uuid4().hex[:8]
+        self._listener: Optional[asyncio.Task] = None
+        self._upstream_connected = False
+        self.published = 0
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self.database_url and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for sub in list(self._subscribers):
+            sub.offer({"id": self._next_id, "type": "resync"})
+
+    @property
+    def upstream(self) -> bool:
+        """True when events come from the database NOTIFY feed."""
+        return self.database_url is not None
+
+    async def _listen(self) -> None:
+        def on_notify(_conn, _pid, _channel, payload):
+            try:
+                self._publish(json.loads(payload))
+            except Exception as e:
+                logger.warning("Bad SOS notification: %s", e)
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.database_url)
+                await conn.add_listener(SOS_FEED_CHANNEL, on_notify)
+                self._upstream_connected = True
+                logger.info("SOS feed listening on %s", SOS_FEED_CHANNEL)
+                while not conn.is_closed():
+                    await asyncio.sleep(SOS_FEED_RECONNECT_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("SOS feed upstream error: %s", e)
+            finally:
+                self._upstream_connected = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            # Dashboards may have missed events while we were disconnected
+            self._broadcast_resync()
+            await asyncio.sleep(SOS_FEED_RECONNECT_SECONDS)
+
+    # ── publish / subscribe ──────────────────────────────────────────────────
+
+    def _publish(self, event: dict) -> None:
+        event = {"id": self._next_id, "type": event["type"], "request": event["request"]}
+        self._next_id += 1
+        self.published += 1
+        self._recent.append(event)
+        self._notify_listeners(event)
+        for sub in self._subscribers:
+            if sub.wants(event):
+                sub.offer(event)
+
+    def _broadcast_resync(self) -> None:
+        event = {"id": self._next_id, "type": "resync"}
+        self._notify_listeners(event)
+        for sub in self._subscribers:
+            sub.offer(event)
+
+    def _notify_listeners(self, event: dict) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning("SOS feed listener failed: %s", e)
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """In-process consumer called synchronously with every event (incl. resync)."""
+        self._listeners.append(listener)
+
+    def publish(self, event_type: str, request: dict) -> None:
+        """
+        Called by the SOS endpoints after a committed write. A no-op when the
+        database feed is the source (the NOTIFY trigger delivers it instead).
+        """
+        if not self.upstream:
+            self._publish({"type": event_type, "request": request})
+
+    def sse_id(self, event: dict) -> str:
+        return f"{self.epoch}-{event['id']}"
+
+    def _parse_last_event_id(self, last_event_id: str) -> Optional[int]:
+        """Event number from a Last-Event-ID of this process; None if it is from elsewhere."""
+        epoch, _, number = last_event_id.partition("-")
+        if epoch != self.epoch or not number.isdigit() or int(number) >= self._next_id:
+            return None
+        return int(number)
+
+    def subscribe(self, province: Optional[str] = None, last_event_id: Optional[str] = None) -> Subscription:
+        sub = Subscription(province)
+        if last_event_id:
+            seen = self._parse_last_event_id(last_event_id)
+            oldest = self._recent[0]["id"] if self._recent else self._next_id
+            if seen is None or seen + 1 < oldest:
+                sub.offer({"id": self._next_id, "type": "resync"})
+            else:
+                for event in self._recent:
+                    if event["id"] > seen and sub.wants(event):
+                        sub.offer(event)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {
+            "source": "postgres_notify" if self.upstream else "in_process",
+            "upstream_connected": self._upstream_connected if self.upstream else None,
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "last_event_id": self._next_id - 1,
+        }
+
+
+sos_feed = SOSFeed()
@@ -0,0 +1,302 @@
+"""
+SOS Geo Index
+=============
+In-memory grid index of open SOS requests behind the dispatch endpoints
+(GET /sos/area, /sos/clusters, /sos/nearest).
+
+- Open requests (pending / acknowledged / dispatched) with GPS are bucketed
+  into SOS_GEO_CELL_DEGREES grid cells (~5 km). Bounding-box queries only
+  touch overlapping cells; nearest-to-a-team queries search outward ring by
+  ring and stop as soon as no closer request can exist.
+- Loaded from sos_requests at startup, then kept current from the SOS live
+  feed (every created / updated event). A feed `resync` (or every
+  SOS_GEO_REFRESH_SECONDS as a safety net) reloads it from the table.
+- Resolved / cancelled requests leave the index.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+from app.services.sos_feed import sos_feed
+
+logger = logging.getLogger(__name__)
+
+SOS_GEO_CELL_DEGREES = float(os.getenv("SOS_GEO_CELL_DEGREES", "0.05"))
+SOS_GEO_REFRESH_SECONDS = float(os.getenv("SOS_GEO_REFRESH_SECONDS", "300"))
+SOS_GEO_PAGE_SIZE = 1000
+OPEN_STATUSES = ("pending", "acknowledged", "dispatched")
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class SOSGeoIndex:
+    def __init__(self, cell_degrees: float = SOS_GEO_CELL_DEGREES, refresh_seconds: float = SOS_GEO_REFRESH_SECONDS):
+        self.cell_degrees = cell_degrees
+        self.refresh_seconds = refresh_seconds
+        self._requests: dict[str, dict] = {}
+        self._cell_of: dict[str, tuple[int, int]] = {}
+        self._cells: dict[tuple[int, int], set[str]] = defaultdict(set)
+        self._runner: Optional[asyncio.Task] = None
+        self._reload: Optional[asyncio.Event] = None  # set by a feed resync
+        self._loading: Optional[list[dict]] = None  # events seen while a load is in flight
+        self._loaded_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        self._reload = asyncio.Event()
+        sos_feed.add_listener(self._on_event)
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    def stats(self) -> dict:
+        return {
+            "open_requests": len(self._requests),
+            "cells": len(self._cells),
+            "cell_degrees": self.cell_degrees,
+            "loaded_seconds_ago": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            "last_error": self._last_error,
+        }
+
+    def _fetch_open(self) -> list[dict]:
+        supabase = get_supabase_admin()
+        rows, offset = [], 0
+        while True:
+            res = supabase.table("sos_requests") \
+                .select("*") \
+                .in_("status", list(OPEN_STATUSES)) \
+                .not_.is_("gps_lat", "null") \
+                .order("created_at") \
+                .range(offset, offset + SOS_GEO_PAGE_SIZE - 1) \
+                .execute()
+            page = res.data or []
+            rows.extend(page)
+            if len(page) < SOS_GEO_PAGE_SIZE:
+                return rows
+            offset += SOS_GEO_PAGE_SIZE
+
+    async def load(self) -> int:
+        self._loading = []
+        try:
+            rows = await asyncio.get_running_loop().run_in_executor(None, self._fetch_open)
+            buffered = self._loading
+        finally:
+            self._loading = None
+        self._requests.clear()
+        self._cell_of.clear()
+        self._cells.clear()
+        for row in rows:
+            self.upsert(row)
+        # Changes that raced the snapshot are newer than it
+        for row in buffered:
+            self.upsert(row)
+        self._loaded_at = time.monotonic()
+        return len(self._requests)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.load()
+                self._last_error = None
+            except Exception as e:
+                self._last_error = str(e)
+                logger.warning("SOS geo index load failed: %s", e)
+            try:
+                await asyncio.wait_for(self._reload.wait(), timeout=self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._reload.clear()
+
+    def _on_event(self, event: dict) -> None:
+        if event["type"] == "resync":
+            self._reload.set()
+            return
+        self.upsert(event["request"])
+        if self._loading is not None:
+            self._loading.append(event["request"])
+
+    # ── maintenance ──────────────────────────────────────────────────────────
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def remove(self, request_id: str) -> None:
+        self._requests.pop(request_id, None)
+        cell = self._cell_of.pop(request_id, None)
+        if cell is not None:
+            members = self._cells[cell]
+            members.discard(request_id)
+            if not members:
+                del self._cells[cell]
+
+    def upsert(self, row: dict) -> None:
+        request_id = str(row["id"])
+        if row.get("status") not in OPEN_STATUSES or row.get("gps_lat") is None or row.get("gps_long") is None:
+            self.remove(request_id)
+            return
+        cell = self._cell(row["gps_lat"], row["gps_long"])
+        if self._cell_of.get(request_id) != cell:
+            self.remove(request_id)
+            self._cell_of[request_id] = cell
+            self._cells[cell].add(request_id)
+        self._requests[request_id] = row
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def _matching(self, ids, statuses: Optional[tuple]):
+        for request_id in ids:
+            row = self._requests[request_id]
+            if statuses is None or row["status"] in statuses:
+                yield row
+
+    def in_bbox(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+        statuses: Optional[tuple] = None,
+    ) -> list[dict]:
+        (i0, j0), (i1, j1) = self._cell(min_lat, min_lng), self._cell(max_lat, max_lng)
+        rows = []
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+            # Box larger than the occupied area: walk the occupied cells instead
+            cells = [c for c in self._cells if i0 <= c[0] <= i1 and j0 <= c[1] <= j1]
+        else:
+            cells = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self._cells]
+        for cell in cells:
+            for row in self._matching(self._cells[cell], statuses):
+                if min_lat <= row["gps_lat"] <= max_lat and min_lng <= row["gps_long"] <= max_lng:
+                    rows.append(row)
+        rows.sort(key=lambda r: r.get("created_at") or "")
+        return rows
+
+    def clusters(
+        self, cell_degrees: float, statuses: Optional[tuple] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+    ) -> list[dict]:
+        """Open requests aggregated into `cell_degrees` cells, busiest first."""
+        rows = self.in_bbox(*bbox, statuses) if bbox else list(self._matching(self._requests, statuses))
+        groups: dict[tuple[int, int], list[dict]] = defaultdict(list)
+        for row in rows:
+            groups[(math.floor(row["gps_lat"] / cell_degrees), math.floor(row["gps_long"] / cell_degrees))].append(row)
+
+        clusters = []
+        for (i, j), members in groups.items():
+            by_status: dict[str, int] = defaultdict(int)
+            for row in members:
+                by_status[row["status"]] += 1
+            clusters.append({
+                "count": len(members),
+                "center": {
+                    "lat": round(sum(r["gps_lat"] for r in members) / len(members), 6),
+                    "lng": round(sum(r["gps_long"] for r in members) / len(members), 6),
+                },
+                "bounds": {
+                    "min_lat": round(i * cell_degrees, 6),
+                    "min_lng": round(j * cell_degrees, 6),
+                    "max_lat": round((i + 1) * cell_degrees, 6),
+                    "max_lng": round((j + 1) * cell_degrees, 6),
+                },
+                "by_status": dict(by_status),
+                "taps": sum(r.get("tap_count") or 1 for r in members),
+                "oldest_created_at": min((r.get("created_at") or "" for r in members), default=None) or None,
+                "request_ids": [str(r["id"]) for r in members[:50]],
+            })
+        clusters.sort(key=lambda c: c["count"], reverse=True)
+        return clusters
+
+    @staticmethod
+    def _ring(ci: int, cj: int, ring: int):
+        """Cells exactly `ring` steps (Chebyshev) from (ci, cj)."""
+        if ring == 0:
+            yield ci, cj
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+    def nearest(
+        self, lat: float, lng: float, limit: int = 10, radius_km: Optional[float] = None,
+        statuses: Optional[tuple] = ("pending",),
+    ) -> list[dict]:
+        """
+        Closest requests to (lat, lng). Searches cell rings outward and stops
+        once the next ring cannot hold anything closer than the current
+        `limit`-th best (or lies beyond `radius_km`). Once the rings walked
+        would cover more slots than there are occupied cells (a query far
+        from the data), the remaining occupied cells are scanned directly
+        instead, as in_bbox does.
+        """
+        if not self._cells:
+            return []
+        ci, cj = self._cell(lat, lng)
+        max_ring = 0
+        max_abs_lat = 0.0  # no request lies further from the equator than this
+        for i, j in self._cells:
+            max_ring = max(max_ring, abs(i - ci), abs(j - cj))
+            max_abs_lat = max(max_abs_lat, abs(i * self.cell_degrees), abs((i + 1) * self.cell_degrees))
+        # sin²(d/2R) >= cos(lat1)·cos(lat2)·sin²(Δlng/2), and a cell `ring`
+        # steps away is at least (ring - 1) cells off in latitude or longitude;
+        # the longitude case gives the smaller bound. Using the occupied
+        # latitude band keeps it from collapsing toward the poles.
+        cos_lats = math.sqrt(
+            math.cos(math.radians(min(abs(lat), 90.0))) * math.cos(math.radians(min(max_abs_lat, 90.0)))
+        )
+
+        found: list[tuple[float, dict]] = []
+
+        def collect(cell) -> None:
+            for row in self._matching(self._cells[cell], statuses):
+                distance = haversine_km(lat, lng, row["gps_lat"], row["gps_long"])
+                if radius_km is None or distance <= radius_km:
+                    found.append((distance, row))
+
+        walked = 0
+        for ring in range(max_ring + 1):
+            if ring > 0:
+                half_span = math.radians(min((ring - 1) * self.cell_degrees, 180.0)) / 2
+                lower_bound = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, cos_lats * math.sin(half_span)))
+                if radius_km is not None and lower_bound > radius_km:
+                    break
+                if len(found) >= limit and lower_bound > found[limit - 1][0]:
+                    break
+            walked += 8 * ring or 1
+            if walked > len(self._cells):
+                # Mostly empty rings from here on: scan what is left instead
+                for cell in self._cells:
+                    if max(abs(cell[0] - ci), abs(cell[1] - cj)) >= ring:
+                        collect(cell)
+                break
+            for cell in self._ring(ci, cj, ring):
+                if cell in self._cells:
+                    collect(cell)
+            found.sort(key=lambda f: f[0])
+        found.sort(key=lambda f: f[0])
+        return [{**row, "distance_km": round(distance, 3)} for distance, row in found[:limit]]
+
+
+sos_geo = SOSGeoIndex()
@@ -0,0 +1,239 @@
+"""
+SOS Write-Behind Intake
+=======================
+Decouples POST /sos/request from Supabase latency during a surge.
+
+- A request is validated, given its id up front (the client may send its own
+  UUID so retries are idempotent) and appended to a local journal file. It is
+  acknowledged as soon as the journal write is fsync'ed — appends that arrive
+  together share one fsync (group commit).
+- A background writer batch-inserts journaled requests into `sos_requests`
+  (upsert on id, so a batch replayed after a crash never duplicates rows),
+  then advances a committed-offset file and publishes the rows to the live
+  feed. Failed batches stay in memory and are retried with backoff.
+- On startup everything past the committed offset is replayed, so an
+  acknowledged SOS is never lost to a restart or a database outage. Once
+  everything is written the journal is truncated.
+
+Each process claims its own journal slot (sos_journal.<n>.jsonl, see
+services/journal.py) so several API workers never share a file.
+
+SOS_INTAKE_MODE=direct restores the old synchronous insert.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.db.supabase import get_supabase_admin
+from app.services.journal import Journal, VAR_DIR
+from app.services.sos_feed import sos_feed
+
+logger = logging.getLogger(__name__)
+
+SOS_INTAKE_MODE = os.getenv("SOS_INTAKE_MODE", "journal")  # journal | direct
+SOS_JOURNAL_DIR = os.getenv("SOS_JOURNAL_DIR", os.path.join(VAR_DIR, "sos_journal"))
+SOS_INTAKE_BATCH_SIZE = int(os.getenv("SOS_INTAKE_BATCH_SIZE", "200"))
+SOS_INTAKE_FLUSH_SECONDS = float(os.getenv("SOS_INTAKE_FLUSH_SECONDS", "0.2"))
+SOS_INTAKE_MAX_BACKOFF_SECONDS = 30
+
+
+def insert_sos_rows(rows: list[dict]) -> list[dict]:
+    """Insert (or skip already-written) SOS rows in one round-trip."""
+    res = get_supabase_admin().table("sos_requests") \
+        .upsert(rows, on_conflict="id", ignore_duplicates=True) \
+        .execute()
+    return res.data or []
+
+
+class SOSIntake:
+    def __init__(
+        self,
+        journal_dir: str = SOS_JOURNAL_DIR,
+        batch_size: int = SOS_INTAKE_BATCH_SIZE,
+        flush_seconds: float = SOS_INTAKE_FLUSH_SECONDS,
+    ):
+        self.journal_dir = journal_dir
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self.journal: Optional[Journal] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._incoming: list[tuple[dict, asyncio.Future]] = []
+        self._incoming_ready: Optional[asyncio.Event] = None
+        self._pending: deque = deque()  # (row, end offset), in journal order
+        self._pending_ids: set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._journaler: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+
+        self._accepted = 0
+        self._written = 0
+        self._replayed = 0
+        self._last_write_at: Optional[str] = None
+        self._last_error: Optional[str] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    async def start(self) -> None:
+        if SOS_INTAKE_MODE != "journal" or self._writer is not None:
+            return
+        loop = asyncio.get_running_loop()
+        # One thread for journal fsyncs, one for Supabase inserts
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self.journal = await loop.run_in_executor(self._executor, Journal, self.journal_dir, "sos_journal")
+        for row, end in await loop.run_in_executor(self._executor, self.journal.replay):
+            self._pending.append((row, end))
+            self._pending_ids.add(row["id"])
+        self._replayed = len(self._pending)
+        if self._replayed:
+            logger.warning("Replaying %d journaled SOS requests from %s", self._replayed, self.journal.path)
+
+        self._incoming_ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._journaler = asyncio.create_task(self._journal_loop())
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop accepting, then try to write out what is pending. Anything the
+        database does not take in time stays in the journal for the next start.
+        """
+        if self._writer is None:
+            return
+        self._journaler.cancel()
+        try:
+            await self._journaler
+        except asyncio.CancelledError:
+            pass
+        for _, future in self._incoming:
+            if not future.done():
+                future.set_exception(RuntimeError("SOS intake is shutting down"))
+        self._incoming = []
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        try:
+            await asyncio.wait_for(self._flush_all(), timeout=timeout)
+        except Exception as e:
+            logger.warning("SOS intake shutdown left %d requests in the journal: %s", len(self._pending), e)
+        self.journal.close()
+        self._executor.shutdown(wait=False)
+        self._writer = self._journaler = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": "journal" if self.enabled else "direct",
+            "journal": self.journal.path if self.journal else None,
+            "accepted": self._accepted,
+            "written": self._written,
+            "replayed_on_start": self._replayed,
+            "pending": len(self._pending) + len(self._incoming),
+            "last_write_at": self._last_write_at,
+            "last_error": self._last_error,
+        }
+
+    # ── intake ───────────────────────────────────────────────────────────────
+
+    async def submit(self, row: dict) -> bool:
+        """
+        Journal a fully built sos_requests row (id included). Returns once it
+        is durable; False if that id is already queued (a client retry).
+        """
+        if row["id"] in self._pending_ids:
+            return False
+        self._pending_ids.add(row["id"])
+        future = asyncio.get_running_loop().create_future()
+        self._incoming.append((row, future))
+        self._incoming_ready.set()
+        try:
+            await future
+        except Exception:
+            self._pending_ids.discard(row["id"])
+            raise
+        self._accepted += 1
+        return True
+
+    async def _journal_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._incoming_ready.wait()
+            self._incoming_ready.clear()
+            batch, self._incoming = self._incoming, []
+            if not batch:
+                continue
+            try:
+                ends = await loop.run_in_executor(self._executor, self.journal.append, [row for row, _ in batch])
+            except Exception as e:
+                self._last_error = f"journal write failed: {e}"
+                logger.error("SOS journal write failed: %s", e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (row, future), end in zip(batch, ends):
+                self._pending.append((row, end))
+                if not future.done():
+                    future.set_result(end)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    # ── write-behind ─────────────────────────────────────────────────────────
+
+    async def _write_batch(self) -> int:
+        """Insert the oldest pending batch; returns how many were written."""
+        if not self._pending:
+            return 0
+        loop = asyncio.get_running_loop()
+        batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+        started = time.perf_counter()
+        inserted = await loop.run_in_executor(self._executor, insert_sos_rows, [row for row, _ in batch])
+
+        for _ in batch:
+            row, _ = self._pending.popleft()
+            self._pending_ids.discard(row["id"])
+        await loop.run_in_executor(self._executor, self.journal.commit, batch[-1][1])
+
+        self._written += len(batch)
+        self._last_write_at = datetime.now(timezone.utc).isoformat()
+        for row in inserted:
+            sos_feed.publish("created", row)
+        logger.info("Wrote %d journaled SOS requests in %.3fs", len(batch), time.perf_counter() - started)
+        return len(batch)
+
+    async def _flush_all(self) -> None:
+        while self._pending:
+            await self._write_batch()
+
+    async def _write_loop(self) -> None:
+        backoff = self.flush_seconds
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while await self._write_batch() == self.batch_size:
+                    pass
+                backoff = self.flush_seconds
+            except Exception as e:
+                self._last_error = str(e)
+                backoff = min(max(backoff * 2, 1.0), SOS_INTAKE_MAX_BACKOFF_SECONDS)
+                logger.warning(
+                    "SOS write-behind failed (%d pending, retry in %.0fs): %s", len(self._pending), backoff, e,
+                )
+
+
+sos_intake = SOSIntake()
@@ -0,0 +1,44 @@
+-- ============================================================
+-- Merkle-batched Solana anchoring for relief_records
+-- ============================================================
+-- Records are anchored in batches: only the Merkle root of a batch is
+-- written on-chain (one Memo transaction), and each record keeps its
+-- inclusion proof so it can be verified locally against that root.
+-- Run after add_blockchain_columns.sql.
+
+ALTER TABLE relief_records
+ADD COLUMN IF NOT EXISTS merkle_root TEXT DEFAULT NULL,
+ADD COLUMN IF NOT EXISTS merkle_proof JSONB DEFAULT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_relief_records_merkle_root
+ON relief_records (merkle_root)
+WHERE merkle_root IS NOT NULL;
+
+COMMENT ON COLUMN relief_records.merkle_root IS 'Merkle root (hex SHA-256) anchored on-chain for the batch containing this record';
+COMMENT ON COLUMN relief_records.merkle_proof IS 'Inclusion proof: [{"hash": <sibling hex>, "position": "left"|"right"}, ...] from leaf to root';
+
+-- Write the anchoring result for a whole batch in one round-trip.
+-- anchors: [{"id", "tx_signature", "record_hash", "merkle_root", "merkle_proof"}, ...]
+CREATE OR REPLACE FUNCTION apply_record_anchors(anchors JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE relief_records r
+    SET solana_tx_signature = a.tx_signature,
+        record_hash         = a.record_hash,
+        merkle_root         = a.merkle_root,
+        merkle_proof        = a.merkle_proof
+    FROM jsonb_to_recordset(anchors) AS a(
+        id UUID,
+        tx_signature TEXT,
+        record_hash TEXT,
+        merkle_root TEXT,
+        merkle_proof JSONB
+    )
+    WHERE r.id = a.id;
+
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
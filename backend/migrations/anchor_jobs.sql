@@ -0,0 +1,168 @@
+-- ============================================================
+-- Anchor-all jobs (POST /blockchain/anchor-all)
+-- ============================================================
+-- A job tags the current backlog of un-anchored records in pending_anchors
+-- with its id. The job's rows are drained only by that job's worker (with the
+-- job's own concurrency) and progress is recorded on the job row. Workers
+-- lease a job through a heartbeat, so if the process running it dies, any
+-- other API worker resumes it once the heartbeat goes stale.
+-- Run after anchor_queue.sql.
+
+CREATE TABLE IF NOT EXISTS anchor_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    status TEXT NOT NULL DEFAULT 'queued',     -- queued | running | completed
+    concurrency INTEGER NOT NULL DEFAULT 2,
+    total INTEGER NOT NULL DEFAULT 0,
+    anchored INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    transactions INTEGER NOT NULL DEFAULT 0,
+    failures JSONB NOT NULL DEFAULT '[]'::JSONB, -- most recent 100 {id, error}
+    worker_id TEXT,
+    heartbeat_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_anchor_jobs_active ON anchor_jobs (status) WHERE status <> 'completed';
+
+ALTER TABLE pending_anchors
+ADD COLUMN IF NOT EXISTS job_id UUID REFERENCES anchor_jobs(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_pending_anchors_job ON pending_anchors (job_id) WHERE job_id IS NOT NULL;
+
+-- Create a job over every un-anchored record. Only one job may be active at
+-- a time (23505 otherwise). Queued rows are taken over only while they are
+-- untagged and not leased; a batch the general worker is anchoring right now
+-- stays with it and is not counted in the job's total.
+CREATE OR REPLACE FUNCTION create_anchor_job(p_concurrency INTEGER DEFAULT 2)
+RETURNS SETOF anchor_jobs AS $$
+DECLARE
+    new_job_id UUID;
+    active_job_id UUID;
+    tagged INTEGER;
+BEGIN
+    -- Serialize concurrent calls so the active-job check can't race
+    PERFORM pg_advisory_xact_lock(hashtext('create_anchor_job'));
+
+    SELECT id INTO active_job_id FROM anchor_jobs WHERE status <> 'completed' ORDER BY created_at LIMIT 1;
+    IF active_job_id IS NOT NULL THEN
+        RAISE EXCEPTION 'Anchor job % is still running', active_job_id
+            USING ERRCODE = '23505', DETAIL = active_job_id::TEXT;
+    END IF;
+
+    INSERT INTO anchor_jobs (concurrency) VALUES (p_concurrency) RETURNING id INTO new_job_id;
+
+    INSERT INTO pending_anchors (record_id, job_id)
+    SELECT id, new_job_id FROM relief_records WHERE solana_tx_signature IS NULL
+    ON CONFLICT (record_id) DO UPDATE
+    SET job_id = EXCLUDED.job_id, next_attempt_at = NOW()
+    WHERE pending_anchors.job_id IS NULL
+      AND (pending_anchors.locked_until IS NULL OR pending_anchors.locked_until < NOW());
+
+    GET DIAGNOSTICS tagged = ROW_COUNT;
+
+    UPDATE anchor_jobs
+    SET total = tagged,
+        status = CASE WHEN tagged = 0 THEN 'completed' ELSE 'queued' END,
+        finished_at = CASE WHEN tagged = 0 THEN NOW() END
+    WHERE id = new_job_id;
+
+    RETURN QUERY SELECT * FROM anchor_jobs WHERE id = new_job_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lease one job that is queued, or running with a stale heartbeat
+CREATE OR REPLACE FUNCTION claim_anchor_job(p_worker_id TEXT, p_stale_seconds INTEGER DEFAULT 60)
+RETURNS SETOF anchor_jobs AS $$
+    UPDATE anchor_jobs j
+    SET status = 'running',
+        worker_id = p_worker_id,
+        heartbeat_at = NOW(),
+        started_at = COALESCE(j.started_at, NOW())
+    WHERE j.id = (
+        SELECT id FROM anchor_jobs
+        WHERE status = 'queued'
+           OR (status = 'running' AND heartbeat_at < NOW() - make_interval(secs => p_stale_seconds))
+        ORDER BY created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$ LANGUAGE sql;
+
+-- Record a batch outcome (or just a heartbeat with zeros). Rows that have
+-- exhausted p_max_attempts are handed back to the general queue and counted
+-- as failed. Marks the job completed once none of its rows remain.
+CREATE OR REPLACE FUNCTION record_anchor_job_progress(
+    p_job_id UUID,
+    p_anchored INTEGER DEFAULT 0,
+    p_transactions INTEGER DEFAULT 0,
+    p_max_attempts INTEGER DEFAULT 5
+)
+RETURNS SETOF anchor_jobs AS $$
+DECLARE
+    gave_up JSONB;
+    gave_up_count INTEGER;
+BEGIN
+    WITH released AS (
+        UPDATE pending_anchors
+        SET job_id = NULL
+        WHERE job_id = p_job_id AND attempts >= p_max_attempts
+        RETURNING record_id, last_error
+    )
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('id', record_id, 'error', last_error)), '[]'::JSONB),
+           COUNT(*)
+    INTO gave_up, gave_up_count
+    FROM released;
+
+    UPDATE anchor_jobs
+    SET anchored = anchored + p_anchored,
+        transactions = transactions + p_transactions,
+        failed = failed + gave_up_count,
+        failures = (
+            SELECT COALESCE(jsonb_agg(f ORDER BY n), '[]'::JSONB)
+            FROM (
+                SELECT f, n FROM jsonb_array_elements(failures || gave_up) WITH ORDINALITY AS e(f, n)
+                ORDER BY n DESC LIMIT 100
+            ) recent
+        ),
+        heartbeat_at = NOW()
+    WHERE id = p_job_id;
+
+    UPDATE anchor_jobs
+    SET status = 'completed', finished_at = NOW()
+    WHERE id = p_job_id
+      AND status <> 'completed'
+      AND NOT EXISTS (SELECT 1 FROM pending_anchors WHERE job_id = p_job_id);
+
+    RETURN QUERY SELECT * FROM anchor_jobs WHERE id = p_job_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- claim_pending_anchors() gains a job filter: the general worker (NULL) only
+-- takes untagged rows, a job worker only takes its own job's rows.
+DROP FUNCTION IF EXISTS claim_pending_anchors(INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION claim_pending_anchors(
+    batch_size INTEGER,
+    lease_seconds INTEGER DEFAULT 120,
+    p_job_id UUID DEFAULT NULL
+)
+RETURNS SETOF relief_records AS $$
+    WITH claimed AS (
+        UPDATE pending_anchors p
+        SET locked_until = NOW() + make_interval(secs => lease_seconds)
+        WHERE p.record_id IN (
+            SELECT record_id FROM pending_anchors
+            WHERE job_id IS NOT DISTINCT FROM p_job_id
+              AND next_attempt_at <= NOW()
+              AND (locked_until IS NULL OR locked_until < NOW())
+            ORDER BY enqueued_at
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING p.record_id
+    )
+    SELECT r.* FROM relief_records r JOIN claimed c ON r.id = c.record_id;
+$$ LANGUAGE sql;
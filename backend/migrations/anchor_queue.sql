@@ -0,0 +1,147 @@
+-- ============================================================
+-- Durable Solana anchoring queue
+-- ============================================================
+-- Every new relief_record is enqueued by trigger in the same transaction as
+-- its insert, so nothing is lost if the API process restarts before the
+-- record is anchored. The API's background worker claims batches with
+-- claim_pending_anchors(), anchors them as one Merkle root and removes them
+-- through apply_record_anchors(). Failed batches are released with an
+-- exponential backoff. Run after add_merkle_anchor_columns.sql.
+
+CREATE TABLE IF NOT EXISTS pending_anchors (
+    record_id UUID PRIMARY KEY REFERENCES relief_records(id) ON DELETE CASCADE,
+    enqueued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_until TIMESTAMPTZ,               -- lease held by a worker while anchoring
+    last_error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_pending_anchors_due ON pending_anchors (next_attempt_at, enqueued_at);
+
+-- Enqueue on insert
+CREATE OR REPLACE FUNCTION enqueue_record_anchor()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO pending_anchors (record_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_relief_records_enqueue_anchor ON relief_records;
+CREATE TRIGGER trg_relief_records_enqueue_anchor
+AFTER INSERT ON relief_records
+FOR EACH ROW
+WHEN (NEW.solana_tx_signature IS NULL)
+EXECUTE FUNCTION enqueue_record_anchor();
+
+-- Enqueue the existing backlog (used by POST /blockchain/anchor-all)
+CREATE OR REPLACE FUNCTION enqueue_unanchored_records()
+RETURNS INTEGER AS $$
+DECLARE
+    enqueued INTEGER;
+BEGIN
+    INSERT INTO pending_anchors (record_id)
+    SELECT id FROM relief_records WHERE solana_tx_signature IS NULL
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS enqueued = ROW_COUNT;
+    RETURN enqueued;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lease up to batch_size due records and return them in full.
+-- SKIP LOCKED lets several API workers drain the queue concurrently.
+CREATE OR REPLACE FUNCTION claim_pending_anchors(batch_size INTEGER, lease_seconds INTEGER DEFAULT 120)
+RETURNS SETOF relief_records AS $$
+    WITH claimed AS (
+        UPDATE pending_anchors p
+        SET locked_until = NOW() + make_interval(secs => lease_seconds)
+        WHERE p.record_id IN (
+            SELECT record_id FROM pending_anchors
+            WHERE next_attempt_at <= NOW()
+              AND (locked_until IS NULL OR locked_until < NOW())
+            ORDER BY enqueued_at
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING p.record_id
+    )
+    SELECT r.* FROM relief_records r JOIN claimed c ON r.id = c.record_id;
+$$ LANGUAGE sql;
+
+-- Give a failed batch back with exponential backoff (plus jitter)
+CREATE OR REPLACE FUNCTION release_pending_anchors(
+    record_ids UUID[],
+    error TEXT,
+    base_seconds INTEGER DEFAULT 10,
+    max_seconds INTEGER DEFAULT 3600
+)
+RETURNS VOID AS $$
+    UPDATE pending_anchors
+    SET attempts = attempts + 1,
+        last_error = error,
+        locked_until = NULL,
+        next_attempt_at = NOW() + make_interval(
+            secs => LEAST(base_seconds * POWER(2, attempts), max_seconds) + random() * base_seconds
+        )
+    WHERE record_id = ANY(record_ids);
+$$ LANGUAGE sql;
+
+-- apply_record_anchors() now also removes the anchored records from the
+-- queue. A record that already has a signature is left alone (a batch saved
+-- after its lease expired and it was re-anchored elsewhere, or a journaled
+-- save replayed late), so a stored proof is never swapped; returns the ids
+-- that were actually written.
+DROP FUNCTION IF EXISTS apply_record_anchors(JSONB);
+
+CREATE OR REPLACE FUNCTION apply_record_anchors(anchors JSONB)
+RETURNS SETOF UUID AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE relief_records r
+    SET solana_tx_signature = a.tx_signature,
+        record_hash         = a.record_hash,
+        merkle_root         = a.merkle_root,
+        merkle_proof        = a.merkle_proof
+    FROM jsonb_to_recordset(anchors) AS a(
+        id UUID,
+        tx_signature TEXT,
+        record_hash TEXT,
+        merkle_root TEXT,
+        merkle_proof JSONB
+    )
+    WHERE r.id = a.id AND r.solana_tx_signature IS NULL
+    RETURNING r.id;
+
+    DELETE FROM pending_anchors
+    WHERE record_id IN (SELECT (a->>'id')::UUID FROM jsonb_array_elements(anchors) AS a);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lease one record for POST /blockchain/anchor/{id}, queued or not. Returns
+-- nothing while a worker holds the record, so the two never anchor it twice.
+CREATE OR REPLACE FUNCTION claim_pending_anchor(p_record_id UUID, lease_seconds INTEGER DEFAULT 120)
+RETURNS SETOF UUID AS $$
+    INSERT INTO pending_anchors (record_id, locked_until)
+    SELECT id, NOW() + make_interval(secs => lease_seconds)
+    FROM relief_records
+    WHERE id = p_record_id AND solana_tx_signature IS NULL
+    ON CONFLICT (record_id) DO UPDATE
+    SET locked_until = EXCLUDED.locked_until
+    WHERE pending_anchors.locked_until IS NULL OR pending_anchors.locked_until < NOW()
+    RETURNING record_id;
+$$ LANGUAGE sql;
+
+-- Depth / lag for GET /blockchain/queue
+CREATE OR REPLACE VIEW anchor_queue_stats AS
+SELECT
+    COUNT(*) AS depth,
+    COUNT(*) FILTER (
+        WHERE next_attempt_at <= NOW() AND (locked_until IS NULL OR locked_until < NOW())
+    ) AS ready,
+    COUNT(*) FILTER (WHERE locked_until >= NOW()) AS leased,
+    COUNT(*) FILTER (WHERE attempts > 0) AS retrying,
+    MIN(enqueued_at) AS oldest_enqueued_at,
+    COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(enqueued_at)), 0) AS lag_seconds
+FROM pending_anchors;
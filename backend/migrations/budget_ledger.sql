@@ -0,0 +1,163 @@
+-- ============================================================
+-- Versioned budget hierarchy for the in-memory ledger
+-- ============================================================
+-- app/services/budget_ledger.py keeps national → province → district
+-- totals in memory. Each level carries a `version` that changes whenever
+-- its own limit or its children's committed total changes, so a write
+-- can say "I validated against version N" and be rejected (SQLSTATE
+-- 40001) if another worker got there first; the ledger then reloads that
+-- node and retries.
+--
+--   budget_master.version        ← its province_allocation rows change
+--   province_allocation.version  ← its district_allocation rows change
+--   district_allocation.version  ← its relief_distribution rows change
+--
+-- Run after distribute_relief.sql.
+
+ALTER TABLE budget_master ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE province_allocation ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE district_allocation ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+-- A node's own limit changed
+CREATE OR REPLACE FUNCTION bump_own_budget_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'version') IS DISTINCT FROM (to_jsonb(OLD) - 'version') THEN
+        NEW.version := OLD.version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_budget_master_version ON budget_master;
+CREATE TRIGGER trg_budget_master_version
+BEFORE UPDATE ON budget_master
+FOR EACH ROW EXECUTE FUNCTION bump_own_budget_version();
+
+DROP TRIGGER IF EXISTS trg_province_allocation_version ON province_allocation;
+CREATE TRIGGER trg_province_allocation_version
+BEFORE UPDATE ON province_allocation
+FOR EACH ROW EXECUTE FUNCTION bump_own_budget_version();
+
+DROP TRIGGER IF EXISTS trg_district_allocation_version ON district_allocation;
+CREATE TRIGGER trg_district_allocation_version
+BEFORE UPDATE ON district_allocation
+FOR EACH ROW EXECUTE FUNCTION bump_own_budget_version();
+
+-- A child row was added / changed / removed: bump the parent
+-- (TG_ARGV[0] = parent table, TG_ARGV[1] = foreign key column)
+CREATE OR REPLACE FUNCTION bump_parent_budget_version()
+RETURNS TRIGGER AS $$
+DECLARE
+    parent_ids UUID[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        parent_ids := ARRAY[(to_jsonb(NEW) ->> TG_ARGV[1])::UUID];
+    ELSIF TG_OP = 'DELETE' THEN
+        parent_ids := ARRAY[(to_jsonb(OLD) ->> TG_ARGV[1])::UUID];
+    ELSE
+        parent_ids := ARRAY[(to_jsonb(NEW) ->> TG_ARGV[1])::UUID, (to_jsonb(OLD) ->> TG_ARGV[1])::UUID];
+    END IF;
+    EXECUTE format('UPDATE %I SET version = version + 1 WHERE id = ANY($1)', TG_ARGV[0]) USING parent_ids;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_province_allocation_parent_version ON province_allocation;
+CREATE TRIGGER trg_province_allocation_parent_version
+AFTER INSERT OR DELETE OR UPDATE OF allocated_amount, budget_master_id ON province_allocation
+FOR EACH ROW EXECUTE FUNCTION bump_parent_budget_version('budget_master', 'budget_master_id');
+
+DROP TRIGGER IF EXISTS trg_district_allocation_parent_version ON district_allocation;
+CREATE TRIGGER trg_district_allocation_parent_version
+AFTER INSERT OR DELETE OR UPDATE OF allocated_amount, province_allocation_id ON district_allocation
+FOR EACH ROW EXECUTE FUNCTION bump_parent_budget_version('province_allocation', 'province_allocation_id');
+
+DROP TRIGGER IF EXISTS trg_relief_distribution_parent_version ON relief_distribution;
+CREATE TRIGGER trg_relief_distribution_parent_version
+AFTER INSERT OR DELETE OR UPDATE OF amount, district_allocation_id ON relief_distribution
+FOR EACH ROW EXECUTE FUNCTION bump_parent_budget_version('district_allocation', 'district_allocation_id');
+
+-- Allocate national budget to a province. p_expected_version is the
+-- budget_master version the caller validated against (NULL = don't check).
+-- Errors: P0002 not found, P0001 insufficient / invalid, 40001 version
+-- conflict, 23505 province already allocated for this budget.
+CREATE OR REPLACE FUNCTION allocate_province_budget(p_allocation JSONB, p_expected_version BIGINT DEFAULT NULL)
+RETURNS JSONB AS $$
+DECLARE
+    a province_allocation%ROWTYPE;
+    parent budget_master%ROWTYPE;
+    v_committed NUMERIC;
+BEGIN
+    a := jsonb_populate_record(NULL::province_allocation, p_allocation);
+
+    SELECT * INTO parent FROM budget_master WHERE id = a.budget_master_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Budget Master not found' USING ERRCODE = 'P0002';
+    END IF;
+    IF p_expected_version IS NOT NULL AND parent.version <> p_expected_version THEN
+        RAISE EXCEPTION 'Budget Master changed (version %, expected %)', parent.version, p_expected_version
+            USING ERRCODE = '40001';
+    END IF;
+    IF a.allocated_amount IS NULL OR a.allocated_amount <= 0 THEN
+        RAISE EXCEPTION 'Allocated amount must be positive' USING ERRCODE = 'P0001';
+    END IF;
+
+    SELECT COALESCE(SUM(allocated_amount), 0) INTO v_committed
+    FROM province_allocation WHERE budget_master_id = parent.id;
+    IF v_committed + a.allocated_amount > parent.ndrrma_allocation THEN
+        RAISE EXCEPTION 'Insufficient National Budget. Available: %', parent.ndrrma_allocation - v_committed
+            USING ERRCODE = 'P0001';
+    END IF;
+
+    INSERT INTO province_allocation (budget_master_id, province_id, allocated_amount, released_amount)
+    VALUES (a.budget_master_id, a.province_id, a.allocated_amount, COALESCE(a.released_amount, 0))
+    RETURNING * INTO a;
+
+    RETURN jsonb_build_object(
+        'allocation', to_jsonb(a),
+        'parent_version', (SELECT version FROM budget_master WHERE id = a.budget_master_id)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Allocate a province's budget to a district (same contract as above,
+-- against the province_allocation version).
+CREATE OR REPLACE FUNCTION allocate_district_budget(p_allocation JSONB, p_expected_version BIGINT DEFAULT NULL)
+RETURNS JSONB AS $$
+DECLARE
+    a district_allocation%ROWTYPE;
+    parent province_allocation%ROWTYPE;
+    v_committed NUMERIC;
+BEGIN
+    a := jsonb_populate_record(NULL::district_allocation, p_allocation);
+
+    SELECT * INTO parent FROM province_allocation WHERE id = a.province_allocation_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Province Allocation not found' USING ERRCODE = 'P0002';
+    END IF;
+    IF p_expected_version IS NOT NULL AND parent.version <> p_expected_version THEN
+        RAISE EXCEPTION 'Province Allocation changed (version %, expected %)', parent.version, p_expected_version
+            USING ERRCODE = '40001';
+    END IF;
+    IF a.allocated_amount IS NULL OR a.allocated_amount <= 0 THEN
+        RAISE EXCEPTION 'Allocated amount must be positive' USING ERRCODE = 'P0001';
+    END IF;
+
+    SELECT COALESCE(SUM(allocated_amount), 0) INTO v_committed
+    FROM district_allocation WHERE province_allocation_id = parent.id;
+    IF v_committed + a.allocated_amount > parent.allocated_amount THEN
+        RAISE EXCEPTION 'Insufficient Province Budget. Available: %', parent.allocated_amount - v_committed
+            USING ERRCODE = 'P0001';
+    END IF;
+
+    INSERT INTO district_allocation (province_allocation_id, district_id, allocated_amount)
+    VALUES (a.province_allocation_id, a.district_id, a.allocated_amount)
+    RETURNING * INTO a;
+
+    RETURN jsonb_build_object(
+        'allocation', to_jsonb(a),
+        'parent_version', (SELECT version FROM province_allocation WHERE id = a.province_allocation_id)
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,56 @@
+-- ============================================================
+-- Atomic relief distribution (POST /relief/distribute)
+-- ============================================================
+-- One round-trip instead of budget check → insert → audit insert, and no
+-- overspending under concurrency: the district allocation row is locked
+-- while its remaining budget is computed, so concurrent distributions
+-- against the same district run one after another.
+--
+-- Errors: P0002 (allocation not found, HTTP 404 in the API) and P0001 with
+-- the user-facing message (insufficient budget / invalid amount, HTTP 400).
+
+CREATE INDEX IF NOT EXISTS idx_relief_distribution_district_allocation
+ON relief_distribution (district_allocation_id);
+
+CREATE OR REPLACE FUNCTION distribute_relief(p_distribution JSONB, p_officer_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+    d relief_distribution%ROWTYPE;
+    v_allocated NUMERIC;
+    v_used NUMERIC;
+BEGIN
+    d := jsonb_populate_record(NULL::relief_distribution, p_distribution);
+    d.id := uuid_generate_v4();
+    d.officer_id := p_officer_id;
+    d.created_at := NOW();
+
+    IF d.amount IS NULL OR d.amount <= 0 THEN
+        RAISE EXCEPTION 'Relief amount must be positive' USING ERRCODE = 'P0001';
+    END IF;
+
+    SELECT allocated_amount INTO v_allocated
+    FROM district_allocation
+    WHERE id = d.district_allocation_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'District Allocation not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    SELECT COALESCE(SUM(amount), 0) INTO v_used
+    FROM relief_distribution
+    WHERE district_allocation_id = d.district_allocation_id;
+
+    IF d.amount > v_allocated - v_used THEN
+        RAISE EXCEPTION 'Insufficient District Budget. Remaining: %', v_allocated - v_used
+            USING ERRCODE = 'P0001';
+    END IF;
+
+    INSERT INTO relief_distribution SELECT (d).*;
+
+    INSERT INTO audit_log (user_id, action, table_name, record_id, new_data)
+    VALUES (p_officer_id, 'CREATE', 'relief_distribution', d.id, to_jsonb(d));
+
+    RETURN to_jsonb(d);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,145 @@
+-- ============================================================
+-- Local hash-chained ledger for relief_records
+-- ============================================================
+-- Every record's hash is appended to an append-only chain at insert time:
+--
+--     chain_hash[n] = SHA-256(0x02 || chain_hash[n-1] || record_hash[n])
+--     chain_hash[0] = 64 zeros (genesis)
+--
+-- (same formula as blockchain_service.chain_link). Editing any record or any
+-- ledger row breaks every later link, so tampering is detectable immediately
+-- and without a network call. Only the chain head is anchored on Solana,
+-- periodically, as a checkpoint.
+--
+-- Appends serialise on the single ledger_head row, so concurrent API workers
+-- can never fork the chain. Run after anchor_queue.sql.
+
+CREATE TABLE IF NOT EXISTS record_ledger (
+    seq BIGINT PRIMARY KEY,
+    record_id UUID NOT NULL UNIQUE,
+    record_hash TEXT NOT NULL,
+    prev_hash TEXT NOT NULL,
+    chain_hash TEXT NOT NULL,
+    appended_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS record_ledger_head (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    seq BIGINT NOT NULL,
+    chain_hash TEXT NOT NULL
+);
+
+INSERT INTO record_ledger_head (seq, chain_hash)
+VALUES (0, repeat('0', 64))
+ON CONFLICT DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+    seq BIGINT PRIMARY KEY,
+    chain_hash TEXT NOT NULL,
+    tx_signature TEXT,                -- NULL while the memo is being sent
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- When the current claim was taken; an unfinished claim older than the
+-- lease belongs to a worker that died and can be taken over
+ALTER TABLE ledger_checkpoints
+ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- Append-only: ledger rows can never be changed or removed
+CREATE OR REPLACE FUNCTION reject_ledger_modification()
+RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'record_ledger is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_record_ledger_append_only ON record_ledger;
+CREATE TRIGGER trg_record_ledger_append_only
+BEFORE UPDATE OR DELETE ON record_ledger
+FOR EACH ROW EXECUTE FUNCTION reject_ledger_modification();
+
+-- Append [{record_id, record_hash}, ...] in order; already-chained records are skipped
+CREATE OR REPLACE FUNCTION append_record_ledger(entries JSONB)
+RETURNS SETOF record_ledger AS $$
+DECLARE
+    head record_ledger_head%ROWTYPE;
+    entry RECORD;
+    next_hash TEXT;
+BEGIN
+    SELECT * INTO head FROM record_ledger_head FOR UPDATE;
+
+    FOR entry IN
+        SELECT e.record_id, e.record_hash
+        FROM ROWS FROM (jsonb_to_recordset(entries) AS (record_id UUID, record_hash TEXT))
+             WITH ORDINALITY AS e(record_id, record_hash, n)
+        WHERE NOT EXISTS (SELECT 1 FROM record_ledger l WHERE l.record_id = e.record_id)
+        ORDER BY n
+    LOOP
+        next_hash := encode(
+            sha256('\x02'::BYTEA || decode(head.chain_hash, 'hex') || decode(entry.record_hash, 'hex')),
+            'hex'
+        );
+        head.seq := head.seq + 1;
+
+        INSERT INTO record_ledger (seq, record_id, record_hash, prev_hash, chain_hash)
+        VALUES (head.seq, entry.record_id, entry.record_hash, head.chain_hash, next_hash);
+
+        RETURN QUERY SELECT * FROM record_ledger l WHERE l.seq = head.seq;
+
+        head.chain_hash := next_hash;
+    END LOOP;
+
+    UPDATE record_ledger_head SET seq = head.seq, chain_hash = head.chain_hash;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Records inserted outside the API (uploads, seeds) that are not chained yet
+CREATE OR REPLACE FUNCTION unledgered_records(batch_size INTEGER DEFAULT 500)
+RETURNS SETOF relief_records AS $$
+    SELECT r.* FROM relief_records r
+    WHERE NOT EXISTS (SELECT 1 FROM record_ledger l WHERE l.record_id = r.id)
+    ORDER BY r.created_at, r.id
+    LIMIT batch_size;
+$$ LANGUAGE sql;
+
+-- Claim the checkpoint for the current head; returns nothing if another
+-- worker already checkpointed this seq or holds a live claim on it. A claim
+-- left unfinished for p_stale_seconds is taken over; abandoned claims on
+-- older seqs are dropped (the new head's checkpoint covers them).
+DROP FUNCTION IF EXISTS claim_ledger_checkpoint();
+
+CREATE OR REPLACE FUNCTION claim_ledger_checkpoint(p_stale_seconds INTEGER DEFAULT 600)
+RETURNS SETOF ledger_checkpoints AS $$
+    WITH abandoned AS (
+        DELETE FROM ledger_checkpoints
+        WHERE tx_signature IS NULL
+          AND claimed_at < NOW() - make_interval(secs => p_stale_seconds)
+          AND seq < (SELECT seq FROM record_ledger_head)
+    )
+    INSERT INTO ledger_checkpoints (seq, chain_hash)
+    SELECT seq, chain_hash FROM record_ledger_head
+    WHERE seq > 0
+    ON CONFLICT (seq) DO UPDATE
+    SET claimed_at = NOW()
+    WHERE ledger_checkpoints.tx_signature IS NULL
+      AND ledger_checkpoints.claimed_at < NOW() - make_interval(secs => p_stale_seconds)
+    RETURNING *;
+$$ LANGUAGE sql;
+
+-- Ledger entries with the current record row, for range verification.
+-- `record` is NULL if the record was deleted.
+CREATE OR REPLACE FUNCTION record_ledger_range(from_seq BIGINT, to_seq BIGINT)
+RETURNS TABLE (
+    seq BIGINT,
+    record_id UUID,
+    record_hash TEXT,
+    prev_hash TEXT,
+    chain_hash TEXT,
+    record JSONB
+) AS $$
+    SELECT l.seq, l.record_id, l.record_hash, l.prev_hash, l.chain_hash, to_jsonb(r)
+    FROM record_ledger l
+    LEFT JOIN relief_records r ON r.id = l.record_id
+    WHERE l.seq BETWEEN from_seq AND to_seq
+    ORDER BY l.seq;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,194 @@
+-- ============================================================
+-- Delta sync for relief_records (GET /records/sync)
+-- ============================================================
+-- Every row carries the id of the transaction that last changed one of the
+-- columns the mobile app shows (anchoring updates don't count), and deleted
+-- rows leave a tombstone. A client's cursor is a (sync_xid, id) position.
+--
+-- Timestamps or plain sequences can't be used as the cursor: a transaction
+-- that started earlier can commit later, so its rows would land behind a
+-- cursor a client has already moved past. relief_records_delta() therefore
+-- only hands out rows written by transactions older than the current
+-- snapshot's xmin — every one of those has finished, so nothing can appear
+-- behind the cursor afterwards.
+--
+-- Run after relief_records.sql. Needs PostgreSQL 13+ (xid8).
+
+ALTER TABLE relief_records
+ADD COLUMN IF NOT EXISTS sync_xid XID8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS idx_relief_records_sync ON relief_records (sync_xid, id);
+CREATE INDEX IF NOT EXISTS idx_relief_records_created_at ON relief_records (created_at DESC);
+
+CREATE TABLE IF NOT EXISTS relief_record_tombstones (
+    record_id UUID PRIMARY KEY,
+    sync_xid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_relief_record_tombstones_sync ON relief_record_tombstones (sync_xid);
+
+CREATE OR REPLACE FUNCTION bump_relief_record_sync_xid()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (NEW.full_name, NEW.citizenship_no, NEW.relief_amount, NEW.province, NEW.district,
+        NEW.disaster_type, NEW.officer_name, NEW.officer_id, NEW.created_at)
+       IS DISTINCT FROM
+       (OLD.full_name, OLD.citizenship_no, OLD.relief_amount, OLD.province, OLD.district,
+        OLD.disaster_type, OLD.officer_name, OLD.officer_id, OLD.created_at) THEN
+        NEW.sync_xid := pg_current_xact_id();
+    ELSE
+        NEW.sync_xid := OLD.sync_xid;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_relief_records_sync_xid ON relief_records;
+CREATE TRIGGER trg_relief_records_sync_xid
+BEFORE UPDATE ON relief_records
+FOR EACH ROW EXECUTE FUNCTION bump_relief_record_sync_xid();
+
+CREATE OR REPLACE FUNCTION record_relief_record_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO relief_record_tombstones (record_id) VALUES (OLD.id)
+    ON CONFLICT (record_id) DO UPDATE
+    SET sync_xid = pg_current_xact_id(), deleted_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_relief_records_tombstone ON relief_records;
+CREATE TRIGGER trg_relief_records_tombstone
+AFTER DELETE ON relief_records
+FOR EACH ROW EXECUTE FUNCTION record_relief_record_tombstone();
+
+-- Same shape as GET /records/get-all-records (minus recent_records)
+CREATE OR REPLACE FUNCTION relief_records_aggregates()
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'summary', (
+            SELECT jsonb_build_object(
+                'total_distributed', COALESCE(SUM(relief_amount), 0),
+                'total_records', COUNT(*),
+                'unique_provinces', COUNT(DISTINCT province),
+                'unique_districts', COUNT(DISTINCT district)
+            ) FROM relief_records
+        ),
+        'by_province', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(g) ORDER BY g.total_amount DESC), '[]'::JSONB)
+            FROM (SELECT province, SUM(relief_amount) AS total_amount, COUNT(*) AS record_count
+                  FROM relief_records GROUP BY province) g
+        ),
+        'by_district', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(g) ORDER BY g.total_amount DESC), '[]'::JSONB)
+            FROM (SELECT district, MIN(province) AS province, SUM(relief_amount) AS total_amount, COUNT(*) AS record_count
+                  FROM relief_records GROUP BY district ORDER BY total_amount DESC LIMIT 10) g
+        ),
+        'by_disaster', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(g) ORDER BY g.total_amount DESC), '[]'::JSONB)
+            FROM (SELECT disaster_type, SUM(relief_amount) AS total_amount, COUNT(*) AS record_count
+                  FROM relief_records GROUP BY disaster_type) g
+        ),
+        'by_officer', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(g) ORDER BY g.total_amount DESC), '[]'::JSONB)
+            FROM (SELECT officer_id, MIN(officer_name) AS officer_name, SUM(relief_amount) AS total_amount, COUNT(*) AS record_count
+                  FROM relief_records GROUP BY officer_id ORDER BY total_amount DESC LIMIT 5) g
+        )
+    );
+$$ LANGUAGE sql STABLE;
+
+-- One page of changes after (p_since_xid, p_after_id). When the page is
+-- full, the next cursor is its last row; otherwise it is the snapshot
+-- horizon and the client is up to date. Tombstones are handed out by xid
+-- range [p_since_xid, next cursor xid), so pages never repeat or skip one.
+-- Aggregates come with the last page of a first sync or of one that saw
+-- any change.
+CREATE OR REPLACE FUNCTION relief_records_delta(
+    p_since_xid XID8 DEFAULT '0',
+    p_after_id UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT 500
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_horizon XID8 := pg_snapshot_xmin(pg_current_snapshot());
+    v_after UUID := COALESCE(p_after_id, '00000000-0000-0000-0000-000000000000');
+    v_records JSONB;
+    v_more BOOLEAN;
+    v_last_xid XID8;
+    v_last_id UUID;
+    v_until XID8;
+    v_deleted JSONB;
+    v_aggregates JSONB;
+BEGIN
+    WITH page AS (
+        SELECT id, full_name, citizenship_no, relief_amount, province, district,
+               disaster_type, officer_name, officer_id, created_at, updated_at, sync_xid,
+               row_number() OVER (ORDER BY sync_xid, id) AS rn
+        FROM (
+            SELECT * FROM relief_records
+            WHERE (sync_xid, id) > (p_since_xid, v_after) AND sync_xid < v_horizon
+            ORDER BY sync_xid, id
+            LIMIT p_limit + 1
+        ) r
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(page) - 'sync_xid' - 'rn' ORDER BY rn) FILTER (WHERE rn <= p_limit), '[]'::JSONB),
+           COALESCE(bool_or(rn > p_limit), FALSE),
+           (array_agg(sync_xid ORDER BY rn DESC) FILTER (WHERE rn <= p_limit))[1],
+           (array_agg(id ORDER BY rn DESC) FILTER (WHERE rn <= p_limit))[1]
+    INTO v_records, v_more, v_last_xid, v_last_id
+    FROM page;
+
+    v_until := CASE WHEN v_more THEN v_last_xid ELSE v_horizon END;
+
+    SELECT COALESCE(jsonb_agg(record_id), '[]'::JSONB) INTO v_deleted
+    FROM relief_record_tombstones
+    WHERE sync_xid >= p_since_xid AND sync_xid < v_until;
+
+    IF NOT v_more AND (p_since_xid = '0' OR p_after_id IS NOT NULL
+                       OR jsonb_array_length(v_records) > 0 OR jsonb_array_length(v_deleted) > 0) THEN
+        v_aggregates := relief_records_aggregates();
+    END IF;
+
+    RETURN jsonb_build_object(
+        'records', v_records,
+        'deleted', v_deleted,
+        'aggregates', v_aggregates,
+        'has_more', v_more,
+        'next_xid', v_until::TEXT,
+        'next_id', CASE WHEN v_more THEN v_last_id END
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- First sync without downloading the whole history: the aggregates, the
+-- p_recent newest records and the snapshot horizon as cursor. Everything the
+-- client doesn't get here is older than what it shows, and every later change
+-- has sync_xid >= the horizon, so plain deltas take over from that cursor.
+CREATE OR REPLACE FUNCTION relief_records_bootstrap(p_recent INTEGER DEFAULT 100)
+RETURNS JSONB AS $$
+DECLARE
+    v_horizon XID8 := pg_snapshot_xmin(pg_current_snapshot());
+    v_records JSONB;
+BEGIN
+    SELECT COALESCE(jsonb_agg(to_jsonb(r) ORDER BY r.created_at DESC), '[]'::JSONB) INTO v_records
+    FROM (
+        SELECT id, full_name, citizenship_no, relief_amount, province, district,
+               disaster_type, officer_name, officer_id, created_at, updated_at
+        FROM relief_records
+        WHERE sync_xid < v_horizon
+        ORDER BY created_at DESC
+        LIMIT p_recent
+    ) r;
+
+    RETURN jsonb_build_object(
+        'records', v_records,
+        'deleted', '[]'::JSONB,
+        'aggregates', relief_records_aggregates(),
+        'has_more', FALSE,
+        'next_xid', v_horizon::TEXT,
+        'next_id', NULL
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,15 @@
+-- ============================================================
+-- Finalized Solana memo cache
+-- ============================================================
+-- A finalized transaction never changes, so its decoded memo is fetched from
+-- RPC once and kept here. On-chain verification then only re-hashes the
+-- record locally and compares against the cached memo (zero RPC calls).
+-- Only finalized lookups are stored; "not found" is never cached.
+
+CREATE TABLE IF NOT EXISTS solana_memo_cache (
+    tx_signature TEXT PRIMARY KEY,
+    memo TEXT NOT NULL,
+    slot BIGINT,
+    block_time TIMESTAMPTZ,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
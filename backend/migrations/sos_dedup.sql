@@ -0,0 +1,23 @@
+-- ============================================================
+-- SOS duplicate suppression
+-- ============================================================
+-- Repeat taps from the same phone in the same ~100 m cell are merged into
+-- the open request by the API (app/services/sos_dedup.py) instead of
+-- creating new rows; the row only records how many times it was tapped.
+-- Run after sos_feed.sql.
+
+ALTER TABLE sos_requests
+ADD COLUMN IF NOT EXISTS tap_count INTEGER NOT NULL DEFAULT 1,
+ADD COLUMN IF NOT EXISTS last_tap_at TIMESTAMPTZ;
+
+-- Apply coalesced tap counts [{id, taps, last_tap_at}, ...] in one statement.
+-- Returns the rows that were updated; ids not written yet are simply absent.
+CREATE OR REPLACE FUNCTION bump_sos_taps(taps JSONB)
+RETURNS SETOF sos_requests AS $$
+    UPDATE sos_requests s
+    SET tap_count = s.tap_count + t.taps,
+        last_tap_at = GREATEST(COALESCE(s.last_tap_at, s.created_at), t.last_tap_at)
+    FROM jsonb_to_recordset(taps) AS t(id UUID, taps INTEGER, last_tap_at TIMESTAMPTZ)
+    WHERE s.id = t.id
+    RETURNING s.*;
+$$ LANGUAGE sql;
@@ -0,0 +1,45 @@
+-- ============================================================
+-- SOS live feed (GET /sos/stream)
+-- ============================================================
+-- Adds the province an SOS belongs to (sent by the client, or derived from
+-- GPS by the API) so dashboards can subscribe per province, and a NOTIFY
+-- trigger so every committed insert / status change reaches the API's
+-- single upstream LISTEN connection (SOS_FEED_DATABASE_URL).
+
+ALTER TABLE sos_requests
+ADD COLUMN IF NOT EXISTS province TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_sos_province_created ON sos_requests (province, created_at DESC);
+
+-- NOTIFY payloads are capped at 8000 bytes and pg_notify raises past that,
+-- which would abort the write itself. `notes` is left out (dashboards
+-- merge events into the rows they already have), and a row that is still
+-- too big is sent with only the fields the feed and the geo index use.
+CREATE OR REPLACE FUNCTION notify_sos_event()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_request JSONB := to_jsonb(NEW) - 'notes';
+    v_payload TEXT;
+BEGIN
+    v_payload := jsonb_build_object(
+        'type', CASE WHEN TG_OP = 'INSERT' THEN 'created' ELSE 'updated' END,
+        'request', v_request
+    )::TEXT;
+    IF octet_length(v_payload) > 7900 THEN
+        v_payload := jsonb_build_object(
+            'type', CASE WHEN TG_OP = 'INSERT' THEN 'created' ELSE 'updated' END,
+            'request', (
+                SELECT jsonb_object_agg(key, value) FROM jsonb_each(v_request)
+                WHERE key IN ('id', 'status', 'province', 'gps_lat', 'gps_long', 'tap_count', 'created_at')
+            )
+        )::TEXT;
+    END IF;
+    PERFORM pg_notify('sos_events', v_payload);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sos_requests_notify ON sos_requests;
+CREATE TRIGGER trg_sos_requests_notify
+AFTER INSERT OR UPDATE ON sos_requests
+FOR EACH ROW EXECUTE FUNCTION notify_sos_event();
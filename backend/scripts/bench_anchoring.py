@@ -0,0 +1,257 @@
+"""
+Anchoring throughput / latency benchmark.
+
+Drives the real blockchain_service / anchor_queue code against a Solana RPC
+endpoint (normally the local stand-in, scripts/solana_rpc_stub.py) and reports
+records/sec and anchor latency percentiles for three modes:
+
+  single   one memo transaction per record (anchor_to_solana), N in parallel
+  batched  anchor_batch() on MERKLE_BATCH_SIZE chunks, N chunks in parallel
+  queued   AnchorQueueWorker draining an in-memory queue; latency is measured
+           from enqueue to saved, so it includes queueing delay
+
+Records come from the load-data generator, so hashes and memo sizes are
+realistic. Supabase is not touched: in queued mode the claim/release/save
+calls are served from memory.
+
+Run:
+  python scripts/solana_rpc_stub.py --latency-ms 80 --jitter-ms 30 --error-rate 0.01 &
+  python scripts/bench_anchoring.py --records 5000 --concurrency 8
+  python scripts/bench_anchoring.py --modes queued --arrival-rate 500 --records 20000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_load_data import Sampler, relief_record_rows, TABLE_COLUMNS
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(mode: str, latencies: list, ok: int, failed: int, transactions: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "mode": mode,
+        "records": ok + failed,
+        "anchored": ok,
+        "failed": failed,
+        "transactions": transactions,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(ok / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        },
+    }
+
+
+def make_records(count: int, seed: int) -> list[dict]:
+    columns = TABLE_COLUMNS["relief_records"]
+    return [dict(zip(columns, row)) for row in relief_record_rows(Sampler(seed), count)]
+
+
+# ── modes ────────────────────────────────────────────────────────────────────
+
+async def bench_single(bs, records: list[dict], concurrency: int) -> dict:
+    slots = asyncio.Semaphore(concurrency)
+    latencies, signatures = [], set()
+    failed = 0
+
+    async def one(record):
+        nonlocal failed
+        async with slots:
+            started = time.perf_counter()
+            tx_sig = await bs.anchor_to_solana(record["id"], bs.hash_record(record))
+            if tx_sig:
+                latencies.append(time.perf_counter() - started)
+                signatures.add(tx_sig)
+            else:
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(r) for r in records))
+    return summarize("single", latencies, len(latencies), failed, len(signatures), time.perf_counter() - started)
+
+
+async def bench_batched(bs, records: list[dict], concurrency: int) -> dict:
+    slots = asyncio.Semaphore(concurrency)
+    latencies, signatures = [], set()
+    ok = failed = 0
+
+    async def chunk(batch):
+        nonlocal ok, failed
+        async with slots:
+            started = time.perf_counter()
+            results = await bs.anchor_batch(batch)
+            elapsed = time.perf_counter() - started
+            for r in results:
+                if r["success"]:
+                    ok += 1
+                    latencies.append(elapsed)
+                    signatures.add(r["tx_signature"])
+                else:
+                    failed += 1
+
+    size = bs.MERKLE_BATCH_SIZE
+    started = time.perf_counter()
+    await asyncio.gather(*(chunk(records[i:i + size]) for i in range(0, len(records), size)))
+    return summarize("batched", latencies, ok, failed, len(signatures), time.perf_counter() - started)
+
+
+async def bench_queued(aq, records: list[dict], concurrency: int, arrival_rate: float) -> dict:
+    """
+    AnchorQueueWorker with claim/release/save served from memory. Failed
+    batches are retried (backoff disabled) until everything is anchored.
+    """
+    queue: deque = deque()
+    by_id = {r["id"]: r for r in records}
+    enqueued_at: dict[str, float] = {}
+    latencies, signatures = [], set()
+    failures = 0
+    done = asyncio.Event()
+
+    class MemoryQueueWorker(aq.AnchorQueueWorker):
+        def _claim(self):
+            batch = []
+            while queue and len(batch) < self.batch_size:
+                batch.append(queue.popleft())
+            return batch
+
+        def _release(self, record_ids, error):
+            nonlocal failures
+            failures += len(record_ids)
+            queue.extend(by_id[i] for i in record_ids)
+
+    def save(_supabase, results):
+        now = time.perf_counter()
+        for r in results:
+            latencies.append(now - enqueued_at[r["id"]])
+            signatures.add(r["tx_signature"])
+        if len(latencies) == len(records):
+            loop.call_soon_threadsafe(done.set)
+        return len(results)
+
+    loop = asyncio.get_running_loop()
+    aq.save_anchors = save
+    aq.get_supabase_admin = lambda: None
+    worker = MemoryQueueWorker(concurrency=concurrency, poll_seconds=0.05)
+    await worker.start()
+
+    started = time.perf_counter()
+    interval = 1 / arrival_rate if arrival_rate else 0
+    for i, record in enumerate(records):
+        enqueued_at[record["id"]] = time.perf_counter()
+        queue.append(record)
+        if interval:
+            worker.notify()
+            await asyncio.sleep(max(0.0, started + (i + 1) * interval - time.perf_counter()))
+    worker.notify()
+
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await worker.stop()
+    result = summarize("queued", latencies, len(latencies), 0, len(signatures), elapsed)
+    result["retried_records"] = failures
+    return result
+
+
+# ── main ─────────────────────────────────────────────────────────────────────
+
+def print_table(results: list[dict]) -> None:
+    print(f"\n{'mode':<9}{'records':>9}{'failed':>8}{'txs':>7}{'rec/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['mode']:<9}{r['records']:>9}{r['failed']:>8}{r['transactions']:>7}{r['records_per_second']:>10}"
+              f"{lat['p50']:>9}{lat['p95']:>9}{lat['p99']:>9}{lat['max']:>9}")
+
+
+async def run(args) -> list[dict]:
+    # Imported here so the env overrides below are seen at module load
+    from app.services import blockchain_service as bs
+    from app.services import anchor_queue as aq
+
+    records = make_records(args.records, args.seed)
+    print(f"🚀 {len(records)} records → {bs.SOLANA_RPC_URL} "
+          f"(concurrency {args.concurrency}, Merkle batch {bs.MERKLE_BATCH_SIZE})")
+
+    results = []
+    try:
+        await bs.solana_rpc.refresh_balance()
+        for mode in args.modes:
+            print(f"⏱️  {mode}...")
+            # The service logs every anchored tx / failure; keep that out of the report
+            with contextlib.ExitStack() as stack:
+                if not args.verbose:
+                    stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+                    stack.enter_context(contextlib.redirect_stderr(io.StringIO()))
+                if mode == "single":
+                    results.append(await bench_single(bs, records, args.concurrency))
+                elif mode == "batched":
+                    results.append(await bench_batched(bs, records, args.concurrency))
+                elif mode == "queued":
+                    results.append(await bench_queued(aq, records, args.concurrency, args.arrival_rate))
+    finally:
+        await bs.solana_rpc.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Solana anchoring modes")
+    parser.add_argument("--rpc-url", default="http://127.0.0.1:8899", help="Solana RPC (default: local stub)")
+    parser.add_argument("--records", type=int, default=2000, help="Records per mode (default: 2000)")
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=["single", "batched", "queued"],
+                        help="Comma-separated: single,batched,queued")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel sends / batches (default: 8)")
+    parser.add_argument("--batch-size", type=int, help="Override MERKLE_BATCH_SIZE")
+    parser.add_argument("--arrival-rate", type=float, default=0.0,
+                        help="Queued mode: records/sec fed into the queue (default: all at once)")
+    parser.add_argument("--keypair", default=os.path.join(tempfile.gettempdir(), "bench_solana_keypair.json"),
+                        help="Throwaway fee-payer keypair (created if missing)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print only the JSON results")
+    parser.add_argument("--verbose", action="store_true", help="Show the service's per-transaction logs")
+    args = parser.parse_args()
+
+    os.environ["SOLANA_RPC_URL"] = args.rpc_url
+    os.environ["SOLANA_KEYPAIR_PATH"] = args.keypair
+    if args.batch_size:
+        os.environ["MERKLE_BATCH_SIZE"] = str(args.batch_size)
+        os.environ["ANCHOR_QUEUE_BATCH_SIZE"] = str(args.batch_size)
+
+    results = asyncio.run(run(args))
+
+    try:
+        stub_stats = httpx.get(args.rpc_url.rstrip("/") + "/stats", timeout=2).json()
+    except Exception:
+        stub_stats = None
+
+    if not args.json:
+        print_table(results)
+        if stub_stats:
+            print(f"\n📊 RPC stub: {stub_stats}")
+    print(json.dumps({"event": "bench_anchoring", "results": results, "rpc": stub_stats}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Password hashing cost / login-storm benchmark.
+
+Two parts:
+
+  cost    time one pbkdf2_sha256 hash at each --rounds value, to pick
+          PASSWORD_HASH_ROUNDS for this hardware (aim for the highest cost
+          whose p95 you can afford per login)
+  storm   fire --logins concurrent verifications and, meanwhile, measure how
+          late a 5 ms heartbeat coroutine wakes up (event-loop lag, i.e. what
+          every other endpoint would feel):
+            inline  verify_password called in the coroutine (the old handler)
+            pool    verify_password_async (bounded pool, 503 past the limit)
+
+Run:
+  python scripts/bench_password_hashing.py
+  python scripts/bench_password_hashing.py --rounds 29000,100000,300000 --logins 200 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_anchoring import percentile
+
+HEARTBEAT_SECONDS = 0.005
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def bench_cost(rounds_list: list[int], samples: int) -> list[dict]:
+    from passlib.hash import pbkdf2_sha256
+
+    results = []
+    for rounds in rounds_list:
+        handler = pbkdf2_sha256.using(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            handler.hash("correct horse battery staple")
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        results.append({
+            "rounds": rounds,
+            "mean_ms": ms(sum(timings) / len(timings)),
+            "p95_ms": ms(percentile(timings, 95)),
+            "hashes_per_second_per_core": round(len(timings) / sum(timings), 1),
+        })
+    return results
+
+
+async def bench_storm(mode: str, logins: int) -> dict:
+    from app.core import security
+
+    stored = security.get_password_hash("correct horse battery staple")
+    lags: list[float] = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            expected = time.perf_counter() + HEARTBEAT_SECONDS
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    async def login():
+        if mode == "inline":
+            return security.verify_password("correct horse battery staple", stored)
+        return await security.verify_password_async("correct horse battery staple", stored)
+
+    probe = asyncio.create_task(heartbeat())
+    await asyncio.sleep(HEARTBEAT_SECONDS * 2)
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(login() for _ in range(logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    ok = sum(1 for o in outcomes if o is True)
+    rejected = sum(1 for o in outcomes if getattr(o, "status_code", None) == 503)
+    lags.sort()
+    return {
+        "mode": mode,
+        "logins": logins,
+        "verified": ok,
+        "rejected_503": rejected,
+        "elapsed_seconds": round(elapsed, 3),
+        "logins_per_second": round(ok / elapsed, 1) if elapsed > 0 else 0.0,
+        "loop_lag_ms": {
+            "p50": ms(percentile(lags, 50)),
+            "p99": ms(percentile(lags, 99)),
+            "max": ms(lags[-1]) if lags else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password hashing cost and login storms")
+    parser.add_argument("--rounds", type=lambda s: [int(r) for r in s.split(",")], default=[29000, 100000, 300000],
+                        help="Comma-separated pbkdf2 rounds for the cost table")
+    parser.add_argument("--samples", type=int, default=20, help="Hashes per rounds value (default: 20)")
+    parser.add_argument("--logins", type=int, default=100, help="Concurrent logins in the storm (default: 100)")
+    parser.add_argument("--storm-rounds", type=int, help="PASSWORD_HASH_ROUNDS for the storm (default: config)")
+    parser.add_argument("--workers", type=int, help="PASSWORD_HASH_WORKERS for the storm (default: config)")
+    parser.add_argument("--max-pending", type=int, help="PASSWORD_HASH_MAX_PENDING for the storm (default: config)")
+    parser.add_argument("--json", action="store_true", help="Print only the JSON results")
+    args = parser.parse_args()
+
+    # Settings are read at import, so overrides go in before app.core.security loads
+    if args.storm_rounds:
+        os.environ["PASSWORD_HASH_ROUNDS"] = str(args.storm_rounds)
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    if args.max_pending:
+        os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.max_pending)
+
+    if not args.json:
+        print(f"⏱️  Hash cost at {args.rounds} rounds...")
+    cost = bench_cost(args.rounds, args.samples)
+
+    storm = []
+    for mode in ("inline", "pool"):
+        if not args.json:
+            print(f"🌩️  Login storm: {args.logins} concurrent, {mode}...")
+        storm.append(asyncio.run(bench_storm(mode, args.logins)))
+
+    from app.core import security
+    pool = security.password_pool_stats()
+    security.shutdown_password_pool()
+
+    if not args.json:
+        print(f"\n{'rounds':>9}{'mean ms':>10}{'p95 ms':>9}{'hash/s/core':>13}")
+        for r in cost:
+            print(f"{r['rounds']:>9}{r['mean_ms']:>10}{r['p95_ms']:>9}{r['hashes_per_second_per_core']:>13}")
+        print(f"\nStorm at {pool['rounds']} rounds, {pool['workers']} workers, max {pool['max_pending']} pending")
+        print(f"{'mode':<8}{'ok':>6}{'503':>6}{'login/s':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}")
+        for r in storm:
+            lag = r["loop_lag_ms"]
+            print(f"{r['mode']:<8}{r['verified']:>6}{r['rejected_503']:>6}{r['logins_per_second']:>10}"
+                  f"{lag['p50']:>10}{lag['p99']:>10}{lag['max']:>10}")
+    print(json.dumps({"event": "bench_password_hashing", "cost": cost, "storm": storm, "pool": pool}))
+
+
+if __name__ == "__main__":
+    main()
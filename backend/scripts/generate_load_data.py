@@ -0,0 +1,426 @@
+"""
+Large-scale synthetic data generator for load and capacity testing.
+
+Generates relief_records, beneficiary, sos_requests and wildfire_predictions
+rows with realistic Nepali province/district distributions (provinces are
+weighted by 2021 census population, disaster types by terrain) and either:
+
+  * writes COPY-ready tab-separated files plus a load.sql for psql, or
+  * streams them straight into a local Postgres with COPY FROM STDIN.
+
+Rows are generated lazily and flushed in chunks, so memory stays flat no
+matter how many rows are requested. Output is deterministic for a given --seed.
+
+Run:
+  python scripts/generate_load_data.py --relief-records 2000000 --out-dir loadtest/
+  python scripts/generate_load_data.py --relief-records 2000000 --beneficiaries 500000 \\
+      --sos 200000 --wildfire-days 30 --database-url postgresql://localhost/ndrrma_load
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from io import StringIO
+
+import psycopg2
+
+
+# ───────────────────────────────────────────────────────────────
+# Reference data
+# ───────────────────────────────────────────────────────────────
+# Population in millions (2021 census) drives how often a province is picked.
+PROVINCES = {
+    "koshi":         {"id": 1, "population": 4.97, "centroid": (27.05, 87.30), "terrain": "mixed"},
+    "madhesh":       {"id": 2, "population": 6.13, "centroid": (26.85, 85.90), "terrain": "terai"},
+    "bagmati":       {"id": 3, "population": 6.12, "centroid": (27.70, 85.35), "terrain": "hill"},
+    "gandaki":       {"id": 4, "population": 2.48, "centroid": (28.30, 84.05), "terrain": "hill"},
+    "lumbini":       {"id": 5, "population": 5.12, "centroid": (27.90, 82.85), "terrain": "mixed"},
+    "karnali":       {"id": 6, "population": 1.69, "centroid": (29.20, 82.20), "terrain": "mountain"},
+    "sudurpashchim": {"id": 7, "population": 2.71, "centroid": (29.30, 80.90), "terrain": "mixed"},
+}
+
+DISTRICTS = {
+    "koshi": ["Bhojpur", "Dhankuta", "Ilam", "Jhapa", "Khotang", "Morang", "Okhaldhunga",
+              "Panchthar", "Sankhuwasabha", "Solukhumbu", "Sunsari", "Taplejung", "Terhathum", "Udayapur"],
+    "madhesh": ["Bara", "Dhanusha", "Mahottari", "Parsa", "Rautahat", "Saptari", "Sarlahi", "Siraha"],
+    "bagmati": ["Bhaktapur", "Chitwan", "Dhading", "Dolakha", "Kathmandu", "Kavrepalanchok",
+                "Lalitpur", "Makwanpur", "Nuwakot", "Ramechhap", "Rasuwa", "Sindhuli", "Sindhupalchok"],
+    "gandaki": ["Baglung", "Gorkha", "Kaski", "Lamjung", "Manang", "Mustang",
+                "Myagdi", "Nawalpur", "Parbat", "Syangja", "Tanahun"],
+    "lumbini": ["Arghakhanchi", "Banke", "Bardiya", "Dang", "Eastern Rukum", "Gulmi",
+                "Kapilvastu", "Parasi", "Palpa", "Pyuthan", "Rolpa", "Rupandehi"],
+    "karnali": ["Dailekh", "Dolpa", "Humla", "Jajarkot", "Jumla",
+                "Kalikot", "Mugu", "Salyan", "Surkhet", "Western Rukum"],
+    "sudurpashchim": ["Achham", "Baitadi", "Bajhang", "Bajura", "Dadeldhura",
+                      "Darchula", "Doti", "Kailali", "Kanchanpur"],
+}
+
+# Urban / high-population districts are picked more often within their province.
+DISTRICT_WEIGHT = {
+    "Kathmandu": 4, "Lalitpur": 2, "Bhaktapur": 2, "Chitwan": 2, "Morang": 3, "Jhapa": 3,
+    "Sunsari": 2, "Rupandehi": 3, "Kailali": 3, "Kaski": 2, "Dhanusha": 2, "Banke": 2, "Dang": 2,
+}
+
+DISASTER_WEIGHTS = {
+    "terai":    {"Flood": 45, "Cold Wave": 15, "Fire": 12, "Drought": 10, "Epidemic": 10, "Earthquake": 5, "Landslide": 3},
+    "hill":     {"Landslide": 35, "Earthquake": 20, "Flood": 15, "Fire": 12, "Epidemic": 8, "Drought": 5, "Cold Wave": 5},
+    "mountain": {"Landslide": 30, "Cold Wave": 25, "Earthquake": 15, "Fire": 10, "Drought": 10, "Flood": 5, "Epidemic": 5},
+    "mixed":    {"Flood": 28, "Landslide": 25, "Earthquake": 12, "Fire": 12, "Cold Wave": 9, "Drought": 7, "Epidemic": 7},
+}
+
+FIRST_NAMES = [
+    "Ram", "Sita", "Hari", "Kamala", "Binod", "Gita", "Narayan", "Sunita", "Prakash", "Anita",
+    "Deepak", "Prabha", "Mohan", "Durga", "Shiva", "Laxmi", "Gopal", "Radha", "Krishna", "Saraswati",
+    "Bimala", "Dil", "Mina", "Roshan", "Nisha", "Sajan", "Maya", "Suresh", "Meena", "Rajan",
+    "Kabita", "Bikram", "Rekha", "Pemba", "Lhakpa", "Tika", "Bishnu", "Parbati", "Ganesh", "Janaki",
+]
+
+LAST_NAMES = [
+    "Thapa", "Sharma", "Koirala", "Shrestha", "Yadav", "Pun", "Bhattarai", "Gurung", "Adhikari",
+    "Bhusal", "Karki", "Oli", "Bista", "Tamang", "Magar", "Rai", "Limbu", "Neupane", "Rijal",
+    "Khanal", "Pokhrel", "Acharya", "Dhakal", "Giri", "Sherpa", "Chaudhary", "Mahato", "Shah",
+]
+
+SOS_STATUS_WEIGHTS = {"pending": 30, "acknowledged": 20, "dispatched": 20, "resolved": 27, "cancelled": 3}
+
+# Nepal bounding box for the wildfire grid
+LAT_RANGE = (26.35, 30.45)
+LONG_RANGE = (80.05, 88.20)
+
+EPOCH = datetime(2025, 1, 1)
+
+# District ids follow the order of DISTRICTS (1..77)
+DISTRICT_IDS = {}
+for _province, _districts in DISTRICTS.items():
+    for _district in _districts:
+        DISTRICT_IDS[_district] = len(DISTRICT_IDS) + 1
+
+
+# ───────────────────────────────────────────────────────────────
+# Row generators
+# ───────────────────────────────────────────────────────────────
+
+class Sampler:
+    """Weighted pickers with cumulative weights precomputed for speed."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.provinces = list(PROVINCES)
+        self.province_cum = _cumulative([PROVINCES[p]["population"] for p in self.provinces])
+        self.districts = {p: DISTRICTS[p] for p in self.provinces}
+        self.district_cum = {
+            p: _cumulative([DISTRICT_WEIGHT.get(d, 1) for d in DISTRICTS[p]]) for p in self.provinces
+        }
+        self.disasters = {t: list(w) for t, w in DISASTER_WEIGHTS.items()}
+        self.disaster_cum = {t: _cumulative(list(w.values())) for t, w in DISASTER_WEIGHTS.items()}
+        self.statuses = list(SOS_STATUS_WEIGHTS)
+        self.status_cum = _cumulative(list(SOS_STATUS_WEIGHTS.values()))
+        self.officers = [
+            (f"OFF{1000 + i}", f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}")
+            for i in range(500)
+        ]
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def province(self) -> str:
+        return self.rng.choices(self.provinces, cum_weights=self.province_cum)[0]
+
+    def district(self, province: str) -> str:
+        return self.rng.choices(self.districts[province], cum_weights=self.district_cum[province])[0]
+
+    def disaster(self, province: str) -> str:
+        terrain = PROVINCES[province]["terrain"]
+        return self.rng.choices(self.disasters[terrain], cum_weights=self.disaster_cum[terrain])[0]
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def timestamp(self, days: int = 365) -> datetime:
+        return EPOCH + timedelta(seconds=self.rng.randrange(days * 86_400))
+
+    def gps(self, province: str) -> tuple:
+        lat, lng = PROVINCES[province]["centroid"]
+        return round(self.rng.gauss(lat, 0.30), 6), round(self.rng.gauss(lng, 0.45), 6)
+
+
+def _cumulative(weights: list) -> list:
+    total, out = 0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def relief_record_rows(s: Sampler, count: int):
+    for _ in range(count):
+        province = s.province()
+        officer_id, officer_name = s.rng.choice(s.officers)
+        created = s.timestamp().isoformat()
+        yield (
+            s.uuid(),
+            s.name(),
+            f"{s.rng.randint(10, 99)}-{s.rng.randint(10, 99)}-{s.rng.randint(10, 99)}-{s.rng.randint(10000, 99999)}",
+            # Log-normal: most disbursements are small, a long tail is large
+            round(min(max(s.rng.lognormvariate(10.8, 0.8), 5_000), 2_000_000), 2),
+            province,
+            s.district(province),
+            s.disaster(province),
+            officer_name,
+            officer_id,
+            created,
+            created,
+        )
+
+
+def beneficiary_rows(s: Sampler, count: int):
+    for i in range(count):
+        province = s.province()
+        district = s.district(province)
+        district_id = DISTRICT_IDS[district]
+        yield (
+            s.uuid(),
+            s.name(),
+            # Unique by construction: the sequence number is part of the id
+            f"{district_id:02d}-{s.rng.randint(10, 99)}-{i:09d}",
+            PROVINCES[province]["id"],
+            district_id,
+            s.rng.randint(1, 19),
+            s.timestamp().isoformat(),
+        )
+
+
+def sos_rows(s: Sampler, count: int):
+    for _ in range(count):
+        province = s.province()
+        lat, lng = s.gps(province)
+        created = s.timestamp(days=30)
+        status = s.rng.choices(s.statuses, cum_weights=s.status_cum)[0]
+        acknowledged = dispatched = resolved = None
+        if status in ("acknowledged", "dispatched", "resolved"):
+            acknowledged = created + timedelta(minutes=s.rng.randint(1, 30))
+        if status in ("dispatched", "resolved"):
+            dispatched = acknowledged + timedelta(minutes=s.rng.randint(5, 90))
+        if status == "resolved":
+            resolved = dispatched + timedelta(hours=s.rng.randint(1, 24))
+        yield (
+            s.uuid(),
+            s.name(),
+            f"98{s.rng.randint(0, 99_999_999):08d}",
+            lat,
+            lng,
+            status,
+            f"Team-{s.rng.randint(1, 40)}" if dispatched else None,
+            None,
+            acknowledged.isoformat() if acknowledged else None,
+            dispatched.isoformat() if dispatched else None,
+            resolved.isoformat() if resolved else None,
+            created.isoformat(),
+        )
+
+
+def _nearest_province(lat: float, lng: float) -> str:
+    return min(
+        PROVINCES,
+        key=lambda p: (PROVINCES[p]["centroid"][0] - lat) ** 2 + (PROVINCES[p]["centroid"][1] - lng) ** 2,
+    )
+
+
+def wildfire_rows(s: Sampler, days: int, step: float):
+    lat_steps = int((LAT_RANGE[1] - LAT_RANGE[0]) / step) + 1
+    long_steps = int((LONG_RANGE[1] - LONG_RANGE[0]) / step) + 1
+
+    # Static per-cell attributes, computed once and reused for every day
+    cells = []
+    for i in range(lat_steps):
+        lat = round(LAT_RANGE[0] + i * step, 4)
+        for j in range(long_steps):
+            lng = round(LONG_RANGE[0] + j * step, 4)
+            province = _nearest_province(lat, lng)
+            districts = DISTRICTS[province]
+            district = districts[(i * 31 + j * 17) % len(districts)]
+            elevation = int(60 + (lat - LAT_RANGE[0]) * 1400 + s.rng.uniform(-150, 150))
+            cells.append((lat, lng, max(elevation, 60), province, district))
+
+    for day in range(days):
+        valid_time = EPOCH + timedelta(days=day, hours=12)
+        # Pre-monsoon (Mar–May) fire season raises every cell's probability
+        season = 1.0 + 1.5 * math.exp(-((valid_time.timetuple().tm_yday - 105) / 35) ** 2)
+        for lat, lng, elevation, province, district in cells:
+            fire_prob = min(s.rng.betavariate(1.2, 12) * season, 1.0)
+            if fire_prob >= 0.6:
+                category = "extreme"
+            elif fire_prob >= 0.4:
+                category = "high"
+            elif fire_prob >= 0.2:
+                category = "medium"
+            elif fire_prob >= 0.05:
+                category = "low"
+            else:
+                category = "minimal"
+            yield (
+                lat,
+                lng,
+                elevation,
+                valid_time.isoformat(),
+                round(fire_prob, 6),
+                int(fire_prob >= 0.4),
+                category,
+                f"{district} Municipality",
+                district,
+                province.capitalize(),
+                PROVINCES[province]["id"],
+                valid_time.date().isoformat(),
+            )
+
+
+TABLE_COLUMNS = {
+    "relief_records": [
+        "id", "full_name", "citizenship_no", "relief_amount", "province", "district",
+        "disaster_type", "officer_name", "officer_id", "created_at", "updated_at",
+    ],
+    "beneficiary": [
+        "id", "full_name", "citizenship_number", "province_id", "district_id", "ward", "created_at",
+    ],
+    "sos_requests": [
+        "id", "full_name", "contact_number", "gps_lat", "gps_long", "status", "response_team",
+        "notes", "acknowledged_at", "dispatched_at", "resolved_at", "created_at",
+    ],
+    "wildfire_predictions": [
+        "latitude", "longitude", "elevation", "valid_time", "fire_prob", "prediction_class",
+        "fire_category", "gapa_napa", "district", "pr_name", "province", "prediction_date",
+    ],
+}
+
+
+# ───────────────────────────────────────────────────────────────
+# COPY encoding + sinks
+# ───────────────────────────────────────────────────────────────
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+    return text
+
+
+def iter_copy_chunks(rows, chunk_size: int):
+    """Encode rows as COPY text, yielding (text, row_count) per chunk."""
+    buf, n = [], 0
+    for row in rows:
+        buf.append("\t".join(_copy_value(v) for v in row))
+        n += 1
+        if n == chunk_size:
+            yield "\n".join(buf) + "\n", n
+            buf, n = [], 0
+    if buf:
+        yield "\n".join(buf) + "\n", n
+
+
+def write_copy_file(out_dir: str, table: str, rows, chunk_size: int) -> int:
+    path = os.path.join(out_dir, f"{table}.tsv")
+    total = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for text, n in iter_copy_chunks(rows, chunk_size):
+            f.write(text)
+            total += n
+            print(f"  {table}: {total:,} rows written", end="\r")
+    print(f"  ✅ {table}: {total:,} rows → {path}")
+    return total
+
+
+def copy_into_postgres(conn, table: str, rows, chunk_size: int) -> int:
+    columns = ", ".join(TABLE_COLUMNS[table])
+    sql = f"COPY {table} ({columns}) FROM STDIN"
+    total = 0
+    with conn.cursor() as cursor:
+        for text, n in iter_copy_chunks(rows, chunk_size):
+            cursor.copy_expert(sql, StringIO(text))
+            conn.commit()
+            total += n
+            print(f"  {table}: {total:,} rows copied", end="\r")
+    print(f"  ✅ {table}: {total:,} rows copied")
+    return total
+
+
+def write_load_script(out_dir: str, tables: list):
+    path = os.path.join(out_dir, "load.sql")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("-- Load generated data: psql \"$DATABASE_URL\" -f load.sql (run from this directory)\n")
+        for table in tables:
+            columns = ", ".join(TABLE_COLUMNS[table])
+            f.write(f"\\copy {table} ({columns}) FROM '{table}.tsv'\n")
+    print(f"  📝 psql loader → {path}")
+
+
+# ───────────────────────────────────────────────────────────────
+# Entry point
+# ───────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NDRRMA data for load testing")
+    parser.add_argument("--relief-records", type=int, default=0, help="Number of relief_records rows")
+    parser.add_argument("--beneficiaries", type=int, default=0, help="Number of beneficiary rows")
+    parser.add_argument("--sos", type=int, default=0, help="Number of sos_requests rows")
+    parser.add_argument("--wildfire-days", type=int, default=0, help="Days of wildfire grid predictions")
+    parser.add_argument("--grid-step", type=float, default=0.05, help="Wildfire grid spacing in degrees (default: 0.05)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per COPY chunk (default: 50000)")
+    parser.add_argument("--out-dir", type=str, help="Write COPY-ready .tsv files + load.sql here")
+    parser.add_argument("--database-url", type=str, help="COPY directly into this (local) Postgres")
+    parser.add_argument("--truncate", action="store_true", help="TRUNCATE target tables before loading")
+    args = parser.parse_args()
+
+    if not args.out_dir and not args.database_url:
+        parser.error("provide --out-dir and/or --database-url")
+
+    plan = [
+        ("relief_records", args.relief_records, lambda s: relief_record_rows(s, args.relief_records)),
+        ("beneficiary", args.beneficiaries, lambda s: beneficiary_rows(s, args.beneficiaries)),
+        ("sos_requests", args.sos, lambda s: sos_rows(s, args.sos)),
+        ("wildfire_predictions", args.wildfire_days, lambda s: wildfire_rows(s, args.wildfire_days, args.grid_step)),
+    ]
+    # Each table's seed offset is its position in the full plan, so a table's
+    # rows don't change when other tables are skipped
+    plan = [(table, offset, make_rows) for offset, (table, amount, make_rows) in enumerate(plan) if amount > 0]
+    if not plan:
+        parser.error("nothing to generate — pass at least one row count")
+
+    conn = psycopg2.connect(args.database_url) if args.database_url else None
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    try:
+        if conn and args.truncate:
+            with conn.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {', '.join(table for table, _, _ in plan)} CASCADE")
+            conn.commit()
+
+        for table, offset, make_rows in plan:
+            started = time.perf_counter()
+            # Each table gets its own deterministic stream so outputs are reproducible
+            if args.out_dir:
+                total = write_copy_file(args.out_dir, table, make_rows(Sampler(args.seed + offset)), args.chunk_size)
+            if conn:
+                total = copy_into_postgres(conn, table, make_rows(Sampler(args.seed + offset)), args.chunk_size)
+            elapsed = time.perf_counter() - started
+            print(f"     {total / max(elapsed, 1e-9):,.0f} rows/sec")
+
+        if args.out_dir:
+            write_load_script(args.out_dir, [table for table, _, _ in plan])
+    finally:
+        if conn:
+            conn.close()
+
+    print("\n✅ Load data generation complete!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
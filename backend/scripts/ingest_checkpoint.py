@@ -0,0 +1,164 @@
+"""
+Checkpoint manifest + throughput metrics shared by the wildfire upload scripts.
+
+The manifest is a small JSON file recording, per source CSV, its checksum,
+the batch size used and which batches have already been committed. An
+interrupted run re-opens the manifest and skips those batches, so it resumes
+exactly where it stopped. If the file's checksum or the batch size changed,
+the entry is reset and the file is ingested from the start.
+
+Metrics are emitted as single-line JSON objects on stdout so they can be
+grepped or piped into a log collector:
+
+    {"event": "ingest_metrics", "source": "...", "rows": 120000,
+     "rows_per_sec": 8123.4, "mb_per_sec": 3.1,
+     "stage_seconds": {"parse": 1.2, "transform": 0.8, "transfer": 12.9, "commit": 0.4}}
+
+"commit" is the database commit for the Neon uploader; the Supabase REST
+inserts commit on their own, so there it is the manifest write that
+checkpoints each batch.
+
+Callers compute file_checksum() once per file and pass it to is_complete()
+and open_file(), so a large CSV is only hashed once per run.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+STAGES = ("parse", "transform", "transfer", "commit")
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointManifest:
+    """JSON checkpoint manifest, rewritten atomically after every batch."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = {"version": 1, "files": {}}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def open_file(self, source: str, batch_size: int, resume: bool = True, checksum: str | None = None) -> dict:
+        """
+        Return the manifest entry for `source`, creating or resetting it when
+        resuming is disabled or the file/batch size no longer match.
+        """
+        key = os.path.abspath(source)
+        checksum = checksum or file_checksum(source)
+        entry = self.data["files"].get(key)
+
+        if entry and resume and entry["checksum"] == checksum and entry["batch_size"] == batch_size:
+            if entry["completed_batches"] or entry["journaled_batches"]:
+                print(f"↩️  Resuming {os.path.basename(source)}: "
+                      f"{len(entry['completed_batches'])} batches / {entry['rows']} rows already committed")
+            return entry
+
+        entry = {
+            "checksum": checksum,
+            "size_bytes": os.path.getsize(source),
+            "batch_size": batch_size,
+            "completed_batches": [],
+            "journaled_batches": [],
+            "rows": 0,
+            "status": "in_progress",
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        self.data["files"][key] = entry
+        self.save()
+        return entry
+
+    def skip_batches(self, source: str) -> set:
+        """Batch numbers that must not be sent again for `source`."""
+        entry = self.data["files"][os.path.abspath(source)]
+        return set(entry["completed_batches"]) | set(entry["journaled_batches"])
+
+    def is_complete(self, source: str, checksum: str | None = None) -> bool:
+        entry = self.data["files"].get(os.path.abspath(source))
+        return bool(entry) and entry["status"] == "complete" and entry["checksum"] == (checksum or file_checksum(source))
+
+    def mark_batch(self, source: str, batch_num: int, rows: int, journaled: bool = False):
+        entry = self.data["files"][os.path.abspath(source)]
+        if journaled:
+            entry["journaled_batches"].append(batch_num)
+        else:
+            entry["completed_batches"].append(batch_num)
+            entry["rows"] += rows
+        entry["updated_at"] = datetime.utcnow().isoformat()
+        self.save()
+
+    def mark_complete(self, source: str):
+        entry = self.data["files"][os.path.abspath(source)]
+        entry["status"] = "complete"
+        entry["updated_at"] = datetime.utcnow().isoformat()
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class IngestMetrics:
+    """
+    Row/byte counters plus per-stage timings.
+
+    Stage timings are summed busy time, so with concurrent transfers
+    `stage_seconds["transfer"]` can exceed the wall-clock `elapsed_seconds`.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.rows = 0
+        self.bytes = 0
+        self.batches = 0
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stage_seconds[name] += time.perf_counter() - started
+
+    def add_batch(self, rows: int, nbytes: int):
+        with self._lock:
+            self.rows += rows
+            self.bytes += nbytes
+            self.batches += 1
+
+    def summary(self) -> dict:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        return {
+            "event": "ingest_metrics",
+            "source": self.source,
+            "batches": self.batches,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.rows / elapsed, 1),
+            "mb_per_sec": round(self.bytes / elapsed / 1_000_000, 3),
+            "stage_seconds": {k: round(v, 3) for k, v in self.stage_seconds.items()},
+        }
+
+    def emit(self):
+        print(json.dumps(self.summary()))
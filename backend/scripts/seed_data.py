@@ -1,6 +1,9 @@
 """
 Seed realistic data for Nepal disaster relief dashboard.
 Run: python scripts/seed_data.py
+
+For production-scale volumes (millions of rows) use
+scripts/generate_load_data.py against a local Postgres instead.
 """
 import sys
 import os
@@ -126,11 +129,10 @@ print("\nStep 3: Seeding relief_records...")
 existing = sb.table("relief_records").select("id").execute()
 if existing.data:
     ids = [r["id"] for r in existing.data]
-    # Delete in batches
+    # Delete in batches — one request per 100 ids
     for i in range(0, len(ids), 100):
         batch = ids[i:i+100]
-        for rid in batch:
-            sb.table("relief_records").delete().eq("id", rid).execute()
+        sb.table("relief_records").delete().in_("id", batch).execute()
     print(f"  Deleted {len(ids)} existing records")
 
 # Generate realistic records
@@ -0,0 +1,270 @@
+"""
+Local Solana JSON-RPC stand-in for offline anchoring tests and benchmarks.
+
+Implements just the methods blockchain_service.py uses:
+  getBalance, getLatestBlockhash, sendTransaction, getTransaction, requestAirdrop
+
+Transactions are really decoded: the memo is read from the Memo program
+instruction, the fee payer is charged 5000 lamports and the blockhash must be
+one this stub issued recently, so the client's blockhash cache and retry path
+behave as they do against devnet. getTransaction returns the jsonParsed shape
+(memo in `parsed` plus the program log line).
+
+Latency and failures are injectable:
+  --latency-ms / --jitter-ms     per-request delay (normal distribution)
+  --error-rate                   sendTransaction JSON-RPC errors ("Node is behind")
+  --blockhash-error-rate         sendTransaction "Blockhash not found"
+  --rate-limit-rate              HTTP 429 on any request
+  --finalize-seconds             getTransaction returns null until finalized
+
+Run:
+  python scripts/solana_rpc_stub.py --port 8899 --latency-ms 80 --jitter-ms 30 --error-rate 0.01
+  SOLANA_RPC_URL=http://127.0.0.1:8899 python -m app.main
+GET /stats returns request/transaction counters.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import random
+import time
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from solders.hash import Hash  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.transaction import Transaction  # type: ignore
+
+MEMO_PROGRAM_ID = "MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr"
+LAMPORTS_PER_SIGNATURE = 5_000
+SLOT_SECONDS = 0.4
+
+
+class StubChain:
+    """In-memory ledger: balances, issued blockhashes and sent transactions."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.started = time.monotonic()
+        self.balances: dict[str, int] = {}
+        self.blockhashes: dict[str, float] = {}   # blockhash → issued at
+        self.transactions: dict[str, dict] = {}
+        self.counters = Counter()
+
+    # ── helpers ──────────────────────────────────────────────────────────────
+
+    def slot(self) -> int:
+        return int((time.monotonic() - self.started) / SLOT_SECONDS)
+
+    def context(self) -> dict:
+        return {"slot": self.slot(), "apiVersion": "stub"}
+
+    def balance(self, pubkey: str) -> int:
+        return self.balances.setdefault(pubkey, self.args.initial_lamports)
+
+    def latest_blockhash(self) -> str:
+        # A new blockhash every slot, like a real cluster
+        slot = self.slot()
+        blockhash = str(Hash(hashlib.sha256(f"stub-slot-{slot}".encode()).digest()))
+        self.blockhashes.setdefault(blockhash, time.monotonic())
+        return blockhash
+
+    def blockhash_valid(self, blockhash: str) -> bool:
+        issued = self.blockhashes.get(blockhash)
+        return issued is not None and time.monotonic() - issued <= self.args.blockhash_valid_seconds
+
+    def fake_signature(self) -> str:
+        return str(Signature.from_bytes(self.rng.randbytes(64)))
+
+    # ── methods ──────────────────────────────────────────────────────────────
+
+    def getBalance(self, params):
+        return {"context": self.context(), "value": self.balance(params[0])}
+
+    def getLatestBlockhash(self, params):
+        return {
+            "context": self.context(),
+            "value": {"blockhash": self.latest_blockhash(), "lastValidBlockHeight": self.slot() + 150},
+        }
+
+    def requestAirdrop(self, params):
+        pubkey, lamports = params[0], params[1]
+        self.balances[pubkey] = self.balance(pubkey) + lamports
+        return self.fake_signature()
+
+    def sendTransaction(self, params):
+        if self.rng.random() < self.args.error_rate:
+            raise RpcError(-32005, "Node is behind by 42 slots", {"numSlotsBehind": 42})
+        if self.rng.random() < self.args.blockhash_error_rate:
+            raise SimulationError("BlockhashNotFound", "Blockhash not found")
+
+        tx = Transaction.from_bytes(base64.b64decode(params[0]))
+        message = tx.message
+        if not self.blockhash_valid(str(message.recent_blockhash)):
+            raise SimulationError("BlockhashNotFound", "Blockhash not found")
+
+        keys = [str(k) for k in message.account_keys]
+        payer = keys[0]
+        if self.balance(payer) < LAMPORTS_PER_SIGNATURE:
+            raise SimulationError("AccountNotFound", "Attempt to debit an account but found no record of a prior credit.")
+
+        signature = str(tx.signatures[0])
+        if signature in self.transactions:
+            raise SimulationError("AlreadyProcessed", "This transaction has already been processed")
+
+        memo = None
+        for ix in message.instructions:
+            if keys[ix.program_id_index] == MEMO_PROGRAM_ID:
+                memo = bytes(ix.data).decode("utf-8")
+
+        self.balances[payer] -= LAMPORTS_PER_SIGNATURE
+        self.transactions[signature] = {
+            "slot": self.slot(),
+            "block_time": int(time.time()),
+            "sent_at": time.monotonic(),
+            "keys": keys,
+            "blockhash": str(message.recent_blockhash),
+            "memo": memo,
+        }
+        self.counters["transactions"] += 1
+        return signature
+
+    def getTransaction(self, params):
+        tx = self.transactions.get(params[0])
+        if tx is None or time.monotonic() - tx["sent_at"] < self.args.finalize_seconds:
+            return None
+        instructions, logs = [], []
+        if tx["memo"] is not None:
+            instructions.append({
+                "parsed": tx["memo"],
+                "program": "spl-memo",
+                "programId": MEMO_PROGRAM_ID,
+                "stackHeight": None,
+            })
+            logs = [
+                f"Program {MEMO_PROGRAM_ID} invoke [1]",
+                f'Program log: Memo (len {len(tx["memo"].encode())}): "{tx["memo"]}"',
+                f"Program {MEMO_PROGRAM_ID} success",
+            ]
+        return {
+            "slot": tx["slot"],
+            "blockTime": tx["block_time"],
+            "version": "legacy",
+            "transaction": {
+                "signatures": [params[0]],
+                "message": {
+                    "accountKeys": [
+                        {"pubkey": k, "signer": i == 0, "writable": i == 0, "source": "transaction"}
+                        for i, k in enumerate(tx["keys"])
+                    ],
+                    "recentBlockhash": tx["blockhash"],
+                    "instructions": instructions,
+                },
+            },
+            "meta": {
+                "err": None,
+                "status": {"Ok": None},
+                "fee": LAMPORTS_PER_SIGNATURE,
+                "preBalances": [0] * len(tx["keys"]),
+                "postBalances": [0] * len(tx["keys"]),
+                "innerInstructions": [],
+                "logMessages": logs,
+                "preTokenBalances": [],
+                "postTokenBalances": [],
+                "rewards": [],
+            },
+        }
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class SimulationError(RpcError):
+    """-32002 with the simulation result payload real nodes attach."""
+
+    def __init__(self, err: str, message: str):
+        super().__init__(-32002, f"Transaction simulation failed: {message}", {
+            "err": err,
+            "logs": [],
+            "accounts": None,
+            "unitsConsumed": 0,
+            "returnData": None,
+        })
+
+
+def build_app(args) -> FastAPI:
+    chain = StubChain(args)
+    app = FastAPI(title="Solana RPC stub")
+
+    async def handle(call: dict) -> dict:
+        method = call.get("method")
+        chain.counters[f"method:{method}"] += 1
+        response = {"jsonrpc": "2.0", "id": call.get("id")}
+        handler = getattr(chain, method, None) if method in METHODS else None
+        if handler is None:
+            response["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+            return response
+        try:
+            response["result"] = handler(call.get("params") or [])
+        except RpcError as e:
+            chain.counters["errors"] += 1
+            response["error"] = {"code": e.code, "message": e.message}
+            if e.data is not None:
+                response["error"]["data"] = e.data
+        return response
+
+    @app.post("/")
+    async def rpc(request: Request):
+        if args.latency_ms or args.jitter_ms:
+            delay = max(0.0, chain.rng.gauss(args.latency_ms, args.jitter_ms)) / 1000
+            await asyncio.sleep(delay)
+        if chain.rng.random() < args.rate_limit_rate:
+            chain.counters["rate_limited"] += 1
+            return JSONResponse({"error": "Too many requests"}, status_code=429)
+
+        body = await request.json()
+        if isinstance(body, list):
+            return [await handle(call) for call in body]
+        return await handle(body)
+
+    @app.get("/stats")
+    async def stats():
+        return {"slot": chain.slot(), **chain.counters}
+
+    return app
+
+
+METHODS = {"getBalance", "getLatestBlockhash", "sendTransaction", "getTransaction", "requestAirdrop"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Solana JSON-RPC stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean per-request latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="sendTransaction failure probability")
+    parser.add_argument("--blockhash-error-rate", type=float, default=0.0, help="Probability of 'Blockhash not found'")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of HTTP 429 per request")
+    parser.add_argument("--finalize-seconds", type=float, default=0.0, help="Delay before getTransaction sees a tx")
+    parser.add_argument("--blockhash-valid-seconds", type=float, default=60.0, help="How long an issued blockhash is accepted")
+    parser.add_argument("--initial-lamports", type=int, default=1_000_000_000_000, help="Starting balance of unknown accounts")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for latency/error injection")
+    args = parser.parse_args()
+
+    print(f"🧪 Solana RPC stub on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}±{args.jitter_ms}ms, error rate {args.error_rate})")
+    uvicorn.run(build_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,30 @@
 """
 CSV Upload Script for Wildfire Predictions
 This script uploads wildfire prediction CSV files to Supabase database.
+
+Batches are read lazily from the CSV and posted concurrently (bounded by
+--concurrency). Failed batches are retried with exponential backoff; batches
+that still fail are appended to a JSONL failure journal that can be replayed
+later with --replay, so no rows are silently dropped.
+
+Every row gets an id derived from the file's checksum and its row number,
+and batches are upserted on that id, so a retried attempt that had in fact
+committed, a replayed journal entry or a resumed run never duplicates rows.
+
+Progress is checkpointed per batch to a JSON manifest (see
+scripts/ingest_checkpoint.py), so an interrupted run resumes where it stopped,
+and throughput / per-stage timings are printed as a JSON metrics line.
 """
 
 import pandas as pd
 import sys
 import os
+import json
+import time
+import random
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 
 # Add parent directory to path for imports
@@ -13,15 +32,188 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.db.supabase import get_supabase_admin
 from app.core.config import settings
+from ingest_checkpoint import CheckpointManifest, IngestMetrics, file_checksum
+
+
+DEFAULT_JOURNAL_PATH = "wildfire_upload_failures.jsonl"
+DEFAULT_CHECKPOINT_PATH = "wildfire_upload_checkpoint.json"
+
+
+def wildfire_row_id(checksum: str, row_number: int) -> str:
+    """Stable id for row `row_number` (0-based, header excluded) of the file with `checksum`."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"wildfire_predictions:{checksum}:{row_number}"))
+
+
+def iter_wildfire_batches(
+    csv_file_path: str,
+    batch_size: int = 1000,
+    skip: set | None = None,
+    metrics: IngestMetrics | None = None,
+    checksum: str | None = None,
+):
+    """
+    Lazily yield (batch_num, rows, nbytes) tuples from a wildfire CSV file.
+
+    Only one chunk of `batch_size` rows is held in memory at a time. Rows are
+    JSON-safe dicts (ISO timestamps, NaN → None) with a deterministic `id`
+    (see wildfire_row_id), ready for a Supabase upsert; nbytes is the size of
+    their JSON payload. Batch numbers in `skip` (already committed according
+    to the checkpoint manifest) are read but not yielded.
+    """
+    metrics = metrics or IngestMetrics(csv_file_path)
+    skip = skip or set()
+    checksum = checksum or file_checksum(csv_file_path)
+    column_mapping = {
+        'GaPa_NaPa': 'gapa_napa',
+        'DISTRICT': 'district',
+        'PR_NAME': 'pr_name',
+        'PROVINCE': 'province'
+    }
+
+    reader = pd.read_csv(csv_file_path, chunksize=batch_size)
+    batch_num = 0
+    while True:
+        with metrics.stage("parse"):
+            chunk = next(reader, None)
+        if chunk is None:
+            return
+        batch_num += 1
+        if batch_num in skip:
+            continue
+
+        with metrics.stage("transform"):
+            # Rename columns to match database schema (lowercase with underscores)
+            chunk = chunk.rename(columns=column_mapping)
+
+            # The reader numbers rows across chunks, independent of batch size
+            chunk.insert(0, "id", [wildfire_row_id(checksum, int(n)) for n in chunk.index])
+
+            # Convert date columns to proper format
+            if 'valid_time' in chunk.columns:
+                chunk['valid_time'] = pd.to_datetime(chunk['valid_time'])
+
+            if 'prediction_date' in chunk.columns:
+                chunk['prediction_date'] = pd.to_datetime(chunk['prediction_date'])
+
+            # Ensure fire_category is lowercase
+            if 'fire_category' in chunk.columns:
+                chunk['fire_category'] = chunk['fire_category'].str.lower()
+
+            payload = chunk.to_json(orient="records", date_format="iso")
+            rows = json.loads(payload)
+
+        yield batch_num, rows, len(payload.encode("utf-8"))
+
+
+def _insert_with_retry(supabase, rows: list, max_retries: int = 5, base_delay: float = 0.5):
+    """
+    Upsert one batch, retrying with exponential backoff (plus jitter); rows
+    already present from an earlier attempt are skipped. Re-raises the last
+    error once `max_retries` attempts are exhausted.
+    """
+    for attempt in range(max_retries):
+        try:
+            supabase.table("wildfire_predictions") \
+                .upsert(rows, on_conflict="id", ignore_duplicates=True) \
+                .execute()
+            return len(rows)
+        except Exception:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(base_delay * (2 ** attempt) + random.uniform(0, base_delay))
+
+
+def _journal_failure(journal_path: str, source: str, batch_num: int, rows: list, error: Exception):
+    """Append a failed batch to the JSONL failure journal."""
+    entry = {
+        "source": source,
+        "batch": batch_num,
+        "failed_at": datetime.utcnow().isoformat(),
+        "error": str(error),
+        "rows": rows,
+    }
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def upload_batches(
+    batches,
+    source: str,
+    concurrency: int = 4,
+    max_retries: int = 5,
+    journal_path: str = DEFAULT_JOURNAL_PATH,
+    manifest: CheckpointManifest | None = None,
+    metrics: IngestMetrics | None = None,
+):
+    """
+    Upload (batch_num, rows, nbytes) tuples concurrently with at most
+    `concurrency` batches in flight. Returns (rows_uploaded, rows_failed).
+
+    Each finished batch is recorded in `manifest` (committed or journaled)
+    as soon as it completes, so a crash loses at most the in-flight batches.
+    """
+    supabase = get_supabase_admin()
+    metrics = metrics or IngestMetrics(source)
+    total_uploaded = 0
+    total_failed = 0
+    in_flight = {}
+
+    def _transfer(rows):
+        with metrics.stage("transfer"):
+            return _insert_with_retry(supabase, rows, max_retries)
+
+    def _collect(done):
+        nonlocal total_uploaded, total_failed
+        for future in done:
+            batch_num, rows, nbytes = in_flight.pop(future)
+            try:
+                total_uploaded += future.result()
+                metrics.add_batch(len(rows), nbytes)
+                if manifest:
+                    with metrics.stage("commit"):
+                        manifest.mark_batch(source, batch_num, len(rows))
+                print(f"  ✅ Batch {batch_num}: Uploaded {len(rows)} records (Total: {total_uploaded})")
+            except Exception as e:
+                total_failed += len(rows)
+                print(f"  ❌ Batch {batch_num} failed after {max_retries} attempts: {str(e)}")
+                _journal_failure(journal_path, source, batch_num, rows, e)
+                if manifest:
+                    manifest.mark_batch(source, batch_num, len(rows), journaled=True)
 
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for batch_num, rows, nbytes in batches:
+            # Bound the number of batches held in memory / in flight
+            if len(in_flight) >= concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                _collect(done)
+            future = executor.submit(_transfer, rows)
+            in_flight[future] = (batch_num, rows, nbytes)
 
-def upload_wildfire_csv(csv_file_path: str, batch_size: int = 1000):
+        _collect(wait(in_flight).done)
+
+    return total_uploaded, total_failed
+
+
+def upload_wildfire_csv(
+    csv_file_path: str,
+    batch_size: int = 1000,
+    concurrency: int = 4,
+    max_retries: int = 5,
+    journal_path: str = DEFAULT_JOURNAL_PATH,
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    resume: bool = True,
+):
     """
     Upload wildfire predictions from CSV file to Supabase.
     
     Args:
         csv_file_path: Path to the CSV file
         batch_size: Number of rows to upload in each batch (default: 1000)
+        concurrency: Maximum number of batches in flight at once (default: 4)
+        max_retries: Attempts per batch before it is journaled (default: 5)
+        journal_path: JSONL file that receives batches that still failed
+        checkpoint_path: JSON manifest recording committed batches per file
+        resume: Skip batches the manifest already records (default: True)
     
     CSV columns expected:
         latitude, longitude, valid_time, fire_prob, prediction_class, 
@@ -31,61 +223,40 @@ def upload_wildfire_csv(csv_file_path: str, batch_size: int = 1000):
     print(f"📂 Reading CSV file: {csv_file_path}")
     
     try:
-        # Read CSV
-        df = pd.read_csv(csv_file_path)
-        print(f"✅ Loaded {len(df)} rows from CSV")
-        
-        # Rename columns to match database schema (lowercase with underscores)
-        column_mapping = {
-            'GaPa_NaPa': 'gapa_napa',
-            'DISTRICT': 'district',
-            'PR_NAME': 'pr_name',
-            'PROVINCE': 'province'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Convert date columns to proper format
-        if 'valid_time' in df.columns:
-            df['valid_time'] = pd.to_datetime(df['valid_time'])
-        
-        if 'prediction_date' in df.columns:
-            df['prediction_date'] = pd.to_datetime(df['prediction_date'])
-        
-        # Ensure fire_category is lowercase
-        if 'fire_category' in df.columns:
-            df['fire_category'] = df['fire_category'].str.lower()
-        
-        # Convert DataFrame to list of dictionaries
-        records = df.to_dict('records')
-        
-        # Initialize Supabase client
-        supabase = get_supabase_admin()
-        
-        # Upload in batches
-        total_uploaded = 0
-        total_batches = (len(records) + batch_size - 1) // batch_size
-        
-        print(f"📤 Uploading {len(records)} records in {total_batches} batches...")
-        
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            
-            try:
-                # Insert batch into Supabase
-                response = supabase.table("wildfire_predictions").insert(batch).execute()
-                total_uploaded += len(batch)
-                print(f"  ✅ Batch {batch_num}/{total_batches}: Uploaded {len(batch)} records (Total: {total_uploaded})")
-            
-            except Exception as e:
-                print(f"  ❌ Error in batch {batch_num}: {str(e)}")
-                print(f"     First record in failed batch: {batch[0]}")
-                # Continue with next batch instead of stopping
-                continue
-        
-        print(f"\n🎉 Upload complete! Total records uploaded: {total_uploaded}/{len(records)}")
+        manifest = CheckpointManifest(checkpoint_path)
+        checksum = file_checksum(csv_file_path)
+        if resume and manifest.is_complete(csv_file_path, checksum):
+            print(f"⏭️  Already uploaded according to {checkpoint_path} — skipping")
+            return 0
+        manifest.open_file(csv_file_path, batch_size, resume=resume, checksum=checksum)
+        metrics = IngestMetrics(csv_file_path)
+
+        print(f"📤 Uploading in batches of {batch_size} ({concurrency} in flight)...")
+
+        total_uploaded, total_failed = upload_batches(
+            iter_wildfire_batches(
+                csv_file_path,
+                batch_size,
+                skip=manifest.skip_batches(csv_file_path),
+                metrics=metrics,
+                checksum=checksum,
+            ),
+            source=csv_file_path,
+            concurrency=concurrency,
+            max_retries=max_retries,
+            journal_path=journal_path,
+            manifest=manifest,
+            metrics=metrics,
+        )
+        manifest.mark_complete(csv_file_path)
+        metrics.emit()
+
+        print(f"\n🎉 Upload complete! Total records uploaded: {total_uploaded}/{total_uploaded + total_failed}")
+        if total_failed:
+            print(f"⚠️  {total_failed} records journaled to {journal_path} — re-run with --replay to retry them")
         
         # Verify upload
+        supabase = get_supabase_admin()
         count_response = supabase.table("wildfire_predictions").select("id", count="exact").execute()
         print(f"📊 Total records in database: {count_response.count}")
         
@@ -96,12 +267,62 @@ def upload_wildfire_csv(csv_file_path: str, batch_size: int = 1000):
         raise
 
 
-def upload_multiple_csv_files(directory_path: str):
+def replay_failure_journal(
+    journal_path: str = DEFAULT_JOURNAL_PATH,
+    concurrency: int = 4,
+    max_retries: int = 5,
+):
+    """
+    Retry every batch recorded in the failure journal.
+    Batches that fail again are written to a fresh journal in its place.
+    A `.replaying` file left by an interrupted replay is retried as well.
+    """
+    replaying_path = journal_path + ".replaying"
+    if not os.path.exists(journal_path) and not os.path.exists(replaying_path):
+        print(f"✅ No failure journal at {journal_path} — nothing to replay")
+        return 0
+
+    if not os.path.exists(replaying_path):
+        os.replace(journal_path, replaying_path)
+    elif os.path.exists(journal_path):
+        # Interrupted replay: merge instead of overwriting its unreplayed batches
+        with open(journal_path, "rb") as src, open(replaying_path, "ab") as dst:
+            shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(journal_path)
+
+    def _entries():
+        with open(replaying_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield entry["batch"], entry["rows"], len(line)
+
+    print(f"🔁 Replaying failed batches from {journal_path}...")
+    metrics = IngestMetrics(f"replay:{journal_path}")
+    total_uploaded, total_failed = upload_batches(
+        _entries(),
+        source=f"replay:{journal_path}",
+        concurrency=concurrency,
+        max_retries=max_retries,
+        journal_path=journal_path,
+        metrics=metrics,
+    )
+    os.remove(replaying_path)
+    metrics.emit()
+
+    print(f"\n🎉 Replay complete! Recovered {total_uploaded} records, {total_failed} still failing")
+    return total_uploaded
+
+
+def upload_multiple_csv_files(directory_path: str, **upload_kwargs):
     """
     Upload all CSV files from a directory.
     
     Args:
         directory_path: Path to directory containing CSV files
+        **upload_kwargs: Passed through to upload_wildfire_csv
     """
     import glob
     
@@ -120,7 +341,7 @@ def upload_multiple_csv_files(directory_path: str):
         print('='*60)
         
         try:
-            uploaded = upload_wildfire_csv(csv_file)
+            uploaded = upload_wildfire_csv(csv_file, **upload_kwargs)
             total_uploaded += uploaded
         except Exception as e:
             print(f"⚠️  Skipping {csv_file} due to error: {str(e)}")
@@ -164,19 +385,36 @@ if __name__ == "__main__":
     parser.add_argument("--directory", type=str, help="Path to directory containing CSV files")
     parser.add_argument("--clear", action="store_true", help="Clear all existing records (USE WITH CAUTION)")
     parser.add_argument("--batch-size", type=int, default=1000, help="Batch size for uploads (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max batches in flight at once (default: 4)")
+    parser.add_argument("--max-retries", type=int, default=5, help="Attempts per batch before journaling it (default: 5)")
+    parser.add_argument("--journal", type=str, default=DEFAULT_JOURNAL_PATH, help=f"Failure journal path (default: {DEFAULT_JOURNAL_PATH})")
+    parser.add_argument("--replay", action="store_true", help="Retry batches recorded in the failure journal")
+    parser.add_argument("--checkpoint", type=str, default=DEFAULT_CHECKPOINT_PATH, help=f"Checkpoint manifest path (default: {DEFAULT_CHECKPOINT_PATH})")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint manifest and upload from the start")
     
     args = parser.parse_args()
+    upload_kwargs = {
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "max_retries": args.max_retries,
+        "journal_path": args.journal,
+        "checkpoint_path": args.checkpoint,
+        "resume": not args.no_resume,
+    }
     
     if args.clear:
         clear_wildfire_predictions()
+    elif args.replay:
+        replay_failure_journal(args.journal, args.concurrency, args.max_retries)
     elif args.file:
-        upload_wildfire_csv(args.file, args.batch_size)
+        upload_wildfire_csv(args.file, **upload_kwargs)
     elif args.directory:
-        upload_multiple_csv_files(args.directory)
+        upload_multiple_csv_files(args.directory, **upload_kwargs)
     else:
-        print("❌ Please provide either --file or --directory argument")
+        print("❌ Please provide either --file, --directory or --replay argument")
         print("\nExamples:")
         print("  python scripts/upload_wildfire_csv.py --file data/wildfire_predictions.csv")
         print("  python scripts/upload_wildfire_csv.py --directory data/wildfire_csvs/")
+        print("  python scripts/upload_wildfire_csv.py --replay  # Retry journaled failed batches")
         print("  python scripts/upload_wildfire_csv.py --clear  # Delete all records")
         sys.exit(1)
@@ -11,6 +11,8 @@ from dotenv import load_dotenv
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from ingest_checkpoint import CheckpointManifest, IngestMetrics, file_checksum
+
 # Load environment variables
 load_dotenv()
 
@@ -55,147 +57,173 @@ def test_connection():
         print(f"❌ Connection failed: {e}")
         return False
 
-def upload_wildfire_csv(csv_path, batch_size=5000, use_copy=True):
-    """Upload wildfire predictions from CSV to Neon database"""
+COLUMNS = [
+    'latitude', 'longitude', 'elevation', 'valid_time', 'fire_prob',
+    'prediction_class', 'fire_category', 'gapa_napa', 'district',
+    'pr_name', 'province', 'prediction_date'
+]
+
+INSERT_QUERY = """
+    INSERT INTO wildfire_predictions (
+        latitude, longitude, elevation, valid_time, fire_prob,
+        prediction_class, fire_category, gapa_napa, district,
+        pr_name, province, prediction_date
+    ) VALUES %s
+"""
+
+DEFAULT_CHECKPOINT_PATH = "wildfire_neon_checkpoint.json"
+
+
+def prepare_chunk(df):
+    """Rename columns and coerce dtypes of one CSV chunk to match the table."""
+    # Rename columns to match database schema
+    column_mapping = {
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+        'Elevation': 'elevation',
+        'valid_time': 'valid_time',
+        'fire_prob': 'fire_prob',
+        'prediction_class': 'prediction_class',
+        'fire_category': 'fire_category',
+        'gapa_napa': 'gapa_napa',
+        'district': 'district',
+        'pr_name': 'pr_name',
+        'province': 'province'
+    }
+    df = df.rename(columns=column_mapping)
+    
+    # Handle missing values - use None instead of pd.NA
+    df['elevation'] = df['elevation'].fillna(0).astype(int)
+    df['province'] = df['province'].fillna(0).astype(int)
+    df['gapa_napa'] = df['gapa_napa'].fillna('')
+    df['district'] = df['district'].fillna('')
+    df['pr_name'] = df['pr_name'].fillna('')
+    
+    # Convert valid_time to datetime
+    df['valid_time'] = pd.to_datetime(df['valid_time'])
+    df['prediction_date'] = df['valid_time'].dt.date
+    
+    # Ensure proper data types
+    df['latitude'] = df['latitude'].astype(float)
+    df['longitude'] = df['longitude'].astype(float)
+    df['fire_prob'] = df['fire_prob'].astype(float)
+    df['prediction_class'] = df['prediction_class'].astype(int)
+    return df[COLUMNS]
+
+
+def upload_wildfire_csv(csv_path, batch_size=5000, use_copy=True,
+                        checkpoint_path=DEFAULT_CHECKPOINT_PATH, resume=True):
+    """
+    Upload wildfire predictions from CSV to Neon database.
+
+    The file is read and committed in chunks of `batch_size` rows; each
+    committed chunk is recorded in the checkpoint manifest, so a re-run after
+    a crash skips straight to the first uncommitted chunk. (A crash between a
+    commit and the manifest write can replay at most that one chunk.)
+    """
     try:
-        print(f"📂 Reading CSV file: {csv_path}")
-        df = pd.read_csv(csv_path)
-        print(f"✅ Loaded {len(df)} rows from CSV\n")
-        
-        # Display sample data
-        print("📋 Sample data (first 2 rows):")
-        print(df.head(2).to_string())
-        print()
-        
-        # Rename columns to match database schema
-        column_mapping = {
-            'latitude': 'latitude',
-            'longitude': 'longitude',
-            'Elevation': 'elevation',
-            'valid_time': 'valid_time',
-            'fire_prob': 'fire_prob',
-            'prediction_class': 'prediction_class',
-            'fire_category': 'fire_category',
-            'gapa_napa': 'gapa_napa',
-            'district': 'district',
-            'pr_name': 'pr_name',
-            'province': 'province'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Handle missing values - use None instead of pd.NA
-        df['elevation'] = df['elevation'].fillna(0).astype(int)
-        df['province'] = df['province'].fillna(0).astype(int)
-        df['gapa_napa'] = df['gapa_napa'].fillna('')
-        df['district'] = df['district'].fillna('')
-        df['pr_name'] = df['pr_name'].fillna('')
-        
-        # Convert valid_time to datetime
-        df['valid_time'] = pd.to_datetime(df['valid_time'])
-        df['prediction_date'] = df['valid_time'].dt.date
-        
-        # Ensure proper data types
-        df['latitude'] = df['latitude'].astype(float)
-        df['longitude'] = df['longitude'].astype(float)
-        df['fire_prob'] = df['fire_prob'].astype(float)
-        df['prediction_class'] = df['prediction_class'].astype(int)
+        manifest = CheckpointManifest(checkpoint_path)
+        checksum = file_checksum(csv_path)
+        if resume and manifest.is_complete(csv_path, checksum):
+            print(f"⏭️  {csv_path} already uploaded according to {checkpoint_path} — skipping")
+            return
+        entry = manifest.open_file(csv_path, batch_size, resume=resume, checksum=checksum)
+        skip = manifest.skip_batches(csv_path)
+        resuming = bool(skip)
+        metrics = IngestMetrics(csv_path)
+
+        print(f"📂 Reading CSV file: {csv_path} ({entry['size_bytes'] / 1_000_000:.1f} MB)")
+        reader = pd.read_csv(csv_path, chunksize=batch_size)
         
         # Connect to database
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Check existing data for this date
-        cursor.execute("""
-            SELECT COUNT(*) FROM wildfire_predictions 
-            WHERE prediction_date = %s
-        """, (df['prediction_date'].iloc[0],))
-        existing_count = cursor.fetchone()[0]
-        
-        if existing_count > 0:
-            print(f"⚠️  Found {existing_count} existing records for {df['prediction_date'].iloc[0]}")
-            response = input("Do you want to delete existing records and upload new ones? (yes/no): ")
-            if response.lower() == 'yes':
+        total_inserted = entry['rows']
+        batch_num = 0
+        method = "COPY" if use_copy else "INSERT"
+        print(f"🚀 Using {method} in batches of {batch_size}...")
+
+        while True:
+            with metrics.stage("parse"):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            batch_num += 1
+            if batch_num in skip:
+                continue
+
+            with metrics.stage("transform"):
+                df = prepare_chunk(chunk)
+
+            if batch_num == 1:
+                # Display sample data
+                print("📋 Sample data (first 2 rows):")
+                print(chunk.head(2).to_string())
+                print()
+
+            if batch_num == 1 and not resuming:
+                # Check existing data for this date
                 cursor.execute("""
-                    DELETE FROM wildfire_predictions 
+                    SELECT COUNT(*) FROM wildfire_predictions 
                     WHERE prediction_date = %s
                 """, (df['prediction_date'].iloc[0],))
-                conn.commit()
-                print(f"✅ Deleted {existing_count} existing records")
+                existing_count = cursor.fetchone()[0]
+                
+                if existing_count > 0:
+                    print(f"⚠️  Found {existing_count} existing records for {df['prediction_date'].iloc[0]}")
+                    response = input("Do you want to delete existing records and upload new ones? (yes/no): ")
+                    if response.lower() == 'yes':
+                        cursor.execute("""
+                            DELETE FROM wildfire_predictions 
+                            WHERE prediction_date = %s
+                        """, (df['prediction_date'].iloc[0],))
+                        conn.commit()
+                        print(f"✅ Deleted {existing_count} existing records")
+                    else:
+                        print("❌ Upload cancelled")
+                        cursor.close()
+                        conn.close()
+                        return
+
+            if use_copy:
+                with metrics.stage("transform"):
+                    # Convert to CSV string for COPY
+                    output = StringIO()
+                    df.to_csv(output, sep='\t', header=False, index=False, na_rep='\\N')
+                    nbytes = output.tell()
+                    output.seek(0)
+
+                with metrics.stage("transfer"):
+                    cursor.copy_from(
+                        output,
+                        'wildfire_predictions',
+                        columns=COLUMNS,
+                        sep='\t',
+                        null='\\N'
+                    )
             else:
-                print("❌ Upload cancelled")
-                cursor.close()
-                conn.close()
-                return
-        
-        if use_copy:
-            print(f"🚀 Using COPY method for fast bulk insert...")
-            
-            # Prepare data for COPY
-            df_copy = df[[
-                'latitude', 'longitude', 'elevation', 'valid_time', 'fire_prob',
-                'prediction_class', 'fire_category', 'gapa_napa', 'district',
-                'pr_name', 'province', 'prediction_date'
-            ]].copy()
-            
-            # Convert to CSV string
-            output = StringIO()
-            df_copy.to_csv(output, sep='\t', header=False, index=False, na_rep='\\N')
-            output.seek(0)
-            
-            # Use COPY command
-            cursor.copy_from(
-                output,
-                'wildfire_predictions',
-                columns=[
-                    'latitude', 'longitude', 'elevation', 'valid_time', 'fire_prob',
-                    'prediction_class', 'fire_category', 'gapa_napa', 'district',
-                    'pr_name', 'province', 'prediction_date'
-                ],
-                sep='\t',
-                null='\\N'
-            )
-            conn.commit()
-            print(f"✅ Successfully uploaded {len(df)} records using COPY")
-            
-        else:
-            print(f"📤 Uploading in batches of {batch_size}...")
-            
-            # Prepare data for batch insert
-            records = []
-            for _, row in df.iterrows():
-                records.append((
-                    float(row['latitude']),
-                    float(row['longitude']),
-                    int(row['elevation']),
-                    row['valid_time'],
-                    float(row['fire_prob']),
-                    int(row['prediction_class']),
-                    str(row['fire_category']),
-                    str(row['gapa_napa']),
-                    str(row['district']),
-                    str(row['pr_name']),
-                    int(row['province']),
-                    row['prediction_date']
-                ))
-            
-            # Insert in batches
-            insert_query = """
-                INSERT INTO wildfire_predictions (
-                    latitude, longitude, elevation, valid_time, fire_prob,
-                    prediction_class, fire_category, gapa_napa, district,
-                    pr_name, province, prediction_date
-                ) VALUES %s
-            """
-            
-            total_inserted = 0
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                execute_values(cursor, insert_query, batch)
+                with metrics.stage("transform"):
+                    records = [
+                        (float(r[0]), float(r[1]), int(r[2]), r[3], float(r[4]), int(r[5]),
+                         str(r[6]), str(r[7]), str(r[8]), str(r[9]), int(r[10]), r[11])
+                        for r in df.itertuples(index=False, name=None)
+                    ]
+                    nbytes = int(chunk.memory_usage(deep=True).sum())
+
+                with metrics.stage("transfer"):
+                    execute_values(cursor, INSERT_QUERY, records)
+
+            with metrics.stage("commit"):
                 conn.commit()
-                total_inserted += len(batch)
-                print(f"✅ Uploaded {total_inserted}/{len(records)} records...")
-            
-            print(f"✅ Successfully uploaded {total_inserted} records")
+            metrics.add_batch(len(df), nbytes)
+            manifest.mark_batch(csv_path, batch_num, len(df))
+            total_inserted += len(df)
+            print(f"✅ Uploaded batch {batch_num} ({total_inserted} records so far)...")
+
+        manifest.mark_complete(csv_path)
+        print(f"✅ Successfully uploaded {total_inserted} records using {method}")
+        metrics.emit()
         
         # Show statistics
         cursor.execute("""
@@ -225,7 +253,8 @@ def upload_wildfire_csv(csv_path, batch_size=5000, use_copy=True):
         import traceback
         traceback.print_exc()
 
-def upload_directory(directory_path, batch_size=5000):
+def upload_directory(directory_path, batch_size=5000, use_copy=True,
+                     checkpoint_path=DEFAULT_CHECKPOINT_PATH, resume=True):
     """Upload all CSV files from a directory"""
     csv_files = [f for f in os.listdir(directory_path) if f.endswith('.csv')]
     
@@ -241,7 +270,7 @@ def upload_directory(directory_path, batch_size=5000):
         print('='*60)
         
         csv_path = os.path.join(directory_path, csv_file)
-        upload_wildfire_csv(csv_path, batch_size)
+        upload_wildfire_csv(csv_path, batch_size, use_copy, checkpoint_path, resume)
 
 def main():
     parser = argparse.ArgumentParser(description='Upload wildfire predictions to Neon database')
@@ -250,15 +279,19 @@ def main():
     parser.add_argument('--directory', type=str, help='Path to directory containing CSV files')
     parser.add_argument('--batch-size', type=int, default=5000, help='Batch size for inserts')
     parser.add_argument('--no-copy', action='store_true', help='Use INSERT instead of COPY')
+    parser.add_argument('--checkpoint', type=str, default=DEFAULT_CHECKPOINT_PATH, help='Checkpoint manifest path')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore the checkpoint manifest and upload from the start')
     
     args = parser.parse_args()
     
     if args.test:
         test_connection()
     elif args.file:
-        upload_wildfire_csv(args.file, args.batch_size, use_copy=not args.no_copy)
+        upload_wildfire_csv(args.file, args.batch_size, use_copy=not args.no_copy,
+                            checkpoint_path=args.checkpoint, resume=not args.no_resume)
     elif args.directory:
-        upload_directory(args.directory, args.batch_size)
+        upload_directory(args.directory, args.batch_size, use_copy=not args.no_copy,
+                         checkpoint_path=args.checkpoint, resume=not args.no_resume)
     else:
         parser.print_help()
 
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from app.services.journal import Journal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = Journal(str(tmp_path), "test_journal")
+    yield j
+    j.close()
+
+
+def _reopen(journal: Journal, directory) -> Journal:
+    journal.close()
+    return Journal(str(directory), "test_journal")
+
+
+def test_replay_returns_everything_past_the_committed_offset(journal, tmp_path):
+    ends = journal.append([{"n": 1}, {"n": 2}, {"n": 3}])
+    journal.commit(ends[0])
+
+    journal = _reopen(journal, tmp_path)
+    try:
+        assert [(row["n"], end) for row, end in journal.replay()] == [(2, ends[1]), (3, ends[2])]
+    finally:
+        journal.close()
+
+
+def test_commit_of_everything_truncates_and_resets_the_offset(journal):
+    ends = journal.append([{"n": 1}, {"n": 2}])
+    journal.commit(ends[-1])
+    assert os.path.getsize(journal.path) == 0
+    assert journal.committed == 0
+    assert journal.replay() == []
+
+    ends = journal.append([{"n": 3}])
+    assert [row["n"] for row, _ in journal.replay()] == [3]
+    assert ends == [os.path.getsize(journal.path)]
+
+
+def test_torn_final_line_is_dropped(journal, tmp_path):
+    journal.append([{"n": 1}])
+    with open(journal.path, "ab") as f:
+        f.write(b'{"n": 2')
+
+    journal = _reopen(journal, tmp_path)
+    try:
+        assert [row["n"] for row, _ in journal.replay()] == [1]
+        # The torn bytes are gone, so the next append starts on a clean line
+        journal.append([{"n": 3}])
+        assert [row["n"] for row, _ in journal.replay()] == [1, 3]
+    finally:
+        journal.close()
+
+
+@pytest.mark.parametrize("stale_offset", [999, 4])
+def test_offset_past_the_end_or_mid_line_is_reset(journal, tmp_path, stale_offset):
+    journal.append([{"n": 1}, {"n": 2}])
+    with open(journal.offset_path, "w") as f:
+        f.write(str(stale_offset))
+
+    journal = _reopen(journal, tmp_path)
+    try:
+        assert journal.committed == 0
+        assert [row["n"] for row, _ in journal.replay()] == [1, 2]
+    finally:
+        journal.close()
+
+
+def test_each_open_journal_gets_its_own_slot(journal, tmp_path):
+    other = Journal(str(tmp_path), "test_journal")
+    try:
+        assert other.path != journal.path
+    finally:
+        other.close()
@@ -0,0 +1,90 @@
+import hashlib
+
+import pytest
+
+from app.services.blockchain_service import (
+    CHAIN_GENESIS_HASH,
+    build_merkle_tree,
+    chain_link,
+    merkle_proof,
+    verify_chain,
+    verify_merkle_proof,
+)
+
+
+def _leaves(n: int) -> list[str]:
+    return [hashlib.sha256(f"record-{i}".encode()).hexdigest() for i in range(n)]
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        build_merkle_tree([])
+
+
+def test_single_leaf_is_its_own_root():
+    leaf = _leaves(1)[0]
+    levels = build_merkle_tree([leaf])
+    assert levels == [[leaf]]
+    assert merkle_proof(levels, 0) == []
+    assert verify_merkle_proof(leaf, [], leaf)
+
+
+@pytest.mark.parametrize("n", [2, 3, 4, 5, 7, 8, 33, 256])
+def test_every_leaf_proves_into_the_root(n):
+    leaves = _leaves(n)
+    levels = build_merkle_tree(leaves)
+    root = levels[-1][0]
+    assert len(levels[-1]) == 1
+    for i, leaf in enumerate(leaves):
+        assert verify_merkle_proof(leaf, merkle_proof(levels, i), root)
+
+
+def test_proof_does_not_verify_another_leaf_or_root():
+    leaves = _leaves(5)
+    levels = build_merkle_tree(leaves)
+    root = levels[-1][0]
+    proof = merkle_proof(levels, 2)
+    assert not verify_merkle_proof(leaves[3], proof, root)
+    assert not verify_merkle_proof(leaves[2], proof, build_merkle_tree(_leaves(6))[-1][0])
+
+
+def test_leaf_order_changes_the_root():
+    leaves = _leaves(4)
+    assert build_merkle_tree(leaves)[-1][0] != build_merkle_tree(leaves[::-1])[-1][0]
+
+
+def _chain(record_hashes: list[str], prev_hash: str = CHAIN_GENESIS_HASH, first_seq: int = 1) -> list[dict]:
+    entries = []
+    for seq, record_hash in enumerate(record_hashes, start=first_seq):
+        chain_hash = chain_link(prev_hash, record_hash)
+        entries.append({"seq": seq, "record_hash": record_hash, "prev_hash": prev_hash, "chain_hash": chain_hash})
+        prev_hash = chain_hash
+    return entries
+
+
+def test_intact_chain_has_no_breaks():
+    assert verify_chain(_chain(_leaves(10)), CHAIN_GENESIS_HASH, 0) == []
+
+
+def test_chain_verifies_from_the_middle():
+    entries = _chain(_leaves(10))
+    start = entries[3]
+    assert verify_chain(entries[4:], start["chain_hash"], start["seq"]) == []
+
+
+def test_tampered_record_hash_is_reported():
+    entries = _chain(_leaves(5))
+    entries[2]["record_hash"] = _leaves(6)[5]
+    assert verify_chain(entries, CHAIN_GENESIS_HASH, 0) == [
+        {"seq": 3, "reason": "chain_hash does not match its inputs"},
+    ]
+
+
+def test_gap_and_relinked_entry_are_both_reported():
+    entries = _chain(_leaves(6))
+    del entries[2]
+    breaks = verify_chain(entries, CHAIN_GENESIS_HASH, 0)
+    assert {"seq": 4, "reason": "gap after seq 2"} in breaks
+    assert {"seq": 4, "reason": "prev_hash does not match previous entry"} in breaks
+    # The scan resumes from the stored hash, so later links are still checked
+    assert all(b["seq"] == 4 for b in breaks)
@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.api.records as records
+
+
+def _item(**overrides) -> dict:
+    item = {
+        "full_name": "Sita Sharma",
+        "citizenship_no": "12-34-56",
+        "relief_amount": 5000,
+        "province": "Bagmati",
+        "district": "Kathmandu",
+        "disaster_type": "flood",
+        "officer_name": "Ram",
+        "officer_id": "OFF-1",
+    }
+    item.update(overrides)
+    return item
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """/records with the database replaced by an in-memory id set."""
+    existing: set[str] = set()
+    inserts: list[list[dict]] = []
+    audited: list[int] = []
+
+    def insert_bulk(rows):
+        inserts.append(rows)
+        new = [r for r in rows if r["id"] not in existing]
+        existing.update(r["id"] for r in new)
+        return new
+
+    async def log_actions(entries):
+        audited.append(len(entries))
+
+    monkeypatch.setattr(records, "_insert_bulk", insert_bulk)
+    monkeypatch.setattr(records, "log_actions", log_actions)
+    monkeypatch.setattr(records.anchor_queue, "notify", lambda: None)
+
+    app = FastAPI()
+    app.include_router(records.router)
+    c = TestClient(app)
+    c.existing, c.inserts, c.audited = existing, inserts, audited
+    return c
+
+
+def test_bulk_counts_created_invalid_and_duplicate(client):
+    resent = str(uuid.uuid4())
+    client.existing.add(resent)
+    repeated = str(uuid.uuid4())
+
+    res = client.post("/records/bulk", json={"records": [
+        _item(),
+        _item(relief_amount=-1),                 # invalid: amount must be > 0
+        _item(client_record_id=resent),          # already in the DB
+        _item(client_record_id=repeated),
+        _item(client_record_id=repeated),        # repeated within the request
+        _item(full_name=None),                   # invalid: missing name
+        _item(officer_id="", officer_name=""),   # defaults filled in
+    ]})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["duplicate"], body["invalid"]) == (3, 2, 2)
+    assert [r["status"] for r in body["results"]] == [
+        "created", "invalid", "duplicate", "created", "duplicate", "invalid", "created",
+    ]
+    assert [r["index"] for r in body["results"]] == list(range(7))
+    assert body["results"][3]["id"] == repeated
+    # One multi-row insert of the unique valid rows, all audited together
+    assert len(client.inserts) == 1 and len(client.inserts[0]) == 4
+    assert client.inserts[0][-1]["officer_id"] == "OFF-DIRECT"
+    assert client.audited == [3]
+
+
+def test_bulk_resend_is_all_duplicates(client):
+    batch = {"records": [_item(client_record_id=str(uuid.uuid4())) for _ in range(3)]}
+    assert client.post("/records/bulk", json=batch).json()["created"] == 3
+    body = client.post("/records/bulk", json=batch).json()
+    assert (body["created"], body["duplicate"], body["invalid"]) == (0, 3, 0)
+
+
+def test_bulk_with_only_invalid_items_skips_the_insert(client):
+    body = client.post("/records/bulk", json={"records": [_item(relief_amount=0), {"unexpected": 1}]}).json()
+    assert (body["created"], body["duplicate"], body["invalid"]) == (0, 0, 2)
+    assert client.inserts == []
+
+
+def test_bulk_rejects_an_empty_batch(client):
+    assert client.post("/records/bulk", json={"records": []}).status_code == 422
@@ -0,0 +1,52 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import app.api.records as records
+
+
+def test_parse_sync_cursor():
+    record_id = str(uuid.uuid4())
+    assert records._parse_sync_cursor("0") == ("0", None)
+    assert records._parse_sync_cursor("12345") == ("12345", None)
+    assert records._parse_sync_cursor(f"12345:{record_id}") == ("12345", record_id)
+    # Ids are normalised, so a cursor can't smuggle anything else into the RPC
+    assert records._parse_sync_cursor(f"7:{record_id.upper()}") == ("7", record_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "-1", "12:not-a-uuid", "1.5", "12:" + "0" * 40])
+def test_parse_sync_cursor_rejects_garbage(cursor):
+    with pytest.raises(HTTPException) as e:
+        records._parse_sync_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_sync_bootstrap_uses_the_bootstrap_rpc(monkeypatch):
+    calls = []
+
+    class Rpc:
+        def __init__(self, name, params):
+            calls.append((name, params))
+
+        def execute(self):
+            class Res:
+                data = {"records": [], "deleted": [], "aggregates": {}, "has_more": False,
+                        "next_xid": "42", "next_id": None}
+            return Res()
+
+    class Supabase:
+        def rpc(self, name, params):
+            return Rpc(name, params)
+
+    monkeypatch.setattr(records, "_supabase", lambda: Supabase())
+    app = FastAPI()
+    app.include_router(records.router)
+    client = TestClient(app)
+
+    res = client.get("/records/sync", params={"bootstrap": "true", "limit": 100})
+    assert res.json()["cursor"] == "42"
+    assert calls == [("relief_records_bootstrap", {"p_recent": 100})]
+    # A cursor means the client already bootstrapped
+    assert client.get("/records/sync", params={"bootstrap": "true", "since": "42"}).status_code == 400
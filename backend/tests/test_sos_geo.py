@@ -0,0 +1,117 @@
+import random
+import time
+
+import pytest
+
+from app.services.sos_geo import SOSGeoIndex, haversine_km
+
+
+def _index(rows: list[dict], cell_degrees: float = 0.05) -> SOSGeoIndex:
+    index = SOSGeoIndex(cell_degrees=cell_degrees)
+    for row in rows:
+        index.upsert(row)
+    return index
+
+
+def _random_rows(rng: random.Random, n: int) -> list[dict]:
+    # Roughly Nepal, plus a few far-away outliers
+    rows = []
+    for i in range(n):
+        lat, lng = rng.uniform(26.3, 30.5), rng.uniform(80.0, 88.2)
+        if i % 50 == 0:
+            lat, lng = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        rows.append({
+            "id": f"sos-{i}",
+            "status": rng.choice(["pending", "pending", "acknowledged", "dispatched"]),
+            "gps_lat": lat,
+            "gps_long": lng,
+        })
+    return rows
+
+
+def _brute_force(rows, lat, lng, limit, radius_km, statuses):
+    found = sorted(
+        (haversine_km(lat, lng, r["gps_lat"], r["gps_long"]), r["id"])
+        for r in rows
+        if (statuses is None or r["status"] in statuses)
+    )
+    if radius_km is not None:
+        found = [f for f in found if f[0] <= radius_km]
+    return found[:limit]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("limit,radius_km,statuses", [
+    (1, None, ("pending",)),
+    (10, None, ("pending",)),
+    (25, 40.0, None),
+    (5, 2.0, ("pending", "acknowledged")),
+])
+def test_nearest_matches_brute_force(seed, limit, radius_km, statuses):
+    rng = random.Random(seed)
+    rows = _random_rows(rng, 400)
+    index = _index(rows)
+    for _ in range(20):
+        lat, lng = rng.uniform(26.3, 30.5), rng.uniform(80.0, 88.2)
+        got = index.nearest(lat, lng, limit=limit, radius_km=radius_km, statuses=statuses)
+        expected = _brute_force(rows, lat, lng, limit, radius_km, statuses)
+        assert [r["id"] for r in got] == [request_id for _, request_id in expected]
+        assert [r["distance_km"] for r in got] == [round(d, 3) for d, _ in expected]
+
+
+def test_nearest_on_an_empty_index():
+    assert SOSGeoIndex().nearest(27.7, 85.3) == []
+
+
+def test_closed_and_unlocated_requests_leave_the_index():
+    index = _index([
+        {"id": "a", "status": "pending", "gps_lat": 27.7, "gps_long": 85.3},
+        {"id": "b", "status": "pending", "gps_lat": 27.71, "gps_long": 85.31},
+    ])
+    index.upsert({"id": "a", "status": "resolved", "gps_lat": 27.7, "gps_long": 85.3})
+    index.upsert({"id": "b", "status": "pending", "gps_lat": None, "gps_long": None})
+    assert index.nearest(27.7, 85.3) == []
+    assert index.stats()["cells"] == 0
+
+
+def test_moved_request_is_found_at_its_new_position():
+    index = _index([{"id": "a", "status": "pending", "gps_lat": 27.7, "gps_long": 85.3}])
+    index.upsert({"id": "a", "status": "pending", "gps_lat": 28.2, "gps_long": 83.98})
+    assert index.in_bbox(27.6, 85.2, 27.8, 85.4) == []
+    assert [r["id"] for r in index.nearest(28.2, 83.98, radius_km=1)] == ["a"]
+
+
+@pytest.mark.parametrize("lat,lng", [(0, 0), (-45, -100), (-89.9, -179.9), (89.9, 179.9)])
+def test_far_query_matches_brute_force_and_stays_fast(lat, lng):
+    rng = random.Random(7)
+    rows = [
+        {"id": f"sos-{i}", "status": "pending", "gps_lat": rng.uniform(26.3, 30.5), "gps_long": rng.uniform(80.0, 88.2)}
+        for i in range(300)
+    ]
+    index = _index(rows)
+    started = time.perf_counter()
+    got = index.nearest(lat, lng, limit=5)
+    assert time.perf_counter() - started < 0.1
+    assert [r["id"] for r in got] == [request_id for _, request_id in _brute_force(rows, lat, lng, 5, None, ("pending",))]
+
+
+def test_dense_grid_uses_the_ring_walk_and_matches_brute_force():
+    # Every cell of a 40x40 block is occupied, so nearby queries walk rings
+    rows = [
+        {"id": f"sos-{i}-{j}", "status": "pending", "gps_lat": 27.0 + i * 0.05 + 0.01, "gps_long": 84.0 + j * 0.05 + 0.02}
+        for i in range(40) for j in range(40)
+    ]
+    index = _index(rows)
+    visited = []
+    matching = index._matching
+    index._matching = lambda ids, statuses: visited.append(1) or matching(ids, statuses)
+    rng = random.Random(3)
+    for limit, radius_km in [(8, 15), (1, None), (20, None)]:
+        for _ in range(25):
+            lat, lng = rng.uniform(27.0, 29.0), rng.uniform(84.0, 86.0)
+            visited.clear()
+            got = index.nearest(lat, lng, limit=limit, radius_km=radius_km)
+            expected = _brute_force(rows, lat, lng, limit, radius_km, ("pending",))
+            assert [r["distance_km"] for r in got] == [round(d, 3) for d, _ in expected]
+            # Stopped early instead of touching every occupied cell
+            assert len(visited) < len(rows) // 4
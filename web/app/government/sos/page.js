@@ -44,10 +44,21 @@ export default function GovernmentSOSPage() {
 
   useEffect(() => { fetchData(); }, []);
 
-  // Auto-refresh every 10 seconds
+  // Live updates pushed by the backend (Server-Sent Events)
   useEffect(() => {
-    const interval = setInterval(fetchData, 10000);
-    return () => clearInterval(interval);
+    const source = new EventSource("http://localhost:8005/sos/stream");
+    const upsert = (e) => {
+      const request = JSON.parse(e.data);
+      setRequests((prev) =>
+        prev.some((r) => r.id === request.id)
+          ? prev.map((r) => (r.id === request.id ? { ...r, ...request } : r))
+          : [request, ...prev]
+      );
+    };
+    source.addEventListener("created", upsert);
+    source.addEventListener("updated", upsert);
+    source.addEventListener("resync", fetchData);
+    return () => source.close();
   }, []);
 
   const fetchData = async () => {
@@ -208,6 +219,11 @@ export default function GovernmentSOSPage() {
                         <span className="text-xs text-gray-500 font-mono">
                           {timeSince(r.created_at)}
                         </span>
+                        {r.tap_count > 1 && (
+                          <span className="px-2 py-0.5 rounded-full text-[10px] font-bold bg-red-50 text-red-700 ring-1 ring-red-200">
+                            {r.tap_count} taps
+                          </span>
+                        )}
                       </div>
 
                       <div className="flex items-center gap-5 text-sm text-gray-600">
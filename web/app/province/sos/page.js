@@ -43,18 +43,31 @@ export default function ProvinceSOSPage() {
   const [searchTerm, setSearchTerm] = useState("");
   const [updatingId, setUpdatingId] = useState(null);
 
-  useEffect(() => { fetchData(); }, []);
+  const provinceQuery = user?.province ? `?province=${encodeURIComponent(user.province)}` : "";
 
-  // Auto-refresh every 10 seconds
+  useEffect(() => { fetchData(); }, [provinceQuery]);
+
+  // Live updates for this province pushed by the backend (Server-Sent Events)
   useEffect(() => {
-    const interval = setInterval(fetchData, 10000);
-    return () => clearInterval(interval);
-  }, []);
+    const source = new EventSource(`http://localhost:8005/sos/stream${provinceQuery}`);
+    const upsert = (e) => {
+      const request = JSON.parse(e.data);
+      setRequests((prev) =>
+        prev.some((r) => r.id === request.id)
+          ? prev.map((r) => (r.id === request.id ? { ...r, ...request } : r))
+          : [request, ...prev]
+      );
+    };
+    source.addEventListener("created", upsert);
+    source.addEventListener("updated", upsert);
+    source.addEventListener("resync", fetchData);
+    return () => source.close();
+  }, [provinceQuery]);
 
   const fetchData = async () => {
     try {
       setRefreshing(true);
-      const res = await fetch("http://localhost:8005/sos/requests");
+      const res = await fetch(`http://localhost:8005/sos/requests${provinceQuery}`);
       const data = await res.json();
       if (data.success) setRequests(data.requests || []);
     } catch (e) {
@@ -212,6 +225,11 @@ export default function ProvinceSOSPage() {
                         <span className="text-xs text-gray-500 font-mono">
                           {timeSince(r.created_at)}
                         </span>
+                        {r.tap_count > 1 && (
+                          <span className="px-2 py-0.5 rounded-full text-[10px] font-bold bg-red-50 text-red-700 ring-1 ring-red-200">
+                            {r.tap_count} taps
+                          </span>
+                        )}
                       </div>
 
                       <div className="flex items-center gap-5 text-sm text-gray-600">